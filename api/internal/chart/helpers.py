@@ -1,17 +1,27 @@
-from datetime import datetime
+import hashlib
+import json
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 
 from cerberus import Validator
 from dateutil import parser
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
 from django.db import connection
 from django.db.models import Case, F, FloatField, Value, When
 from django.db.models.fields.json import KeyTextTransform
 from django.db.models.functions import Cast, Trunc
 from django.utils import timezone
 from django.utils.functional import cached_property
+from redis.exceptions import RedisError
 from rest_framework.exceptions import ValidationError
 
 from codecov_auth.models import Owner
 from core.models import Commit, Repository
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
 
 
 class ChartParamValidator(Validator):
@@ -139,6 +149,15 @@ class ChartQueryRunner:
     the associated parameter validation + transformation required for it.
     """
 
+    # columns of the query results that are cached as strings
+    numeric_columns = (
+        "total_hits",
+        "total_misses",
+        "total_partials",
+        "total_lines",
+        "coverage",
+    )
+
     def __init__(self, user, request_params):
         self.user = user
         self.request_params = request_params
@@ -197,9 +216,9 @@ class ChartQueryRunner:
         return ""
 
     @cached_property
-    def repoids(self):
+    def repos(self) -> list[tuple[int, str]]:
         """
-        Returns a string of repoids of the repositories being queried.
+        Returns the (repoid, branch) of the repositories being queried.
         """
         organization = Owner.objects.get(
             service=self.request_params["service"],
@@ -215,13 +234,44 @@ class ChartQueryRunner:
         if self.request_params.get("repositories", []):
             repos = repos.filter(name__in=self.request_params.get("repositories", []))
 
-        if repos:
+        return list(repos.values_list("repoid", "branch"))
+
+    @cached_property
+    def repoids(self):
+        """
+        Returns a string of repoids of the repositories being queried.
+        """
+        if self.repos:
             # Get repoids into a format easily plugged into raw SQL
-            return (
-                "("
-                + ",".join(map(str, list(repos.values_list("repoid", flat=True))))
-                + ")"
-            )
+            return "(" + ",".join(str(repoid) for repoid, _ in self.repos) + ")"
+
+    @property
+    def complete_commits(self):
+        """
+        SQL selecting (repoid, branch, timestamp, totals) of complete commits.
+        When the daily coverage rollups are available only the most recent
+        complete commit of each day is selected from them, which is all the
+        queries below need since they pick the latest commit of a time window.
+        """
+        if settings.COVERAGE_ROLLUP_ENABLED:
+            return """
+                SELECT
+                    d.repoid,
+                    d.branch,
+                    d.last_complete_timestamp AS timestamp,
+                    d.last_complete_totals AS totals
+                FROM core_dailycoveragerollup d
+                WHERE d.last_complete_timestamp IS NOT NULL
+            """
+        return """
+            SELECT
+                c.repoid,
+                c.branch,
+                c.timestamp,
+                c.totals
+            FROM commits c
+            WHERE c.state = 'complete'
+        """
 
     @cached_property
     def first_complete_commit_date(self):
@@ -232,25 +282,21 @@ class ChartQueryRunner:
         with connection.cursor() as cursor:
             cursor.execute(
                 f"""
-                WITH relevant_repo_branches AS (
-                    SELECT
-                        r.repoid,
-                        r.branch
-                    FROM repos r
-                    WHERE r.repoid IN {self.repoids}
-                )
-
                 SELECT
-                    DATE_TRUNC('{self.grouping_unit}', c.timestamp AT TIME ZONE 'UTC') as truncated_date
-                FROM commits c
-                INNER JOIN relevant_repo_branches r ON c.repoid = r.repoid AND c.branch = r.branch
-                WHERE c.state = 'complete'
-                ORDER BY c.timestamp ASC LIMIT 1;
+                    DATE_TRUNC('{self.grouping_unit}', MIN(c.timestamp) AT TIME ZONE 'UTC') as truncated_date
+                FROM repos r
+                CROSS JOIN LATERAL (
+                    SELECT c.timestamp
+                    FROM ({self.complete_commits}) c
+                    WHERE c.repoid = r.repoid AND c.branch = r.branch
+                    ORDER BY c.timestamp ASC LIMIT 1
+                ) c
+                WHERE r.repoid IN {self.repoids};
                 """
             )
             date = self._dictfetchall(cursor)
 
-        if date:
+        if date and date[0]["truncated_date"]:
             return datetime.date(date[0]["truncated_date"])
 
     def _validate_parameters(self):
@@ -290,6 +336,129 @@ class ChartQueryRunner:
         if not self.first_complete_commit_date:
             return []
 
+        start = max(self.truncate(self.start_date), self.first_complete_commit_date)
+
+        # windows that were already computed are served from the cache so that
+        # only the remaining tail has to be queried
+        cached = self._read_cache()
+        query_start = start
+        while query_start in cached and query_start <= self.end_date:
+            query_start = self.next_window(query_start)
+
+        results = [cached[window] for window in self._windows(start, query_start)]
+        if query_start <= self.end_date:
+            rows = self._query_windows(query_start)
+            results += rows
+            self._write_cache(rows)
+
+        results.sort(key=lambda row: row["date"], reverse=self.ordering == "DESC")
+        return results
+
+    def truncate(self, value: date) -> date:
+        """
+        Python equivalent of Postgres' DATE_TRUNC for `self.grouping_unit`.
+        """
+        if self.grouping_unit == "week":
+            return value - timedelta(days=value.weekday())
+        if self.grouping_unit == "month":
+            return value.replace(day=1)
+        if self.grouping_unit == "quarter":
+            return value.replace(month=3 * ((value.month - 1) // 3) + 1, day=1)
+        if self.grouping_unit == "year":
+            return value.replace(month=1, day=1)
+        return value
+
+    def next_window(self, window: date) -> date:
+        if self.grouping_unit == "quarter":
+            return window + relativedelta(months=3)
+        return window + relativedelta(**{f"{self.grouping_unit}s": 1})
+
+    def _windows(self, start: date, end: date):
+        window = start
+        while window < end:
+            yield window
+            window = self.next_window(window)
+
+    @property
+    def cache_key(self) -> str:
+        # the branches are part of the key so that changing the default branch
+        # of a repo doesn't serve the datapoints of the previous one
+        repos = hashlib.sha256(json.dumps(self.repos).encode()).hexdigest()
+        return "/".join(
+            [
+                "charts",
+                self.request_params["service"],
+                self.request_params["owner_username"],
+                self.grouping_unit,
+                repos,
+            ]
+        )
+
+    def _read_cache(self) -> dict:
+        """
+        Returns the cached rows keyed by the date of their window.
+        """
+        if not settings.CHART_CACHE_TTL:
+            return {}
+        try:
+            values = get_redis_connection().hgetall(self.cache_key)
+        except (OSError, RedisError) as e:
+            log.warning(f"Error reading chart cache: {e}")
+            return {}
+
+        cached = {}
+        for window, value in values.items():
+            row = json.loads(value)
+            cached[date.fromisoformat(window.decode())] = {
+                "date": datetime.fromisoformat(row["date"]),
+                **{
+                    name: None if row[name] is None else Decimal(row[name])
+                    for name in self.numeric_columns
+                },
+            }
+        return cached
+
+    def _write_cache(self, rows: list[dict]):
+        """
+        Caches the rows of windows that are over. The current (and any future)
+        window can still change and is always queried, and so is the previous
+        one since commits made at its end are often only processed after it.
+        """
+        if not settings.CHART_CACHE_TTL:
+            return
+        current_window = self.truncate(datetime.date(timezone.now()))
+        previous_window = self.truncate(current_window - timedelta(days=1))
+        values = {}
+        for row in rows:
+            window = row["date"].date()
+            if window >= previous_window:
+                continue
+            values[window.isoformat()] = json.dumps(
+                {
+                    "date": row["date"].isoformat(),
+                    **{
+                        name: None if row[name] is None else str(row[name])
+                        for name in self.numeric_columns
+                    },
+                }
+            )
+        if not values:
+            return
+        try:
+            pipeline = get_redis_connection().pipeline()
+            pipeline.hset(self.cache_key, mapping=values)
+            pipeline.expire(self.cache_key, settings.CHART_CACHE_TTL)
+            pipeline.execute()
+        except (OSError, RedisError) as e:
+            log.warning(f"Error writing chart cache: {e}")
+
+    def _query_windows(self, start: date):
+        """
+        Computes the datapoints of every window from `start` to `self.end_date`.
+        Only the commits inside that range are scanned, along with the latest
+        commit of each repo before it, whose totals carry over into the range
+        until the repo has a newer commit.
+        """
         with connection.cursor() as cursor:
             cursor.execute(
                 f"""
@@ -297,7 +466,7 @@ class ChartQueryRunner:
                     SELECT
                         t::date AS "date"
                     FROM generate_series(
-                        timestamp '{self.first_complete_commit_date}',
+                        timestamp '{start}',
                         timestamp '{self.end_date}',
                         '{self.interval}'
                     ) t
@@ -315,21 +484,56 @@ class ChartQueryRunner:
                         r.repoid
                     FROM date_series ds
                     CROSS JOIN graph_repos r
+                ), range_commits AS (
+                    SELECT
+                        c.repoid,
+                        c.timestamp,
+                        c.totals
+                    FROM
+                        ({self.complete_commits}) c
+                    INNER JOIN graph_repos r ON r.repoid = c.repoid
+                        AND r.branch = c.branch
+                    WHERE c.timestamp >= timestamp '{start}'
+                        AND c.timestamp < timestamp '{self.end_date}' + interval '{self.interval}'
+                ), carried_over_commits AS (
+                    SELECT
+                        c.repoid,
+                        c.timestamp,
+                        c.totals
+                    FROM graph_repos r
+                    CROSS JOIN LATERAL (
+                        SELECT
+                            c.repoid,
+                            c.timestamp,
+                            c.totals
+                        FROM ({self.complete_commits}) c
+                        WHERE c.repoid = r.repoid
+                            AND c.branch = r.branch
+                            AND c.timestamp < timestamp '{start}'
+                        ORDER BY c.timestamp DESC
+                        LIMIT 1
+                    ) c
                 ), t_ranked_commits AS (
                     SELECT
                         ROW_NUMBER() OVER (
-                            PARTITION BY c.repoid, DATE_TRUNC('{self.grouping_unit}', c.timestamp)
+                            PARTITION BY c.repoid, GREATEST(
+                                DATE_TRUNC('{self.grouping_unit}', c.timestamp),
+                                timestamp '{start}'
+                            )
                             ORDER BY timestamp DESC NULLS LAST
                         ) AS commit_rank,
-                        DATE_TRUNC('{self.grouping_unit}', c.timestamp) AS "truncated_date",
+                        GREATEST(
+                            DATE_TRUNC('{self.grouping_unit}', c.timestamp),
+                            timestamp '{start}'
+                        ) AS "truncated_date",
                         c.timestamp AS commit_timestamp,
                         c.totals,
-                        r.repoid
-                    FROM
-                        commits c
-                    INNER JOIN graph_repos r ON r.repoid = c.repoid
-                        AND r.branch = c.branch
-                        AND c.state = 'complete'
+                        c.repoid
+                    FROM (
+                        SELECT * FROM range_commits
+                        UNION ALL
+                        SELECT * FROM carried_over_commits
+                    ) c
                 ), commits_spine AS (
                     SELECT
                         s.date AS spine_date,
@@ -400,8 +604,7 @@ class ChartQueryRunner:
 
                 SELECT
                     *
-                FROM summed_totals
-                WHERE date >= DATE_TRUNC('{self.grouping_unit}', timestamp '{self.start_date}');
+                FROM summed_totals;
                 """
             )
 
@@ -7,7 +7,7 @@ from rest_framework.views import APIView
 from api.shared.mixins import RepoPropertyMixin
 from api.shared.permissions import RepositoryArtifactPermissions
 from api.shared.report.serializers import TreeSerializer
-from services.path import ReportPaths
+from services.path import ReportPaths, directory_totals_index
 
 
 class CoverageViewSet(viewsets.ViewSet, RepoPropertyMixin):
@@ -45,6 +45,6 @@ class CoverageViewSet(viewsets.ViewSet, RepoPropertyMixin):
     )
     def tree(self, request, *args, **kwargs):
         report = self.get_object()
-        paths = ReportPaths(report)
+        paths = ReportPaths(report, index=directory_totals_index(report))
         serializer = TreeSerializer(paths.single_directory(), many=True)
         return Response(serializer.data)
@@ -4,10 +4,11 @@ from math import isclose
 from random import randint
 from unittest.mock import patch
 
+import fakeredis
 import pytest
 from dateutil.relativedelta import relativedelta
 from ddf import G
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from factory.faker import faker
 from pytz import UTC
@@ -646,6 +647,81 @@ class TestChartQueryRunnerQuery(TestCase):
         assert len(results) == 2
         assert results[0]["date"] > results[1]["date"]
 
+    def _past_range_query_runner(self):
+        self.commit1.timestamp = datetime(2023, 1, 2, 10, tzinfo=UTC)
+        self.commit1.save()
+        self.commit4 = G(
+            model=Commit,
+            repository=self.repo1,
+            totals={"h": 110, "n": 120, "p": 5, "m": 5},
+            branch=self.repo1.branch,
+            state="complete",
+            timestamp=datetime(2023, 1, 4, 10, tzinfo=UTC),
+        )
+        return ChartQueryRunner(
+            user=self.user,
+            request_params={
+                "owner_username": self.org.username,
+                "service": self.org.service,
+                "start_date": "2023-01-03",
+                "end_date": "2023-01-05",
+                "grouping_unit": "day",
+            },
+        )
+
+    @override_settings(CHART_CACHE_TTL=0)
+    def test_query_carries_over_totals_from_before_start_date(self):
+        results = self._past_range_query_runner().run_query()
+
+        assert [result["date"].date() for result in results] == [
+            date(2023, 1, 3),
+            date(2023, 1, 4),
+            date(2023, 1, 5),
+        ]
+        assert [result["total_hits"] for result in results] == [100, 110, 110]
+        assert [result["total_lines"] for result in results] == [120, 120, 120]
+
+    def test_query_caches_past_windows(self):
+        redis = fakeredis.FakeStrictRedis()
+        with patch(
+            "api.internal.chart.helpers.get_redis_connection", return_value=redis
+        ):
+            query_runner = self._past_range_query_runner()
+            results = query_runner.run_query()
+            assert len(redis.hgetall(query_runner.cache_key)) == 3
+
+            # served from the cache, so the change is not picked up
+            Commit.objects.filter(pk=self.commit4.pk).update(
+                totals={"h": 0, "n": 120, "p": 0, "m": 120}
+            )
+            query_runner = ChartQueryRunner(
+                user=self.user, request_params=query_runner.request_params
+            )
+            assert query_runner.run_query() == results
+            assert results[1]["coverage"] == Decimal("95.83")
+
+    def test_query_cache_key_changes_with_branch(self):
+        query_runner = self._past_range_query_runner()
+        cache_key = query_runner.cache_key
+
+        self.repo1.branch = "other"
+        self.repo1.save()
+        query_runner = ChartQueryRunner(
+            user=self.user, request_params=query_runner.request_params
+        )
+        assert query_runner.cache_key != cache_key
+
+    @patch("api.internal.chart.helpers.timezone.now")
+    def test_query_doesnt_cache_previous_window(self, mocked_now):
+        mocked_now.return_value = datetime(2023, 1, 5, 12, tzinfo=UTC)
+        redis = fakeredis.FakeStrictRedis()
+        with patch(
+            "api.internal.chart.helpers.get_redis_connection", return_value=redis
+        ):
+            query_runner = self._past_range_query_runner()
+            query_runner.run_query()
+            assert list(redis.hgetall(query_runner.cache_key)) == [b"2023-01-03"]
+
     def test_query_doesnt_crash_if_no_commits(self):
         with self.subTest("no repos case"):
             self.org.repository_set.all().delete()
@@ -188,6 +188,23 @@ class TestCompareViewSetRetrieve(APITestCase):
             content_type="application/json",
         )
 
+    def _get_changes(self, query_params={}):
+        if query_params == {}:
+            query_params = {"base": self.base.commitid, "head": self.head.commitid}
+
+        return self.client.get(
+            reverse(
+                "compare-changes",
+                kwargs={
+                    "service": self.org.service,
+                    "owner_username": self.org.username,
+                    "repo_name": self.repo.name,
+                },
+            ),
+            data=query_params,
+            content_type="application/json",
+        )
+
     def test_can_return_public_repo_comparison_with_not_authenticated(
         self, adapter_mock, base_report_mock, head_report_mock
     ):
@@ -511,3 +528,75 @@ class TestCompareViewSetRetrieve(APITestCase):
         )
 
         assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @patch("services.archive.ArchiveService.write_file")
+    @patch("services.archive.ArchiveService.read_file")
+    def test_changes_returns_and_stores_file_changes(
+        self,
+        read_file_mock,
+        write_file_mock,
+        adapter_mock,
+        base_report_mock,
+        head_report_mock,
+    ):
+        read_file_mock.side_effect = Exception("not found")
+        adapter_mock.return_value = self.mocked_compare_adapter
+        base_report_mock.return_value = self.base_report
+        head_report_mock.return_value = self.head_report
+
+        response = self._get_changes()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == [
+            {
+                "name": {"base": self.file_name, "head": self.file_name},
+                "has_diff": True,
+                "change_summary": {},
+                "segments": [[4, 43, 4, 3]],
+            }
+        ]
+        # the changes, then their version
+        paths = [call.args[0] for call in write_file_mock.call_args_list]
+        assert len(paths) == 2
+        assert paths[0].endswith("/file_changes/commits.json")
+        assert paths[1].endswith("/file_changes/commits.version.json")
+
+    @patch("redis.Redis.get", lambda self, key: None)
+    @patch("redis.Redis.set", lambda self, key, val, ex: None)
+    @patch(
+        "services.comparison.PullRequestComparison.pseudo_diff_adjusts_tracked_lines",
+        new_callable=PropertyMock,
+    )
+    @patch(
+        "services.comparison.PullRequestComparison.allow_coverage_offsets",
+        new_callable=PropertyMock,
+    )
+    @patch(
+        "services.comparison.Comparison.stored_file_changes", new_callable=PropertyMock
+    )
+    def test_changes_pseudo_comparison_returns_error_even_if_stored(
+        self,
+        stored_file_changes_mock,
+        allow_coverage_offsets_mock,
+        pseudo_diff_adjusts_tracked_lines_mock,
+        adapter_mock,
+        base_report_mock,
+        head_report_mock,
+    ):
+        stored_file_changes_mock.return_value = []
+        pseudo_diff_adjusts_tracked_lines_mock.return_value = True
+        allow_coverage_offsets_mock.return_value = False
+
+        response = self._get_changes(
+            query_params={
+                "pullid": PullFactory(
+                    base=self.base.commitid,
+                    head=self.head.commitid,
+                    compared_to=self.base.commitid,
+                    pullid=2,
+                    repository=self.repo,
+                ).pullid
+            }
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
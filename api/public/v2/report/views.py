@@ -1,5 +1,7 @@
 from typing import List, Optional
 
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import mixins, viewsets
@@ -24,7 +26,11 @@ from codecov_auth.authentication import (
 )
 from core.models import Commit
 from services.components import commit_components, component_filtered_report
-from services.path import ReportPaths, dashboard_commit_file_url
+from services.path import (
+    ReportPaths,
+    dashboard_commit_file_url,
+    directory_totals_index,
+)
 
 
 class ReportMixin:
@@ -155,6 +161,15 @@ class BaseReportViewSet(
     def retrieve(self, request, *args, **kwargs):
         report = self.get_object()
         serializer = self.get_serializer(report)
+        if (
+            settings.REPORT_STREAMING_ENABLED
+            and request.accepted_renderer.format == "json"
+        ):
+            # the report is only serialized as the response is being consumed
+            return StreamingHttpResponse(
+                serializer.iter_json(report),
+                content_type=request.accepted_renderer.media_type,
+            )
         return Response(serializer.data)
 
 
@@ -252,7 +267,7 @@ class ReportViewSet(BaseReportViewSet):
         """
         report = self.get_object()
         path = request.query_params.get("path")
-        paths = ReportPaths(report, path=path)
+        paths = ReportPaths(report, path=path, index=directory_totals_index(report))
         serializer = TreeSerializer(
             paths.single_directory(),
             many=True,
@@ -1,3 +1,4 @@
+import json
 import os
 from unittest.mock import call, patch
 from urllib.parse import urlencode
@@ -222,6 +223,23 @@ class ReportViewSetTestCase(TestCase):
 
         build_report_from_commit.assert_called_once_with(self.commit1)
 
+    @patch("services.report.build_report_from_commit")
+    def test_report_streaming(self, build_report_from_commit, get_repo_permissions):
+        get_repo_permissions.return_value = (True, True)
+        build_report_from_commit.return_value = sample_report()
+
+        expected = self._request_report().json()
+        with override_settings(REPORT_STREAMING_ENABLED=True):
+            res = self._request_report()
+        assert res.status_code == 200
+        assert res.streaming
+        assert res["Content-Type"] == "application/json"
+        assert json.loads(b"".join(res.streaming_content)) == expected
+        assert [file["name"] for file in expected["files"]] == [
+            "foo/file1.py",
+            "bar/file2.py",
+        ]
+
     @patch("services.report.build_report_from_commit")
     def test_report_commit_sha(self, build_report_from_commit, get_repo_permissions):
         get_repo_permissions.return_value = (True, True)
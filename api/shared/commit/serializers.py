@@ -1,4 +1,8 @@
+from typing import Iterator
+
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
 from shared.reports.resources import Report, ReportFile
 from shared.utils.merge import line_type
 
@@ -93,8 +97,59 @@ class ReportSerializer(serializers.Serializer):
     totals = ReportTotalsSerializer(label="coverage totals")
     files = serializers.SerializerMethodField(label="file specific coverage totals")
 
+    # how much encoded JSON to accumulate before handing it to the response
+    stream_chunk_size = 64 * 1024
+
     def get_files(self, report: Report) -> ReportFileSerializer:
-        return [
-            ReportFileSerializer(report.get(file), context=self.context).data
-            for file in report.files
-        ]
+        return list(self.iter_files(report))
+
+    def iter_files(self, report: Report) -> Iterator[dict]:
+        for file in report.files:
+            yield ReportFileSerializer(report.get(file), context=self.context).data
+
+    def iter_json(self, report: Report) -> Iterator[bytes]:
+        """
+        Encode the serialized report as JSON incrementally, serializing each file
+        only when it's about to be written, so that memory usage does not grow
+        with the size of the report. The output matches the `JSONRenderer` one.
+        """
+        encoder = encoders.JSONEncoder(
+            ensure_ascii=not api_settings.UNICODE_JSON,
+            allow_nan=not api_settings.STRICT_JSON,
+            separators=(",", ":") if api_settings.COMPACT_JSON else (", ", ": "),
+        )
+
+        buffer = []
+        size = 0
+        for part in self._iter_json_parts(report, encoder):
+            buffer.append(part)
+            size += len(part)
+            if size >= self.stream_chunk_size:
+                yield "".join(buffer).encode("utf-8")
+                buffer = []
+                size = 0
+        if buffer:
+            yield "".join(buffer).encode("utf-8")
+
+    def _iter_json_parts(
+        self, report: Report, encoder: encoders.JSONEncoder
+    ) -> Iterator[str]:
+        yield "{"
+        for index, (name, field) in enumerate(self.fields.items()):
+            if index > 0:
+                yield encoder.item_separator
+            yield encoder.encode(name) + encoder.key_separator
+            if name == "files":
+                yield "["
+                for file_index, file in enumerate(self.iter_files(report)):
+                    if file_index > 0:
+                        yield encoder.item_separator
+                    yield encoder.encode(file)
+                yield "]"
+            else:
+                attribute = field.get_attribute(report)
+                value = (
+                    None if attribute is None else field.to_representation(attribute)
+                )
+                yield encoder.encode(value)
+        yield "}"
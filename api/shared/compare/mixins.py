@@ -1,3 +1,5 @@
+from typing import Optional
+
 from rest_framework import mixins, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound, PermissionDenied
@@ -13,7 +15,11 @@ from services.comparison import (
 )
 from services.decorators import torngit_safe
 
-from .serializers import FileComparisonSerializer, FlagComparisonSerializer
+from .serializers import (
+    FileChangeSerializer,
+    FileComparisonSerializer,
+    FlagComparisonSerializer,
+)
 
 
 class CompareViewSetMixin(CompareSlugMixin, viewsets.GenericViewSet):
@@ -42,13 +48,12 @@ class CompareViewSetMixin(CompareSlugMixin, viewsets.GenericViewSet):
 
         return comparison
 
-    @torngit_safe
-    def retrieve(self, request, *args, **kwargs):
-        comparison = self.get_object()
-
-        # Some checks here for pseudo-comparisons. Basically, when pseudo-comparing,
-        # we sometimes might need to tweak the base report if the user allows us to
-        # in their yaml, or raise an error if not.
+    def _check_pseudo_comparison(self, comparison: Comparison) -> Optional[Response]:
+        """
+        Some checks here for pseudo-comparisons. Basically, when pseudo-comparing,
+        we sometimes might need to tweak the base report if the user allows us to
+        in their yaml, or return an error response if not.
+        """
         if isinstance(comparison, PullRequestComparison):
             if (
                 comparison.pseudo_diff_adjusts_tracked_lines
@@ -64,6 +69,14 @@ class CompareViewSetMixin(CompareSlugMixin, viewsets.GenericViewSet):
                     },
                     status=400,
                 )
+
+    @torngit_safe
+    def retrieve(self, request, *args, **kwargs):
+        comparison = self.get_object()
+
+        error_response = self._check_pseudo_comparison(comparison)
+        if error_response is not None:
+            return error_response
         serializer = self.get_serializer(comparison)
 
         try:
@@ -91,6 +104,25 @@ class CompareViewSetMixin(CompareSlugMixin, viewsets.GenericViewSet):
             ).data
         )
 
+    @action(detail=False, methods=["get"])
+    @torngit_safe
+    def changes(self, request, *args, **kwargs):
+        """
+        The change summary and segments of the compared files.  Once computed
+        these are stored, so they don't need to be compared again.
+        """
+        comparison = self.get_object()
+
+        error_response = self._check_pseudo_comparison(comparison)
+        if error_response is not None:
+            return error_response
+
+        try:
+            file_changes = comparison.file_changes
+        except MissingComparisonReport:
+            raise NotFound("Raw report not found for base or head reference.")
+        return Response(FileChangeSerializer(file_changes, many=True).data)
+
     @action(detail=False, methods=["get"])
     @torngit_safe
     def flags(self, request, *args, **kwargs):
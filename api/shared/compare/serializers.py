@@ -32,6 +32,13 @@ class FileComparisonSerializer(serializers.Serializer):
     lines = LineComparisonSerializer(many=True)
 
 
+class FileChangeSerializer(serializers.Serializer):
+    name = serializers.JSONField()
+    has_diff = serializers.BooleanField()
+    change_summary = serializers.JSONField()
+    segments = serializers.JSONField()
+
+
 class ComparisonSerializer(serializers.Serializer):
     base_commit = serializers.CharField(source="base_commit.commitid")
     head_commit = serializers.CharField(source="head_commit.commitid")
@@ -429,6 +429,17 @@ CORS_ALLOW_HEADERS = list(default_headers) + ["token-type"]
 
 SKIP_RISKY_MIGRATION_STEPS = get_config("migrations", "skip_risky_steps", default=False)
 
+# The daily coverage rollups are maintained by a trigger that is installed by a
+# "risky" migration step, so they're only usable if those steps were applied.
+COVERAGE_ROLLUP_ENABLED = get_config(
+    "setup", "coverage_rollup", "enabled", default=not SKIP_RISKY_MIGRATION_STEPS
+)
+
+# Same for the per-branch coverage snapshots used by the repository listings.
+COVERAGE_SNAPSHOT_ENABLED = get_config(
+    "setup", "coverage_snapshot", "enabled", default=not SKIP_RISKY_MIGRATION_STEPS
+)
+
 DJANGO_ADMIN_URL = get_config("django", "admin_url", default="admin")
 
 IS_ENTERPRISE = get_settings_module() == SettingsModule.ENTERPRISE.value
@@ -462,6 +473,88 @@ SENTRY_OAUTH_CLIENT_SECRET = get_config("setup", "sentry", "oauth_client_secret"
 # TODO: we can eventually get rid of this once it's confirmed working well for many repos
 REPORT_BUILDER_REPO_IDS = get_config("setup", "report_builder", "repo_ids", default=[])
 
+# upper bound (in bytes) of the process-wide cache of raw report data used by
+# `services.report.build_report_from_commit` - set to 0 to disable the cache
+REPORT_CACHE_MAX_BYTES = get_config(
+    "setup", "report_cache", "max_bytes", default=256 * 1024 * 1024
+)
+
+# stream the JSON of the full report endpoints one file at a time instead of
+# rendering the whole response in memory
+REPORT_STREAMING_ENABLED = get_config(
+    "setup", "report_streaming", "enabled", default=False
+)
+
+# how long rendered badges and graphs are cached for - set to 0 to disable
+GRAPH_CACHE_TTL = get_config("setup", "graph_cache", "ttl", default=24 * 60 * 60)
+# how long the commit a badge or graph URL renders is cached for, i.e. how long it
+# may take for a moved branch to show up - set to 0 to disable
+GRAPH_CACHE_DIGEST_TTL = get_config("setup", "graph_cache", "digest_ttl", default=60)
+
+# how long the datapoints of the analytics charts are cached for, the current
+# and previous windows are never cached - set to 0 to disable
+CHART_CACHE_TTL = get_config("setup", "chart_cache", "ttl", default=60 * 60)
+
+# how long (in seconds) the owner coverage series are cached for by each process
+# - set to 0 to disable
+MEASUREMENTS_CACHE_TTL = get_config("setup", "measurements_cache", "ttl", default=60)
+
+# how long (in seconds) the final yaml of commits is cached for - set to 0 to
+# disable
+COMMIT_YAML_CACHE_TTL = get_config(
+    "setup", "commit_yaml_cache", "ttl", default=7 * 24 * 60 * 60
+)
+
+# number of processes the files of large comparisons are compared by - 0 or 1
+# compares them one at a time in the request's process
+COMPARISON_PARALLEL_PROCESSES = get_config(
+    "setup", "comparison", "parallel_processes", default=0
+)
+# comparisons with fewer files that need to be traversed aren't worth sending to
+# the processes
+COMPARISON_PARALLEL_MIN_FILES = get_config(
+    "setup", "comparison", "parallel_min_files", default=200
+)
+
+# how long (in seconds) the flag coverage series of a repository are cached for,
+# i.e. how long it may take for new flag measurements to show up - set to 0 to
+# disable
+FLAG_MEASUREMENTS_CACHE_TTL = get_config(
+    "setup", "flag_measurements_cache", "ttl", default=15 * 60
+)
+
+# the `totalCount` of GraphQL connections with at least this many rows is
+# cached for a while (in seconds - set to 0 to disable) and, when asked for, is
+# replaced by the query planner's estimate
+CONNECTION_COUNT_LARGE = get_config(
+    "setup", "connection_count", "large", default=10_000
+)
+CONNECTION_COUNT_CACHE_TTL = get_config(
+    "setup", "connection_count", "cache_ttl", default=60
+)
+
+# count the uploads towards the monthly uploads limits with per-day counters in
+# redis instead of from the uploads table.  The counters of an owner are only
+# used for the reconcile interval (in seconds) after the `reconcile_upload_usage`
+# command recomputed them from the database, so the command has to be run more
+# often than that
+UPLOAD_USAGE_COUNTER_ENABLED = get_config(
+    "setup", "upload_usage_counter", "enabled", default=False
+)
+UPLOAD_USAGE_RECONCILE_INTERVAL = get_config(
+    "setup", "upload_usage_counter", "reconcile_interval", default=60 * 60
+)
+
+COMPARE_CACHE_TTL = get_config(
+    "setup", "compare_cache", "ttl", default=7 * 24 * 60 * 60
+)
+# how long a provider compare may take before its lock expires
+COMPARE_CACHE_LOCK_TIMEOUT = get_config(
+    "setup", "compare_cache", "lock_timeout", default=30
+)
+# how long to wait for a concurrent provider compare before fetching it again
+COMPARE_CACHE_LOCK_WAIT = get_config("setup", "compare_cache", "lock_wait", default=3)
+
 SENTRY_ENV = os.environ.get("CODECOV_ENV", False)
 SENTRY_DSN = os.environ.get("SERVICES__SENTRY__SERVER_DSN", None)
 if SENTRY_DSN is not None:
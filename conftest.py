@@ -42,3 +42,17 @@ def mock_redis(mocker):
     redis_server = fakeredis.FakeStrictRedis()
     m.return_value = redis_server
     yield redis_server
+
+
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    # these caches are process-wide so we need to make sure data doesn't leak
+    # between tests that reuse the same commits, owners and tokens
+    from services.repo_providers import _decrypt_token
+    from services.report import report_cache
+    from timeseries.helpers import measurements_cache
+
+    report_cache.clear()
+    measurements_cache.clear()
+    _decrypt_token.cache_clear()
+    yield
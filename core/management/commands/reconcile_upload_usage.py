@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandParser
+
+from reports.models import ReportSession
+from services.upload_usage import upload_usage
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the upload usage counters of owners from the database.  Meant to
+    be run periodically, more often than the reconcile interval of the counters,
+    so that they never need to be recomputed while checking an upload.  Without
+    `--ownerid`, reconciles every owner with recent uploads to private
+    repositories.
+    """
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--ownerid", type=int, action="append")
+
+    def handle(self, *args, **options):
+        ownerids = options["ownerid"]
+        if not ownerids:
+            ownerids = (
+                ReportSession.objects.filter(
+                    report__commit__repository__private=True,
+                    created_at__gte=upload_usage.window_start(),
+                    upload_type="uploaded",
+                )
+                .values_list("report__commit__repository__author_id", flat=True)
+                .order_by()
+                .distinct()
+            )
+
+        for ownerid in ownerids:
+            counts = upload_usage.reconcile(ownerid)
+            self.stdout.write(f"ownerid: {ownerid}, uploads: {sum(counts.values())}")
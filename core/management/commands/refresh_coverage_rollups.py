@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+
+from core.models import Repository
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the daily coverage rollups and the branch coverage snapshots of
+    each repository from its commits.  Both are kept up to date by triggers on
+    `commits` so this is only needed to repair them (or to populate them if the
+    migration steps that do so were skipped).
+    """
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--repoid", type=int, action="append")
+        # this can be used to retry if there's an error - restart the command
+        # from the last ID printed before failure
+        parser.add_argument("--starting-repoid", type=int)
+
+    def handle(self, *args, **options):
+        repoids = Repository.objects.order_by("repoid").values_list("repoid", flat=True)
+        if options["repoid"]:
+            repoids = repoids.filter(pk__in=options["repoid"])
+        if options["starting_repoid"]:
+            repoids = repoids.filter(pk__gte=options["starting_repoid"])
+
+        for repoid in repoids.iterator():
+            self.stdout.write(f"repoid: {repoid}")
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    DELETE FROM core_dailycoveragerollup WHERE repoid = %s;
+
+                    SELECT refresh_daily_coverage_rollup(repoid, branch, date)
+                    FROM (
+                        SELECT DISTINCT repoid, branch, timestamp::date AS date
+                        FROM commits
+                        WHERE repoid = %s
+                    ) days;
+
+                    DELETE FROM core_branchcoveragesnapshot WHERE repoid = %s;
+
+                    SELECT refresh_branch_coverage_snapshot(repoid, branch)
+                    FROM (
+                        SELECT DISTINCT repoid, branch
+                        FROM commits
+                        WHERE repoid = %s
+                    ) branches;
+                    """,
+                    [repoid, repoid, repoid, repoid],
+                )
@@ -1,6 +1,7 @@
 import datetime
 
 from dateutil import parser
+from django.conf import settings
 from django.db.models import (
     Avg,
     Count,
@@ -61,6 +62,9 @@ class RepositoryQuerySet(QuerySet):
             timestamp__lte=timestamp,
         ).order_by("-timestamp")
 
+        if settings.COVERAGE_SNAPSHOT_ENABLED:
+            return self._with_snapshot_recent_coverage(timestamp, commits_queryset)
+
         coverage = Cast(
             KeyTextTransform("c", "recent_commit_totals"),
             output_field=FloatField(),
@@ -92,6 +96,60 @@ class RepositoryQuerySet(QuerySet):
             lines=lines,
         )
 
+    def _with_snapshot_recent_coverage(self, timestamp, commits_queryset):
+        """
+        Same as `with_recent_coverage` but reads the coverage snapshot of the
+        default branch of each repository.  The latest complete commit of the
+        branch is the one we're after unless it's less than an hour old, in
+        which case (or if the snapshot is missing) we go look for it in
+        `commits`.
+        """
+        from core.models import BranchCoverageSnapshot
+
+        snapshots = BranchCoverageSnapshot.objects.filter(
+            repository_id=OuterRef("pk"),
+            branch=OuterRef("branch"),
+            latest_complete_timestamp__lte=timestamp,
+        )
+
+        # `commits` is only looked at when the snapshot can't be used, for as
+        # many columns as without snapshots
+        queryset = self.annotate(
+            recent_commit_totals=Coalesce(
+                Subquery(snapshots.values("latest_complete_totals")[:1]),
+                Subquery(commits_queryset.values("totals")[:1]),
+            ),
+            coverage_sha=Coalesce(
+                Subquery(snapshots.values("latest_complete_commitid")[:1]),
+                Subquery(commits_queryset.values("commitid")[:1]),
+            ),
+        )
+
+        coverage = Cast(
+            KeyTextTransform("c", "recent_commit_totals"),
+            output_field=FloatField(),
+        )
+        return queryset.annotate(
+            recent_coverage=coverage,
+            coverage=Coalesce(
+                coverage,
+                Value(-1),
+                output_field=FloatField(),
+            ),
+            hits=Cast(
+                KeyTextTransform("h", "recent_commit_totals"),
+                output_field=IntegerField(),
+            ),
+            misses=Cast(
+                KeyTextTransform("m", "recent_commit_totals"),
+                output_field=IntegerField(),
+            ),
+            lines=Cast(
+                KeyTextTransform("n", "recent_commit_totals"),
+                output_field=IntegerField(),
+            ),
+        )
+
     def with_latest_commit_totals_before(
         self, before_date, branch, include_previous_totals=False
     ):
@@ -240,13 +298,20 @@ class RepositoryQuerySet(QuerySet):
         - latest_commit_at as the true_coverage except NULL are transformed to 1/1/1900
         This make sure when we order the repo with no commit appears last.
         """
-        from core.models import Commit
+        from core.models import BranchCoverageSnapshot, Commit
 
-        latest_commit_at = Subquery(
-            Commit.objects.filter(repository_id=OuterRef("pk"))
-            .order_by("-timestamp")
-            .values("timestamp")[:1]
-        )
+        if settings.COVERAGE_SNAPSHOT_ENABLED:
+            latest_commit_at = Subquery(
+                BranchCoverageSnapshot.objects.filter(repository_id=OuterRef("pk"))
+                .order_by("-latest_commit_at")
+                .values("latest_commit_at")[:1]
+            )
+        else:
+            latest_commit_at = Subquery(
+                Commit.objects.filter(repository_id=OuterRef("pk"))
+                .order_by("-timestamp")
+                .values("timestamp")[:1]
+            )
         return self.annotate(
             true_latest_commit_at=latest_commit_at,
             latest_commit_at=Coalesce(
@@ -258,7 +323,15 @@ class RepositoryQuerySet(QuerySet):
         """
         Annotates the queryset with the oldest commit timestamp.
         """
-        from core.models import Commit
+        from core.models import BranchCoverageSnapshot, Commit
+
+        if settings.COVERAGE_SNAPSHOT_ENABLED:
+            snapshots = BranchCoverageSnapshot.objects.filter(
+                repository_id=OuterRef("pk")
+            ).order_by("oldest_commit_at")
+            return self.annotate(
+                oldest_commit_at=Subquery(snapshots.values("oldest_commit_at")[:1]),
+            )
 
         commits = Commit.objects.filter(repository_id=OuterRef("pk")).order_by(
             "timestamp"
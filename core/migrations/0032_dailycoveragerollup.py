@@ -0,0 +1,222 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+import core.models
+from utils.migrations import RiskyRunSQL
+
+# Reads a number out of the `totals` of a commit, ignoring values that aren't
+# numbers (rather than failing the statement that wrote the commit).
+totals_number_function = """
+CREATE OR REPLACE FUNCTION commit_totals_number(_totals jsonb, _key text)
+RETURNS double precision AS $$
+    SELECT CASE
+        WHEN _totals->>_key ~ '^\\s*[-+]?([0-9]+\\.?[0-9]*|\\.[0-9]+)([eE][-+]?[0-9]{1,2})?\\s*$'
+        THEN (_totals->>_key)::double precision
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+"""
+
+# Recomputes the rollup row for a single (repoid, branch, date) from `commits`,
+# deleting it if the day no longer has any relevant commits.  Concurrent refreshes
+# of a branch are serialized so that they can't write rows computed from stale
+# snapshots of `commits`.
+refresh_function = """
+CREATE OR REPLACE FUNCTION refresh_daily_coverage_rollup(
+    _repoid integer, _branch text, _date date
+) RETURNS void AS $$
+DECLARE
+    _coverage_min double precision;
+    _coverage_max double precision;
+    _coverage_sum double precision;
+    _commit_count integer;
+    _last_complete_timestamp timestamp;
+    _last_complete_totals jsonb;
+BEGIN
+    IF _repoid IS NULL OR _branch IS NULL OR _date IS NULL THEN
+        RETURN;
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(_repoid, hashtext(_branch));
+
+    SELECT min(coverage), max(coverage), sum(coverage), count(coverage)
+    INTO _coverage_min, _coverage_max, _coverage_sum, _commit_count
+    FROM (
+        SELECT commit_totals_number(totals, 'c') AS coverage
+        FROM commits
+        WHERE repoid = _repoid AND branch = _branch
+            AND timestamp >= _date AND timestamp < _date + 1
+    ) day_commits;
+
+    SELECT timestamp, totals
+    INTO _last_complete_timestamp, _last_complete_totals
+    FROM commits
+    WHERE repoid = _repoid AND branch = _branch AND state = 'complete'
+        AND timestamp >= _date AND timestamp < _date + 1
+    ORDER BY timestamp DESC
+    LIMIT 1;
+
+    IF _commit_count = 0 AND _last_complete_timestamp IS NULL THEN
+        DELETE FROM core_dailycoveragerollup
+        WHERE repoid = _repoid AND branch = _branch AND date = _date;
+    ELSE
+        INSERT INTO core_dailycoveragerollup (
+            repoid, branch, date, coverage_min, coverage_max, coverage_sum,
+            commit_count, last_complete_timestamp, last_complete_totals
+        ) VALUES (
+            _repoid, _branch, _date, _coverage_min, _coverage_max, _coverage_sum,
+            _commit_count, _last_complete_timestamp, _last_complete_totals
+        )
+        ON CONFLICT (repoid, branch, date) DO UPDATE SET
+            coverage_min = EXCLUDED.coverage_min,
+            coverage_max = EXCLUDED.coverage_max,
+            coverage_sum = EXCLUDED.coverage_sum,
+            commit_count = EXCLUDED.commit_count,
+            last_complete_timestamp = EXCLUDED.last_complete_timestamp,
+            last_complete_totals = EXCLUDED.last_complete_totals;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION commits_refresh_daily_coverage_rollup()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM refresh_daily_coverage_rollup(
+            OLD.repoid, OLD.branch, OLD.timestamp::date
+        );
+    END IF;
+    IF TG_OP = 'INSERT' OR (
+        TG_OP = 'UPDATE' AND (OLD.repoid, OLD.branch, OLD.timestamp::date)
+            IS DISTINCT FROM (NEW.repoid, NEW.branch, NEW.timestamp::date)
+    ) THEN
+        PERFORM refresh_daily_coverage_rollup(
+            NEW.repoid, NEW.branch, NEW.timestamp::date
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+triggers = """
+CREATE TRIGGER commits_daily_coverage_rollup_insert_delete
+AFTER INSERT OR DELETE ON commits
+FOR EACH ROW EXECUTE PROCEDURE commits_refresh_daily_coverage_rollup();
+
+CREATE TRIGGER commits_daily_coverage_rollup_update
+AFTER UPDATE OF repoid, branch, timestamp, state, totals ON commits
+FOR EACH ROW
+WHEN (
+    OLD.repoid IS DISTINCT FROM NEW.repoid
+    OR OLD.branch IS DISTINCT FROM NEW.branch
+    OR OLD.timestamp IS DISTINCT FROM NEW.timestamp
+    OR OLD.state IS DISTINCT FROM NEW.state
+    OR OLD.totals IS DISTINCT FROM NEW.totals
+)
+EXECUTE PROCEDURE commits_refresh_daily_coverage_rollup();
+"""
+
+drop_functions = """
+DROP FUNCTION IF EXISTS commits_refresh_daily_coverage_rollup();
+DROP FUNCTION IF EXISTS refresh_daily_coverage_rollup(integer, text, date);
+DROP FUNCTION IF EXISTS commit_totals_number(jsonb, text);
+"""
+
+drop_triggers = """
+DROP TRIGGER IF EXISTS commits_daily_coverage_rollup_update ON commits;
+DROP TRIGGER IF EXISTS commits_daily_coverage_rollup_insert_delete ON commits;
+"""
+
+# Populates the rollups from the existing commits in a single pass.
+backfill = """
+WITH stats AS (
+    SELECT
+        repoid,
+        branch,
+        timestamp::date AS date,
+        min(commit_totals_number(totals, 'c')) AS coverage_min,
+        max(commit_totals_number(totals, 'c')) AS coverage_max,
+        sum(commit_totals_number(totals, 'c')) AS coverage_sum,
+        count(commit_totals_number(totals, 'c')) AS commit_count
+    FROM commits
+    WHERE branch IS NOT NULL AND timestamp IS NOT NULL
+    GROUP BY 1, 2, 3
+), last_complete AS (
+    SELECT DISTINCT ON (repoid, branch, timestamp::date)
+        repoid,
+        branch,
+        timestamp::date AS date,
+        timestamp,
+        totals
+    FROM commits
+    WHERE branch IS NOT NULL AND timestamp IS NOT NULL AND state = 'complete'
+    ORDER BY repoid, branch, timestamp::date, timestamp DESC
+)
+INSERT INTO core_dailycoveragerollup (
+    repoid, branch, date, coverage_min, coverage_max, coverage_sum,
+    commit_count, last_complete_timestamp, last_complete_totals
+)
+SELECT
+    s.repoid,
+    s.branch,
+    s.date,
+    s.coverage_min,
+    s.coverage_max,
+    s.coverage_sum,
+    s.commit_count,
+    l.timestamp,
+    l.totals
+FROM stats s
+LEFT JOIN last_complete l USING (repoid, branch, date)
+WHERE s.commit_count > 0 OR l.timestamp IS NOT NULL
+ON CONFLICT (repoid, branch, date) DO NOTHING;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0031_auto_20230731_1627"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyCoverageRollup",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("branch", models.TextField()),
+                ("date", models.DateField()),
+                ("coverage_min", models.FloatField(null=True)),
+                ("coverage_max", models.FloatField(null=True)),
+                ("coverage_sum", models.FloatField(null=True)),
+                ("commit_count", models.IntegerField(default=0)),
+                (
+                    "last_complete_timestamp",
+                    core.models.DateTimeWithoutTZField(null=True),
+                ),
+                ("last_complete_totals", models.JSONField(null=True)),
+                (
+                    "repository",
+                    models.ForeignKey(
+                        db_column="repoid",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_coverage_rollups",
+                        to="core.repository",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="dailycoveragerollup",
+            constraint=models.UniqueConstraint(
+                fields=("repository", "branch", "date"),
+                name="daily_coverage_rollup_repoid_branch_date",
+            ),
+        ),
+        # the functions are needed by `refresh_coverage_rollups` even when the
+        # risky steps are skipped
+        migrations.RunSQL(
+            totals_number_function + refresh_function, reverse_sql=drop_functions
+        ),
+        RiskyRunSQL(triggers, reverse_sql=drop_triggers),
+        RiskyRunSQL(backfill, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,271 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+import core.models
+from utils.migrations import RiskyRunSQL
+
+# Like `commit_totals_number` (from 0032) for the counts of lines in `totals`.
+totals_integer_function = """
+CREATE OR REPLACE FUNCTION commit_totals_integer(_totals jsonb, _key text)
+RETURNS integer AS $$
+    SELECT CASE
+        WHEN _totals->>_key ~ '^\\s*[-+]?[0-9]{1,9}\\s*$'
+        THEN (_totals->>_key)::integer
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+"""
+
+# Recomputes the snapshot of a single (repoid, branch) from `commits`, deleting
+# it if the branch no longer has any commits.  Updates of the snapshot of a
+# branch take the same lock as the daily rollups of the branch.
+refresh_function = """
+CREATE OR REPLACE FUNCTION refresh_branch_coverage_snapshot(
+    _repoid integer, _branch text
+) RETURNS void AS $$
+DECLARE
+    _oldest_commit_at timestamp;
+    _latest_commit_at timestamp;
+    _complete commits%ROWTYPE;
+BEGIN
+    IF _repoid IS NULL OR _branch IS NULL THEN
+        RETURN;
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(_repoid, hashtext(_branch));
+
+    SELECT min(timestamp), max(timestamp)
+    INTO _oldest_commit_at, _latest_commit_at
+    FROM commits
+    WHERE repoid = _repoid AND branch = _branch;
+
+    IF _latest_commit_at IS NULL THEN
+        DELETE FROM core_branchcoveragesnapshot
+        WHERE repoid = _repoid AND branch = _branch;
+        RETURN;
+    END IF;
+
+    SELECT * INTO _complete
+    FROM commits
+    WHERE repoid = _repoid AND branch = _branch AND state = 'complete'
+    ORDER BY timestamp DESC
+    LIMIT 1;
+
+    INSERT INTO core_branchcoveragesnapshot (
+        repoid, branch, oldest_commit_at, latest_commit_at,
+        latest_complete_commit_id, latest_complete_commitid,
+        latest_complete_timestamp, latest_complete_totals,
+        coverage, hits, misses, lines
+    ) VALUES (
+        _repoid, _branch, _oldest_commit_at, _latest_commit_at,
+        _complete.id, _complete.commitid,
+        _complete.timestamp, _complete.totals,
+        commit_totals_number(_complete.totals, 'c'),
+        commit_totals_integer(_complete.totals, 'h'),
+        commit_totals_integer(_complete.totals, 'm'),
+        commit_totals_integer(_complete.totals, 'n')
+    )
+    ON CONFLICT (repoid, branch) DO UPDATE SET
+        oldest_commit_at = EXCLUDED.oldest_commit_at,
+        latest_commit_at = EXCLUDED.latest_commit_at,
+        latest_complete_commit_id = EXCLUDED.latest_complete_commit_id,
+        latest_complete_commitid = EXCLUDED.latest_complete_commitid,
+        latest_complete_timestamp = EXCLUDED.latest_complete_timestamp,
+        latest_complete_totals = EXCLUDED.latest_complete_totals,
+        coverage = EXCLUDED.coverage,
+        hits = EXCLUDED.hits,
+        misses = EXCLUDED.misses,
+        lines = EXCLUDED.lines;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Folds a new (or updated) commit into the snapshot of its branch without
+-- looking at any other commit.
+CREATE OR REPLACE FUNCTION apply_commit_to_branch_coverage_snapshot(
+    _commit commits
+) RETURNS void AS $$
+BEGIN
+    IF _commit.repoid IS NULL OR _commit.branch IS NULL
+        OR _commit.timestamp IS NULL THEN
+        RETURN;
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(_commit.repoid, hashtext(_commit.branch));
+
+    INSERT INTO core_branchcoveragesnapshot AS s (
+        repoid, branch, oldest_commit_at, latest_commit_at
+    ) VALUES (
+        _commit.repoid, _commit.branch, _commit.timestamp, _commit.timestamp
+    )
+    ON CONFLICT (repoid, branch) DO UPDATE SET
+        oldest_commit_at = LEAST(s.oldest_commit_at, EXCLUDED.oldest_commit_at),
+        latest_commit_at = GREATEST(s.latest_commit_at, EXCLUDED.latest_commit_at);
+
+    IF _commit.state = 'complete' THEN
+        UPDATE core_branchcoveragesnapshot SET
+            latest_complete_commit_id = _commit.id,
+            latest_complete_commitid = _commit.commitid,
+            latest_complete_timestamp = _commit.timestamp,
+            latest_complete_totals = _commit.totals,
+            coverage = commit_totals_number(_commit.totals, 'c'),
+            hits = commit_totals_integer(_commit.totals, 'h'),
+            misses = commit_totals_integer(_commit.totals, 'm'),
+            lines = commit_totals_integer(_commit.totals, 'n')
+        WHERE repoid = _commit.repoid AND branch = _commit.branch AND (
+            latest_complete_timestamp IS NULL
+            OR latest_complete_timestamp <= _commit.timestamp
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION commits_update_branch_coverage_snapshot()
+RETURNS trigger AS $$
+BEGIN
+    -- the old version of the commit may be what the snapshot is made of, in
+    -- which case the snapshot can't be updated incrementally
+    IF TG_OP = 'DELETE' OR (
+        TG_OP = 'UPDATE' AND (
+            (OLD.repoid, OLD.branch, OLD.timestamp)
+                IS DISTINCT FROM (NEW.repoid, NEW.branch, NEW.timestamp)
+            OR (OLD.state = 'complete' AND NEW.state IS DISTINCT FROM 'complete')
+        )
+    ) THEN
+        PERFORM refresh_branch_coverage_snapshot(OLD.repoid, OLD.branch);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_commit_to_branch_coverage_snapshot(NEW);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+triggers = """
+CREATE TRIGGER commits_branch_coverage_snapshot_insert_delete
+AFTER INSERT OR DELETE ON commits
+FOR EACH ROW EXECUTE PROCEDURE commits_update_branch_coverage_snapshot();
+
+CREATE TRIGGER commits_branch_coverage_snapshot_update
+AFTER UPDATE OF repoid, branch, timestamp, state, totals, commitid ON commits
+FOR EACH ROW
+WHEN (
+    OLD.repoid IS DISTINCT FROM NEW.repoid
+    OR OLD.branch IS DISTINCT FROM NEW.branch
+    OR OLD.timestamp IS DISTINCT FROM NEW.timestamp
+    OR OLD.state IS DISTINCT FROM NEW.state
+    OR OLD.totals IS DISTINCT FROM NEW.totals
+    OR OLD.commitid IS DISTINCT FROM NEW.commitid
+)
+EXECUTE PROCEDURE commits_update_branch_coverage_snapshot();
+"""
+
+drop_triggers = """
+DROP TRIGGER IF EXISTS commits_branch_coverage_snapshot_update ON commits;
+DROP TRIGGER IF EXISTS commits_branch_coverage_snapshot_insert_delete ON commits;
+"""
+
+drop_functions = """
+DROP FUNCTION IF EXISTS commits_update_branch_coverage_snapshot();
+DROP FUNCTION IF EXISTS apply_commit_to_branch_coverage_snapshot(commits);
+DROP FUNCTION IF EXISTS refresh_branch_coverage_snapshot(integer, text);
+DROP FUNCTION IF EXISTS commit_totals_integer(jsonb, text);
+"""
+
+# Populates the snapshots from the existing commits in a single pass.
+backfill = """
+WITH branches AS (
+    SELECT
+        repoid,
+        branch,
+        min(timestamp) AS oldest_commit_at,
+        max(timestamp) AS latest_commit_at
+    FROM commits
+    WHERE branch IS NOT NULL AND timestamp IS NOT NULL
+    GROUP BY 1, 2
+), latest_complete AS (
+    SELECT DISTINCT ON (repoid, branch)
+        repoid,
+        branch,
+        id,
+        commitid,
+        timestamp,
+        totals
+    FROM commits
+    WHERE branch IS NOT NULL AND timestamp IS NOT NULL AND state = 'complete'
+    ORDER BY repoid, branch, timestamp DESC
+)
+INSERT INTO core_branchcoveragesnapshot (
+    repoid, branch, oldest_commit_at, latest_commit_at,
+    latest_complete_commit_id, latest_complete_commitid,
+    latest_complete_timestamp, latest_complete_totals,
+    coverage, hits, misses, lines
+)
+SELECT
+    b.repoid,
+    b.branch,
+    b.oldest_commit_at,
+    b.latest_commit_at,
+    l.id,
+    l.commitid,
+    l.timestamp,
+    l.totals,
+    commit_totals_number(l.totals, 'c'),
+    commit_totals_integer(l.totals, 'h'),
+    commit_totals_integer(l.totals, 'm'),
+    commit_totals_integer(l.totals, 'n')
+FROM branches b
+LEFT JOIN latest_complete l USING (repoid, branch)
+ON CONFLICT (repoid, branch) DO NOTHING;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0032_dailycoveragerollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BranchCoverageSnapshot",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("branch", models.TextField()),
+                ("oldest_commit_at", core.models.DateTimeWithoutTZField(null=True)),
+                ("latest_commit_at", core.models.DateTimeWithoutTZField(null=True)),
+                ("latest_complete_commit_id", models.BigIntegerField(null=True)),
+                ("latest_complete_commitid", models.TextField(null=True)),
+                (
+                    "latest_complete_timestamp",
+                    core.models.DateTimeWithoutTZField(null=True),
+                ),
+                ("latest_complete_totals", models.JSONField(null=True)),
+                ("coverage", models.FloatField(null=True)),
+                ("hits", models.IntegerField(null=True)),
+                ("misses", models.IntegerField(null=True)),
+                ("lines", models.IntegerField(null=True)),
+                (
+                    "repository",
+                    models.ForeignKey(
+                        db_column="repoid",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="coverage_snapshots",
+                        to="core.repository",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="branchcoveragesnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("repository", "branch"),
+                name="branch_coverage_snapshot_repoid_branch",
+            ),
+        ),
+        # the functions are needed by `refresh_coverage_rollups` even when the
+        # risky steps are skipped
+        migrations.RunSQL(
+            totals_integer_function + refresh_function, reverse_sql=drop_functions
+        ),
+        RiskyRunSQL(triggers, reverse_sql=drop_triggers),
+        RiskyRunSQL(backfill, reverse_sql=migrations.RunSQL.noop),
+    ]
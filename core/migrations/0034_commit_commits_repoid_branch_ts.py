@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+from utils.migrations import RiskyAddIndex
+
+
+class Migration(migrations.Migration):
+    """
+    BEGIN;
+    --
+    -- Create index commits_repoid_branch_ts on field(s) repository, branch, timestamp of model commit
+    --
+    CREATE INDEX "commits_repoid_branch_ts" ON "commits" ("repoid", "branch", "timestamp");
+    COMMIT;
+    """
+
+    dependencies = [
+        ("core", "0033_branchcoveragesnapshot"),
+    ]
+
+    operations = [
+        RiskyAddIndex(
+            model_name="commit",
+            index=models.Index(
+                fields=["repository", "branch", "timestamp"],
+                name="commits_repoid_branch_ts",
+            ),
+        ),
+    ]
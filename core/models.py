@@ -252,6 +252,16 @@ class Commit(models.Model):
 
         return build_report_from_commit(self)
 
+    @cached_property
+    def lazy_report(self) -> Optional[Report]:
+        """
+        Same as `full_report` but only the chunks of the files that are accessed
+        get decoded.  The report is meant to be read from and not modified.
+        """
+        from services.report import build_report_from_commit
+
+        return build_report_from_commit(self, lazy_chunks=True)
+
     class Meta:
         db_table = "commits"
         constraints = [
@@ -268,6 +278,10 @@ class Commit(models.Model):
                 fields=["repository", "branch", "state", "-timestamp"],
                 name="commits_repoid_branch_state_ts",
             ),
+            models.Index(
+                fields=["repository", "branch", "timestamp"],
+                name="commits_repoid_branch_ts",
+            ),
             models.Index(
                 fields=["repository", "pullid"],
                 name="commits_on_pull",
@@ -431,3 +445,79 @@ class CommitError(BaseCodecovModel):
     )
     error_code = models.CharField(max_length=100)
     error_params = models.JSONField(default=dict)
+
+
+class DailyCoverageRollup(models.Model):
+    """
+    Daily coverage per (repository, branch), maintained by a trigger on the
+    `commits` table (see migration 0032).  Used in place of scanning `commits`
+    when timeseries data is not available.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    repository = models.ForeignKey(
+        "core.Repository",
+        db_column="repoid",
+        on_delete=models.CASCADE,
+        related_name="daily_coverage_rollups",
+    )
+    branch = models.TextField()
+    date = models.DateField()
+
+    # aggregates over all commits of the day that have a coverage total
+    coverage_min = models.FloatField(null=True)
+    coverage_max = models.FloatField(null=True)
+    coverage_sum = models.FloatField(null=True)
+    commit_count = models.IntegerField(default=0)
+
+    # the most recent commit of the day in the "complete" state
+    last_complete_timestamp = DateTimeWithoutTZField(null=True)
+    last_complete_totals = models.JSONField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["repository", "branch", "date"],
+                name="daily_coverage_rollup_repoid_branch_date",
+            )
+        ]
+
+
+class BranchCoverageSnapshot(models.Model):
+    """
+    The latest coverage of each (repository, branch), maintained by a trigger on
+    the `commits` table (see migration 0033).  Used by the repository listings in
+    place of looking up the latest commits of every repository.  Commits without
+    a branch are not accounted for.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    repository = models.ForeignKey(
+        "core.Repository",
+        db_column="repoid",
+        on_delete=models.CASCADE,
+        related_name="coverage_snapshots",
+    )
+    branch = models.TextField()
+
+    # timestamps of the oldest and latest commits of the branch in any state
+    oldest_commit_at = DateTimeWithoutTZField(null=True)
+    latest_commit_at = DateTimeWithoutTZField(null=True)
+
+    # the most recent commit of the branch in the "complete" state
+    latest_complete_commit_id = models.BigIntegerField(null=True)
+    latest_complete_commitid = models.TextField(null=True)
+    latest_complete_timestamp = DateTimeWithoutTZField(null=True)
+    latest_complete_totals = models.JSONField(null=True)
+    coverage = models.FloatField(null=True)
+    hits = models.IntegerField(null=True)
+    misses = models.IntegerField(null=True)
+    lines = models.IntegerField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["repository", "branch"],
+                name="branch_coverage_snapshot_repoid_branch",
+            )
+        ]
@@ -2,12 +2,16 @@ import unittest.mock as mock
 import uuid
 from io import StringIO
 
+import fakeredis
 import pytest
 from django.core.management import call_command
 from shared.config import ConfigHelper
 
 from codecov_auth.tests.factories import OwnerFactory
-from core.tests.factories import RepositoryFactory
+from core.models import BranchCoverageSnapshot, DailyCoverageRollup
+from core.tests.factories import CommitFactory, RepositoryFactory
+from reports.tests.factories import CommitReportFactory, UploadFactory
+from services.upload_usage import upload_usage
 
 
 @pytest.mark.django_db
@@ -80,3 +84,46 @@ def test_update_gitlab_webhook_command(mocker):
             secret=repo3.webhook_secret,
         ),
     ]
+
+
+@pytest.mark.django_db
+def test_refresh_coverage_rollups_command():
+    repo = RepositoryFactory()
+    CommitFactory(repository=repo, branch="main", totals={"c": "80.00"})
+    DailyCoverageRollup.objects.filter(repository=repo).update(coverage_max=0)
+    BranchCoverageSnapshot.objects.filter(repository=repo).delete()
+    other_repo = RepositoryFactory()
+    CommitFactory(repository=other_repo, branch="main", totals={"c": "80.00"})
+    DailyCoverageRollup.objects.filter(repository=other_repo).update(coverage_max=0)
+
+    call_command(
+        "refresh_coverage_rollups",
+        stdout=StringIO(),
+        stderr=StringIO(),
+        repoid=[repo.pk],
+    )
+
+    assert DailyCoverageRollup.objects.get(repository=repo).coverage_max == 80.0
+    assert DailyCoverageRollup.objects.get(repository=other_repo).coverage_max == 0
+    assert BranchCoverageSnapshot.objects.get(repository=repo).coverage == 80.0
+
+
+@pytest.mark.django_db
+def test_reconcile_upload_usage_command(mocker):
+    redis = fakeredis.FakeStrictRedis()
+    mocker.patch("services.upload_usage.get_redis_connection", return_value=redis)
+    owner = OwnerFactory()
+    repo = RepositoryFactory(author=owner, private=True)
+    report = CommitReportFactory(commit=CommitFactory(repository=repo))
+    UploadFactory(report=report)
+    UploadFactory(report=report)
+    public_repo = RepositoryFactory(private=False)
+    UploadFactory(
+        report=CommitReportFactory(commit=CommitFactory(repository=public_repo))
+    )
+
+    call_command("reconcile_upload_usage", stdout=StringIO(), stderr=StringIO())
+
+    assert redis.get(upload_usage.reconciled_key(owner.ownerid))
+    assert not redis.get(upload_usage.reconciled_key(public_repo.author_id))
+    assert upload_usage.count(owner.ownerid) == 2
@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone
 
 from codecov_auth.tests.factories import OwnerFactory
@@ -68,6 +68,48 @@ class RepositoryQuerySetTests(TestCase):
             == -1
         )
 
+    def test_with_recent_coverage(self):
+        hour_ago = timezone.now() - timedelta(hours=1, minutes=1)
+        totals = {"c": "80.00", "h": 8, "m": 2, "n": 10}
+        commit = CommitFactory(
+            repository=self.repo1, totals=totals, timestamp=hour_ago - timedelta(1)
+        )
+        # too recent for repo1, so the commit above is the one used
+        CommitFactory(repository=self.repo1, totals={"c": "90.00"})
+        CommitFactory(
+            repository=self.repo1,
+            totals={"c": "70.00"},
+            timestamp=hour_ago - timedelta(2),
+        )
+        other_commit = CommitFactory(
+            repository=self.repo2, totals={"c": "60.00"}, timestamp=hour_ago
+        )
+
+        for snapshot_enabled in (True, False):
+            with self.subTest(snapshot_enabled=snapshot_enabled), override_settings(
+                COVERAGE_SNAPSHOT_ENABLED=snapshot_enabled
+            ):
+                repos = {
+                    repo.pk: repo
+                    for repo in Repository.objects.filter(
+                        pk__in=[self.repo1.pk, self.repo2.pk]
+                    )
+                    .with_recent_coverage()
+                    .with_latest_commit_at()
+                    .with_oldest_commit_at()
+                }
+                repo = repos[self.repo1.pk]
+                assert repo.recent_commit_totals == totals
+                assert repo.coverage_sha == commit.commitid
+                assert repo.coverage == 80.0
+                assert (repo.hits, repo.misses, repo.lines) == (8, 2, 10)
+                assert repo.oldest_commit_at == hour_ago - timedelta(2)
+                assert repos[self.repo2.pk].coverage_sha == other_commit.commitid
+                assert repos[self.repo2.pk].coverage == 60.0
+                assert repos[self.repo2.pk].true_latest_commit_at == (
+                    other_commit.timestamp
+                )
+
     def test_get_or_create_from_github_repo_data(self):
         owner = OwnerFactory()
 
@@ -1,11 +1,12 @@
 import json
+from datetime import date, datetime, timezone
 from unittest.mock import MagicMock, patch
 
 from django.forms import ValidationError
 from django.test import TestCase
 from shared.storage.exceptions import FileNotInStorageError
 
-from core.models import Commit
+from core.models import BranchCoverageSnapshot, Commit, DailyCoverageRollup
 from reports.tests.factories import CommitReportFactory
 
 from .factories import CommitFactory, RepositoryFactory
@@ -119,3 +120,154 @@ class CommitTests(TestCase):
         assert fetched.report == {}
         mock_archive.assert_called()
         mock_read_file.assert_called_with(storage_path)
+
+
+class DailyCoverageRollupTests(TestCase):
+    def setUp(self):
+        self.repo = RepositoryFactory()
+
+    def _commit(self, hour, coverage, **kwargs):
+        return CommitFactory(
+            repository=self.repo,
+            branch="main",
+            timestamp=datetime(2022, 1, 1, hour, tzinfo=timezone.utc),
+            totals={"c": coverage} if coverage is not None else None,
+            **kwargs,
+        )
+
+    def _rollups(self):
+        return list(
+            DailyCoverageRollup.objects.filter(repository=self.repo)
+            .order_by("branch", "date")
+            .values(
+                "branch",
+                "date",
+                "coverage_min",
+                "coverage_max",
+                "coverage_sum",
+                "commit_count",
+            )
+        )
+
+    def test_maintained_on_insert(self):
+        self._commit(1, "80.00", state="complete")
+        self._commit(2, "90.00", state="complete")
+        last = self._commit(3, None, state="complete")
+        self._commit(4, "70.00", state="pending")
+
+        assert self._rollups() == [
+            {
+                "branch": "main",
+                "date": date(2022, 1, 1),
+                "coverage_min": 70.0,
+                "coverage_max": 90.0,
+                "coverage_sum": 240.0,
+                "commit_count": 3,
+            }
+        ]
+        rollup = DailyCoverageRollup.objects.get(repository=self.repo)
+        assert rollup.last_complete_timestamp == last.timestamp
+        assert rollup.last_complete_totals is None
+
+    def test_maintained_on_update(self):
+        commit = self._commit(1, "80.00", state="pending")
+        commit.totals = {"c": "85.00"}
+        commit.state = "complete"
+        commit.save()
+
+        rollup = DailyCoverageRollup.objects.get(repository=self.repo)
+        assert rollup.coverage_max == 85.0
+        assert rollup.last_complete_totals == {"c": "85.00"}
+
+        commit.branch = "other"
+        commit.save()
+        assert [rollup["branch"] for rollup in self._rollups()] == ["other"]
+
+    def test_maintained_on_delete(self):
+        commit = self._commit(1, "80.00", state="complete")
+        self._commit(2, "90.00", state="complete")
+
+        commit.delete()
+        assert self._rollups()[0]["commit_count"] == 1
+
+        Commit.objects.filter(repository=self.repo).delete()
+        assert self._rollups() == []
+
+    def test_ignores_coverage_that_isnt_a_number(self):
+        self._commit(1, "80.00", state="complete")
+        self._commit(2, "", state="complete")
+        self._commit(3, "n/a", state="complete")
+
+        assert self._rollups()[0]["coverage_sum"] == 80.0
+        assert self._rollups()[0]["commit_count"] == 1
+
+
+class BranchCoverageSnapshotTests(TestCase):
+    def setUp(self):
+        self.repo = RepositoryFactory()
+
+    def _at(self, hour):
+        return datetime(2022, 1, 1, hour, tzinfo=timezone.utc)
+
+    def _commit(self, hour, state="complete", **kwargs):
+        return CommitFactory(
+            repository=self.repo,
+            branch="main",
+            timestamp=self._at(hour),
+            state=state,
+            **kwargs,
+        )
+
+    def _snapshot(self):
+        return BranchCoverageSnapshot.objects.get(repository=self.repo, branch="main")
+
+    def test_maintained_on_insert(self):
+        self._commit(2, totals={"c": "80.00", "h": 8, "m": 2, "n": 10})
+        latest = self._commit(3, totals={"c": "90.00", "h": 9, "m": 1, "n": 10})
+        self._commit(1, totals={"c": "70.00"})
+        self._commit(4, state="pending", totals={"c": "60.00"})
+
+        snapshot = self._snapshot()
+        assert snapshot.oldest_commit_at == self._at(1)
+        assert snapshot.latest_commit_at == self._at(4)
+        assert snapshot.latest_complete_commitid == latest.commitid
+        assert snapshot.latest_complete_timestamp == latest.timestamp
+        assert snapshot.latest_complete_totals == latest.totals
+        assert (snapshot.coverage, snapshot.hits, snapshot.misses, snapshot.lines) == (
+            90.0,
+            9,
+            1,
+            10,
+        )
+
+    def test_maintained_on_update(self):
+        self._commit(1, totals={"c": "80.00"})
+        commit = self._commit(2, state="pending", totals=None)
+        assert self._snapshot().coverage == 80.0
+
+        commit.state = "complete"
+        commit.totals = {"c": "85.00"}
+        commit.save()
+        assert self._snapshot().latest_complete_commitid == commit.commitid
+        assert self._snapshot().coverage == 85.0
+
+        commit.state = "error"
+        commit.save()
+        assert self._snapshot().coverage == 80.0
+
+        commit.branch = "other"
+        commit.save()
+        assert self._snapshot().latest_commit_at == self._at(1)
+        other = BranchCoverageSnapshot.objects.get(repository=self.repo, branch="other")
+        assert other.latest_commit_at == self._at(2)
+
+    def test_maintained_on_delete(self):
+        self._commit(1, totals={"c": "80.00"})
+        commit = self._commit(2, totals={"c": "90.00"})
+
+        commit.delete()
+        assert self._snapshot().coverage == 80.0
+        assert self._snapshot().latest_commit_at == self._at(1)
+
+        Commit.objects.filter(repository=self.repo).delete()
+        assert not BranchCoverageSnapshot.objects.filter(repository=self.repo).exists()
@@ -5,6 +5,7 @@ from django.db.models.functions import Lower, Substr
 
 from core.models import Commit, Pull, Repository
 from reports.models import CommitReport, ReportSession
+from services.report import with_session_relations
 
 
 def pull_commits(pull: Pull) -> QuerySet[Commit]:
@@ -26,7 +27,7 @@ def commit_uploads(commit: Commit) -> QuerySet[ReportSession]:
     if not commit.commitreport:
         return ReportSession.objects.none()
 
-    sessions = commit.commitreport.sessions.prefetch_related("flags")
+    sessions = with_session_relations(commit.commitreport.sessions.all())
 
     # # sessions w/ flags and type 'uploaded'
     # uploaded = sessions.filter(upload_type="uploaded")
@@ -1,12 +1,15 @@
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Iterable, Mapping
+from typing import Dict, Iterable, List, Mapping, Optional
 
+from django.db import connections, router
 from django.db.models import Avg, Max, Min, QuerySet
 
 from compare.models import CommitComparison, FlagComparison
 from core.models import Repository
 from reports.models import RepositoryFlag
-from timeseries.helpers import aggregate_measurements, aligned_start_date
+from timeseries.cache import flag_measurements_cache
+from timeseries.helpers import aligned_start_date, interval_deltas
 from timeseries.models import Interval, MeasurementName, MeasurementSummary
 
 
@@ -41,32 +44,143 @@ def get_flag_comparisons(
     return queryset
 
 
+@dataclass
+class FlagMeasurements:
+    """
+    Dense, columnar coverage measurements of a single flag: the i-th value of
+    `avg`, `min` and `max` belongs to the i-th bin of `timestamps` (which is the
+    interval spine shared by every flag) and is `None` for empty bins.
+    """
+
+    timestamps: List[datetime]
+    avg: List[Optional[float]]
+    min: List[Optional[float]]
+    max: List[Optional[float]]
+
+    @property
+    def averages(self) -> List[float]:
+        """
+        The averages of the non-empty bins, oldest first.
+        """
+        return [value for value in self.avg if value is not None]
+
+    def as_measurements(self) -> List[dict]:
+        return [
+            {"timestamp_bin": timestamp, "avg": avg, "min": min, "max": max}
+            for timestamp, avg, min, max in zip(
+                self.timestamps, self.avg, self.min, self.max
+            )
+        ]
+
+
+def interval_spine(
+    interval: Interval, after: datetime, before: datetime
+) -> List[datetime]:
+    """
+    The start of every bin between `after` and `before`, aligned the same way
+    the TimescaleDB aggregates are.
+    """
+    delta = interval_deltas[interval]
+    current = aligned_start_date(interval, after)
+    timestamps = []
+    while current <= before:
+        timestamps.append(current)
+        current += delta
+    return timestamps
+
+
 def flag_measurements(
     repository: Repository,
     flag_ids: Iterable[int],
     interval: Interval,
     after: datetime,
     before: datetime,
-) -> Mapping[int, Iterable[dict]]:
-    queryset = MeasurementSummary.agg_by(interval).filter(
-        name=MeasurementName.FLAG_COVERAGE.value,
-        owner_id=repository.author_id,
-        repo_id=repository.pk,
-        measurable_id__in=[str(flag_id) for flag_id in flag_ids],
-        timestamp_bin__gte=aligned_start_date(interval, after),
-        timestamp_bin__lte=before,
-    )
+) -> Mapping[int, FlagMeasurements]:
+    """
+    Measurements of the given flags aligned to the interval spine.  Flags without
+    any measurement in the window are omitted.
+    """
+    flag_ids = list(flag_ids)
+    timestamps = interval_spine(interval, after, before)
+    if not flag_ids or not timestamps:
+        return {}
 
-    queryset = aggregate_measurements(
-        queryset, ["timestamp_bin", "owner_id", "repo_id", "measurable_id"]
+    cache_key = flag_measurements_cache.key(
+        repository, interval, timestamps[0], timestamps[-1]
     )
+    series = flag_measurements_cache.get_many(cache_key, flag_ids) if cache_key else {}
+
+    missing = [flag_id for flag_id in flag_ids if flag_id not in series]
+    if missing:
+        fetched = _fetch_flag_series(repository, missing, interval, timestamps)
+        # remember which flags have no measurements at all too
+        fetched.update({flag_id: None for flag_id in missing if flag_id not in fetched})
+        if cache_key:
+            flag_measurements_cache.set_many(cache_key, fetched)
+        series.update(fetched)
+
+    return {
+        flag_id: FlagMeasurements(timestamps=timestamps, **columns)
+        for flag_id, columns in series.items()
+        if columns is not None
+    }
 
-    # group by flag_id
-    measurements = {}
-    for measurement in queryset:
-        flag_id = int(measurement["measurable_id"])
-        if flag_id not in measurements:
-            measurements[flag_id] = []
-        measurements[flag_id].append(measurement)
 
-    return measurements
+def _fetch_flag_series(
+    repository: Repository,
+    flag_ids: List[int],
+    interval: Interval,
+    timestamps: List[datetime],
+) -> Dict[int, dict]:
+    """
+    A single aggregate over the measurement summaries, left joined onto the
+    interval spine so that each flag comes back as one row of dense arrays.
+    """
+    model = MeasurementSummary.agg_by(interval).model
+    sql = f"""
+    with spine as (
+        select bin, idx from unnest(%(timestamps)s::timestamptz[])
+            with ordinality as spine(bin, idx)
+    ), summaries as (
+        select
+            measurable_id,
+            timestamp_bin,
+            min(value_min) as min,
+            max(value_max) as max,
+            (sum(value_avg * value_count) / sum(value_count))::numeric(1000, 5) as avg
+        from {model._meta.db_table}
+        where name = %(name)s
+            and owner_id = %(owner_id)s
+            and repo_id = %(repo_id)s
+            and measurable_id = any(%(measurable_ids)s)
+            and timestamp_bin >= %(start)s
+            and timestamp_bin <= %(end)s
+        group by measurable_id, timestamp_bin
+    )
+    select
+        flags.measurable_id,
+        array_agg(summaries.avg::float order by spine.idx),
+        array_agg(summaries.min order by spine.idx),
+        array_agg(summaries.max order by spine.idx)
+    from (select distinct measurable_id from summaries) flags
+    cross join spine
+    left join summaries
+        on summaries.measurable_id = flags.measurable_id
+        and summaries.timestamp_bin = spine.bin
+    group by flags.measurable_id
+    """
+    params = dict(
+        timestamps=timestamps,
+        name=MeasurementName.FLAG_COVERAGE.value,
+        owner_id=repository.author_id,
+        repo_id=repository.pk,
+        measurable_ids=[str(flag_id) for flag_id in flag_ids],
+        start=timestamps[0],
+        end=timestamps[-1],
+    )
+    with connections[router.db_for_read(model)].cursor() as cursor:
+        cursor.execute(sql, params)
+        return {
+            int(measurable_id): dict(avg=avg, min=min, max=max)
+            for measurable_id, avg, min, max in cursor.fetchall()
+        }
@@ -0,0 +1,27 @@
+import operator
+from functools import reduce
+
+from django.db.models import Q
+
+from core.models import Branch
+
+from .loader import BaseLoader
+
+
+class BranchLoader(BaseLoader):
+    """
+    Loads branches by `(repository_id, name)` so that branches of different
+    repositories can be fetched in a single query.
+    """
+
+    @classmethod
+    def key(cls, branch):
+        return (branch.repository_id, branch.name)
+
+    def batch_queryset(self, keys):
+        return Branch.objects.filter(
+            reduce(
+                operator.or_,
+                (Q(repository_id=repoid, name=name) for repoid, name in keys),
+            )
+        )
@@ -0,0 +1,20 @@
+from timeseries.models import Dataset
+
+from .loader import BaseLoader
+
+
+class DatasetLoader(BaseLoader):
+    """
+    Loads the datasets of the given measurement `name` by repository id.
+    """
+
+    @classmethod
+    def key(cls, dataset):
+        return dataset.repository_id
+
+    def __init__(self, info, name, *args, **kwargs):
+        self.name = name
+        super().__init__(info, *args, **kwargs)
+
+    def batch_queryset(self, keys):
+        return Dataset.objects.filter(name=self.name, repository_id__in=keys)
@@ -0,0 +1,31 @@
+from collections import defaultdict
+
+from codecov.db import sync_to_async
+from reports.models import RepositoryFlag
+
+from .loader import BaseLoader
+
+
+class RepositoryFlagLoader(BaseLoader):
+    """
+    Loads the (non-deleted) flags of each repository by repository id.  Unlike
+    the other loaders every key maps to a list of records.
+    """
+
+    @classmethod
+    def key(cls, flag):
+        return flag.repository_id
+
+    def batch_queryset(self, keys):
+        return RepositoryFlag.objects.filter(
+            repository_id__in=keys,
+            deleted__isnot=True,
+        ).order_by("flag_name")
+
+    @sync_to_async
+    def batch_load_fn(self, keys):
+        results = defaultdict(list)
+        for flag in self.batch_queryset(keys):
+            results[self.key(flag)].append(flag)
+
+        return [results[key] for key in keys]
@@ -0,0 +1,27 @@
+import operator
+from functools import reduce
+
+from django.db.models import Q
+
+from core.models import Pull
+
+from .loader import BaseLoader
+
+
+class PullLoader(BaseLoader):
+    """
+    Loads pulls by `(repository_id, pullid)` so that pulls of different
+    repositories can be fetched in a single query.
+    """
+
+    @classmethod
+    def key(cls, pull):
+        return (pull.repository_id, pull.pullid)
+
+    def batch_queryset(self, keys):
+        return Pull.objects.filter(
+            reduce(
+                operator.or_,
+                (Q(repository_id=repoid, pullid=pullid) for repoid, pullid in keys),
+            )
+        )
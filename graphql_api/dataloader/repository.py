@@ -0,0 +1,12 @@
+from core.models import Repository
+
+from .loader import BaseLoader
+
+
+class RepositoryLoader(BaseLoader):
+    @classmethod
+    def key(cls, repository):
+        return repository.repoid
+
+    def batch_queryset(self, keys):
+        return Repository.objects.filter(repoid__in=keys)
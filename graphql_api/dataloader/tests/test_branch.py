@@ -0,0 +1,37 @@
+import asyncio
+
+from django.test import TransactionTestCase
+
+from core.tests.factories import BranchFactory, RepositoryFactory
+from graphql_api.dataloader.branch import BranchLoader
+
+
+class GraphQLResolveInfo:
+    def __init__(self):
+        self.context = {}
+
+
+class BranchLoaderTestCase(TransactionTestCase):
+    def setUp(self):
+        self.repositories = [RepositoryFactory(), RepositoryFactory()]
+        self.branches = [
+            BranchFactory(repository=self.repositories[0], name="main"),
+            BranchFactory(repository=self.repositories[1], name="main"),
+            BranchFactory(repository=self.repositories[1], name="feature"),
+        ]
+        self.info = GraphQLResolveInfo()
+
+    async def test_branches_of_several_repositories(self):
+        loader = BranchLoader.loader(self.info)
+        branches = await asyncio.gather(
+            loader.load((self.repositories[1].pk, "feature")),
+            loader.load((self.repositories[0].pk, "main")),
+            loader.load((self.repositories[0].pk, "feature")),
+            loader.load((self.repositories[1].pk, "main")),
+        )
+        assert branches == [
+            self.branches[2],
+            self.branches[0],
+            None,
+            self.branches[1],
+        ]
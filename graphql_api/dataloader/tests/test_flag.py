@@ -0,0 +1,33 @@
+import asyncio
+
+from django.test import TransactionTestCase
+
+from core.tests.factories import RepositoryFactory
+from graphql_api.dataloader.flag import RepositoryFlagLoader
+from reports.tests.factories import RepositoryFlagFactory
+
+
+class GraphQLResolveInfo:
+    def __init__(self):
+        self.context = {}
+
+
+class RepositoryFlagLoaderTestCase(TransactionTestCase):
+    def setUp(self):
+        self.repositories = [RepositoryFactory(), RepositoryFactory()]
+        self.flags = [
+            RepositoryFlagFactory(repository=self.repositories[0], flag_name="b"),
+            RepositoryFlagFactory(repository=self.repositories[0], flag_name="a"),
+            RepositoryFlagFactory(
+                repository=self.repositories[0], flag_name="c", deleted=True
+            ),
+        ]
+        self.info = GraphQLResolveInfo()
+
+    async def test_flags_of_several_repositories(self):
+        loader = RepositoryFlagLoader.loader(self.info)
+        flags = await asyncio.gather(
+            loader.load(self.repositories[1].pk),
+            loader.load(self.repositories[0].pk),
+        )
+        assert flags == [[], [self.flags[1], self.flags[0]]]
@@ -0,0 +1,32 @@
+import asyncio
+
+from django.test import TransactionTestCase
+
+from core.tests.factories import PullFactory, RepositoryFactory
+from graphql_api.dataloader.pull import PullLoader
+
+
+class GraphQLResolveInfo:
+    def __init__(self):
+        self.context = {}
+
+
+class PullLoaderTestCase(TransactionTestCase):
+    def setUp(self):
+        self.repositories = [RepositoryFactory(), RepositoryFactory()]
+        self.pulls = [
+            PullFactory(repository=self.repositories[0], pullid=1),
+            PullFactory(repository=self.repositories[1], pullid=1),
+            PullFactory(repository=self.repositories[1], pullid=2),
+        ]
+        self.info = GraphQLResolveInfo()
+
+    async def test_pulls_of_several_repositories(self):
+        loader = PullLoader.loader(self.info)
+        pulls = await asyncio.gather(
+            loader.load((self.repositories[1].pk, 2)),
+            loader.load((self.repositories[0].pk, 1)),
+            loader.load((self.repositories[0].pk, 2)),
+            loader.load((self.repositories[1].pk, 1)),
+        )
+        assert pulls == [self.pulls[2], self.pulls[0], None, self.pulls[1]]
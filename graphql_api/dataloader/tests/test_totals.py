@@ -0,0 +1,32 @@
+import asyncio
+
+from django.test import TransactionTestCase
+
+from core.tests.factories import CommitFactory
+from graphql_api.dataloader.totals import CommitReportTotalsLoader
+from reports.tests.factories import CommitReportFactory, ReportLevelTotalsFactory
+
+
+class GraphQLResolveInfo:
+    def __init__(self):
+        self.context = {}
+
+
+class CommitReportTotalsLoaderTestCase(TransactionTestCase):
+    def setUp(self):
+        self.commits = [CommitFactory(), CommitFactory(), CommitFactory()]
+        self.totals = ReportLevelTotalsFactory(
+            report=CommitReportFactory(commit=self.commits[0], code=None)
+        )
+        # totals of local uploads are ignored
+        ReportLevelTotalsFactory(
+            report=CommitReportFactory(commit=self.commits[1], code="local")
+        )
+        self.info = GraphQLResolveInfo()
+
+    async def test_totals_of_several_commits(self):
+        loader = CommitReportTotalsLoader.loader(self.info)
+        totals = await asyncio.gather(
+            *(loader.load(commit.pk) for commit in self.commits)
+        )
+        assert totals == [self.totals, None, None]
@@ -0,0 +1,20 @@
+from reports.models import ReportLevelTotals
+
+from .loader import BaseLoader
+
+
+class CommitReportTotalsLoader(BaseLoader):
+    """
+    Loads the report totals of each commit (i.e. the `ReportLevelTotals` of the
+    commit's `CommitReport` without a code) by commit id.
+    """
+
+    @classmethod
+    def key(cls, totals):
+        return totals.report.commit_id
+
+    def batch_queryset(self, keys):
+        return ReportLevelTotals.objects.filter(
+            report__commit_id__in=keys,
+            report__code=None,
+        ).select_related("report")
@@ -6,7 +6,8 @@ from cursor_pagination import CursorPage, CursorPaginator
 from django.db.models import QuerySet
 
 from codecov.db import sync_to_async
-from graphql_api.types.enums import OrderingDirection
+from graphql_api.helpers.count import count_queryset
+from graphql_api.types.enums import CountMode, OrderingDirection
 
 
 def build_connection_graphql(connection_name, type_node):
@@ -14,7 +15,7 @@ def build_connection_graphql(connection_name, type_node):
     return f"""
         type {connection_name} {{
           edges: [{edge_name}]
-          totalCount: Int!
+          totalCount(mode: CountMode): Int!
           pageInfo: PageInfo!
         }}
 
@@ -47,8 +48,8 @@ class Connection:
         ]
 
     @sync_to_async
-    def total_count(self, *args, **kwargs):
-        return self.queryset.count()
+    def total_count(self, *args, mode=None, **kwargs):
+        return count_queryset(self.queryset, mode=mode or CountMode.EXACT)
 
     @cached_property
     def start_cursor(self):
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import QuerySet
+from redis.exceptions import RedisError
+from shared.metrics import metrics
+
+from graphql_api.types.enums import CountMode
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+
+class CountCache:
+    """
+    Caches the number of rows of querysets in redis for a short while, keyed by
+    the SQL (and parameters) of the query being counted.
+    """
+
+    key_prefix = "connection_counts"
+
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+
+    @property
+    def ttl(self) -> int:
+        # a TTL of 0 disables the cache
+        return (
+            self._ttl if self._ttl is not None else settings.CONNECTION_COUNT_CACHE_TTL
+        )
+
+    def key(self, queryset: QuerySet) -> str:
+        sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+        digest = hashlib.sha256(
+            "\x1f".join((queryset.db, sql, repr(params))).encode()
+        ).hexdigest()
+        return f"{self.key_prefix}/{digest}"
+
+    def get(self, key: str) -> Optional[int]:
+        if not self.ttl:
+            return None
+        try:
+            value = get_redis_connection().get(key)
+        except (OSError, RedisError) as e:
+            log.warning(f"Error reading connection count cache: {e}")
+            return None
+        if value is None:
+            metrics.incr("graphql.connection_count.cache.miss")
+            return None
+        metrics.incr("graphql.connection_count.cache.hit")
+        return int(value)
+
+    def set(self, key: str, count: int):
+        if not self.ttl:
+            return
+        try:
+            get_redis_connection().set(key, count, ex=self.ttl)
+        except (OSError, RedisError) as e:
+            log.warning(f"Error writing connection count cache: {e}")
+
+
+count_cache = CountCache()
+
+
+def estimate_count(queryset: QuerySet) -> Optional[int]:
+    """
+    The query planner's estimate of the number of rows of the queryset.
+    """
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    try:
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+    except DatabaseError as e:
+        log.warning(f"Error estimating count: {e}")
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_queryset(queryset: QuerySet, mode: CountMode = CountMode.EXACT) -> int:
+    """
+    Counts the rows of the queryset.  Counts of at least
+    `CONNECTION_COUNT_LARGE` rows are expensive and hardly change in relative
+    terms, so they are cached for a while and, when `ESTIMATED` counts are
+    asked for, replaced by the planner's estimate altogether.  Smaller counts
+    are always exact.
+
+    Django already leaves the ordering and the annotations that aren't filtered
+    on (like the coverage of repositories) out of the count queries.
+    """
+    large = settings.CONNECTION_COUNT_LARGE
+    # only counts up to `large` rows, which tells whether the count is large
+    # for about as much as counting small querysets
+    count = queryset.order_by()[:large].count()
+    if count < large:
+        return count
+
+    if mode == CountMode.ESTIMATED:
+        estimate = estimate_count(queryset.order_by())
+        if estimate is not None and estimate >= large:
+            metrics.incr("graphql.connection_count.estimated")
+            return estimate
+
+    key = count_cache.key(queryset) if count_cache.ttl else None
+    count = count_cache.get(key) if key else None
+    if count is None:
+        count = queryset.count()
+        if key:
+            count_cache.set(key, count)
+    return count
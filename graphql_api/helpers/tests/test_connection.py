@@ -1,9 +1,14 @@
+from unittest.mock import patch
+
+import fakeredis
 from asgiref.sync import async_to_sync
-from django.test import TransactionTestCase
+from django.db import connection as db_connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 from core.models import Repository
 from core.tests.factories import RepositoryFactory
-from graphql_api.types.enums import OrderingDirection, RepositoryOrdering
+from graphql_api.types.enums import CountMode, OrderingDirection, RepositoryOrdering
 
 
 class RepositoryQuerySetTests(TransactionTestCase):
@@ -65,3 +70,76 @@ class RepositoryQuerySetTests(TransactionTestCase):
 
         count = async_to_sync(connection.total_count)()
         assert count == 3
+
+    def test_total_count_leaves_out_annotations_and_ordering(self):
+        from graphql_api.helpers.connection import queryset_to_connection
+
+        RepositoryFactory(name="a")
+        RepositoryFactory(name="b")
+
+        connection = async_to_sync(queryset_to_connection)(
+            Repository.objects.all().with_recent_coverage().with_latest_commit_at(),
+            ordering=(RepositoryOrdering.COVERAGE,),
+            ordering_direction=OrderingDirection.ASC,
+        )
+
+        with CaptureQueriesContext(db_connection) as queries:
+            count = async_to_sync(connection.total_count)()
+        assert count == 2
+        assert len(queries) == 1
+        sql = queries[0]["sql"].lower()
+        assert "commits" not in sql
+        assert "branchcoveragesnapshot" not in sql
+        assert "order by" not in sql
+
+    def test_total_count_estimated(self):
+        from graphql_api.helpers.connection import queryset_to_connection
+
+        RepositoryFactory(name="a")
+        RepositoryFactory(name="b")
+        RepositoryFactory(name="c")
+
+        connection = async_to_sync(queryset_to_connection)(
+            Repository.objects.all(),
+            ordering=(RepositoryOrdering.NAME,),
+            ordering_direction=OrderingDirection.ASC,
+        )
+
+        # small counts are exact
+        count = async_to_sync(connection.total_count)(mode=CountMode.ESTIMATED)
+        assert count == 3
+
+        with override_settings(CONNECTION_COUNT_LARGE=0), CaptureQueriesContext(
+            db_connection
+        ) as queries:
+            count = async_to_sync(connection.total_count)(mode=CountMode.ESTIMATED)
+        assert isinstance(count, int)
+        assert len(queries) == 1
+        assert queries[0]["sql"].startswith("EXPLAIN (FORMAT JSON)")
+
+    @override_settings(CONNECTION_COUNT_LARGE=3)
+    def test_total_count_cached(self):
+        from graphql_api.helpers.connection import queryset_to_connection
+
+        redis = fakeredis.FakeStrictRedis()
+        RepositoryFactory(name="a")
+        RepositoryFactory(name="b")
+
+        with patch("graphql_api.helpers.count.get_redis_connection") as mock_redis:
+            mock_redis.return_value = redis
+
+            def total_count():
+                connection = async_to_sync(queryset_to_connection)(
+                    Repository.objects.all(),
+                    ordering=(RepositoryOrdering.NAME,),
+                    ordering_direction=OrderingDirection.ASC,
+                )
+                return async_to_sync(connection.total_count)()
+
+            # too small to be cached
+            assert total_count() == 2
+            RepositoryFactory(name="c")
+            assert total_count() == 3
+
+            RepositoryFactory(name="d")
+            assert total_count() == 3
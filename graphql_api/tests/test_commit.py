@@ -550,6 +550,7 @@ class TestCommit(GraphQLTestHelper, TransactionTestCase):
         assert coverageFile["totals"] == fake_coverage["totals"]
         assert coverageFile["isCriticalFile"] == True
         assert coverageFile["hashedPath"] == hashlib.md5("path".encode()).hexdigest()
+        report_mock.assert_called_once_with(self.commit, lazy_chunks=True)
 
     @patch(
         "services.profiling.ProfilingSummary.critical_files", new_callable=PropertyMock
@@ -1,6 +1,7 @@
 from datetime import datetime
 from unittest.mock import patch
 
+import fakeredis
 import pytest
 from django.conf import settings
 from django.test import TransactionTestCase, override_settings
@@ -10,7 +11,7 @@ from freezegun import freeze_time
 from codecov_auth.tests.factories import OwnerFactory
 from core.tests.factories import CommitFactory, RepositoryFactory
 from reports.tests.factories import RepositoryFlagFactory
-from timeseries.models import Dataset, MeasurementName
+from timeseries.models import Dataset, Measurement, MeasurementName
 from timeseries.tests.factories import DatasetFactory, MeasurementFactory
 
 from .helper import GraphQLTestHelper
@@ -97,6 +98,11 @@ class TestFlags(GraphQLTestHelper, TransactionTestCase):
     databases = {"default", "timeseries"}
 
     def setUp(self):
+        redis = fakeredis.FakeStrictRedis()
+        patcher = patch("timeseries.cache.get_redis_connection", return_value=redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
         self.org = OwnerFactory()
         self.repo = RepositoryFactory(author=self.org, private=False)
         self.commit = CommitFactory(repository=self.repo)
@@ -444,6 +450,54 @@ class TestFlags(GraphQLTestHelper, TransactionTestCase):
             }
         }
 
+    def test_fetch_flags_measurements_cached(self):
+        flag = RepositoryFlagFactory(repository=self.repo, flag_name="flag1")
+        MeasurementFactory(
+            name="flag_coverage",
+            owner_id=self.org.pk,
+            repo_id=self.repo.pk,
+            branch="main",
+            measurable_id=str(flag.pk),
+            commit_sha=self.commit.pk,
+            timestamp="2022-06-21T00:00:00",
+            value=75.0,
+        )
+        variables = {
+            "org": self.org.username,
+            "repo": self.repo.name,
+            "measurementsAfter": timezone.datetime(2022, 6, 21),
+            "measurementsBefore": timezone.datetime(2022, 6, 22),
+            "measurementsInterval": "INTERVAL_1_DAY",
+        }
+
+        def flag_node():
+            data = self.gql_request(query_flags, variables=variables)
+            return data["owner"]["repository"]["flags"]["edges"][0]["node"]
+
+        node = flag_node()
+        assert node["percentCovered"] == 75.0
+        assert [m["avg"] for m in node["measurements"]] == [75.0, None]
+
+        # measurements updated in place are only picked up once the cache expires
+        Measurement.objects.filter(measurable_id=str(flag.pk)).update(value=50.0)
+        assert flag_node()["percentCovered"] == 75.0
+
+        # writing a newer measurement invalidates the repository's series
+        MeasurementFactory(
+            name="flag_coverage",
+            owner_id=self.org.pk,
+            repo_id=self.repo.pk,
+            branch="main",
+            measurable_id=str(flag.pk),
+            commit_sha=self.commit.pk,
+            timestamp="2022-06-22T00:00:00",
+            value=60.0,
+        )
+        node = flag_node()
+        assert node["percentCovered"] == 60.0
+        assert node["percentChange"] == 10.0
+        assert [m["avg"] for m in node["measurements"]] == [50.0, 60.0]
+
     def test_fetch_flags_without_measurements(self):
         query = """
             query Flags(
@@ -14,6 +14,8 @@ from graphql_api.actions.path_contents import sort_path_contents
 from graphql_api.dataloader.commit import CommitLoader
 from graphql_api.dataloader.comparison import ComparisonLoader
 from graphql_api.dataloader.owner import OwnerLoader
+from graphql_api.dataloader.repository import RepositoryLoader
+from graphql_api.dataloader.totals import CommitReportTotalsLoader
 from graphql_api.helpers.connection import (
     queryset_to_connection,
     queryset_to_connection_sync,
@@ -38,7 +40,7 @@ commit_bindable.set_alias("branchName", "branch")
 @commit_bindable.field("coverageFile")
 @sync_to_async
 def resolve_file(commit, info, path, flags=None):
-    commit_report = commit.full_report.filter(flags=flags)
+    commit_report = commit.lazy_report.filter(flags=flags)
     file_report = commit_report.get(path)
 
     return {
@@ -52,8 +54,11 @@ def resolve_file(commit, info, path, flags=None):
 
 @commit_bindable.field("totals")
 def resolve_totals(commit, info):
-    command = info.context["executor"].get_command("commit")
-    return command.fetch_totals(commit)
+    if "reports" in getattr(commit, "_prefetched_objects_cache", {}):
+        # the totals were prefetched along with the commit
+        command = info.context["executor"].get_command("commit")
+        return command.fetch_totals(commit)
+    return CommitReportTotalsLoader.loader(info).load(commit.pk)
 
 
 @commit_bindable.field("author")
@@ -135,16 +140,16 @@ def resolve_flags(commit, info, **kwargs):
 
 
 @commit_bindable.field("criticalFiles")
-@sync_to_async
-def resolve_critical_files(commit: Commit, info, **kwargs) -> List[CriticalFile]:
+async def resolve_critical_files(commit: Commit, info, **kwargs) -> List[CriticalFile]:
     """
     The critical files for this particular commit (might be empty
     depending on whether the profiling info included a commit SHA).
     The results of this resolver could be different than that of the
     `repository.criticalFiles` resolver.
     """
-    profiling_summary = ProfilingSummary(commit.repository, commit_sha=commit.commitid)
-    return profiling_summary.critical_files
+    repository = await RepositoryLoader.loader(info).load(commit.repository_id)
+    profiling_summary = ProfilingSummary(repository, commit_sha=commit.commitid)
+    return await sync_to_async(lambda: profiling_summary.critical_files)()
 
 
 @commit_bindable.field("pathContents")
@@ -161,7 +166,7 @@ def resolve_path_contents(commit: Commit, info, path: str = None, filters=None):
 
     # TODO: Might need to add reports here filtered by flags in the future
     commit_report = report_service.build_report_from_commit(
-        commit, report_class=ReadOnlyReport
+        commit, report_class=ReadOnlyReport, lazy_chunks=True
     )
     if not commit_report:
         return MissingHeadReport()
@@ -175,6 +180,7 @@ def resolve_path_contents(commit: Commit, info, path: str = None, filters=None):
         report=commit_report,
         path=path,
         search_term=search_value,
+        index=path_service.directory_totals_index(commit_report),
     )
 
     if len(report_paths.paths) == 0:
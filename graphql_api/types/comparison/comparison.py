@@ -44,19 +44,19 @@ def resolve_impacted_files(
 @comparison_bindable.field("impactedFilesCount")
 @sync_to_async
 def resolve_impacted_files_count(comparison: ComparisonReport, info):
-    return len(comparison.impacted_files)
+    return comparison.impacted_files_count
 
 
 @comparison_bindable.field("directChangedFilesCount")
 @sync_to_async
 def resolve_direct_changed_files_count(comparison: ComparisonReport, info):
-    return len(comparison.impacted_files_with_direct_changes)
+    return comparison.direct_changed_files_count
 
 
 @comparison_bindable.field("indirectChangedFilesCount")
 @sync_to_async
 def resolve_indirect_changed_files_count(comparison: ComparisonReport, info):
-    return len(comparison.impacted_files_with_unintended_changes)
+    return comparison.indirect_changed_files_count
 
 
 @comparison_bindable.field("impactedFile")
@@ -1,6 +1,7 @@
 from .enums import (
     CommitErrorCode,
     CommitErrorGeneralType,
+    CountMode,
     CoverageLine,
     GoalOnboarding,
     LoginProvider,
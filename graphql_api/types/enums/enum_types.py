@@ -11,6 +11,7 @@ from timeseries.models import Interval as MeasurementInterval
 from timeseries.models import MeasurementName
 
 from .enums import (
+    CountMode,
     CoverageLine,
     GoalOnboarding,
     LoginProvider,
@@ -29,6 +30,7 @@ enum_types = [
     EnumType("RepositoryOrdering", RepositoryOrdering),
     EnumType("OrderingDirection", OrderingDirection),
     EnumType("CoverageLine", CoverageLine),
+    EnumType("CountMode", CountMode),
     EnumType("PathContentDisplayType", PathContentDisplayType),
     EnumType("TypeProjectOnboarding", TypeProjectOnboarding),
     EnumType("GoalOnboarding", GoalOnboarding),
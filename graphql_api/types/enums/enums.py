@@ -27,6 +27,11 @@ class OrderingDirection(enum.Enum):
     DESC = "descending"
 
 
+class CountMode(enum.Enum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+
+
 class CoverageLine(enum.Enum):
     H = "hit"
     M = "miss"
@@ -4,7 +4,6 @@ from typing import Iterable
 from ariadne import ObjectType
 
 from reports.models import RepositoryFlag
-from timeseries.helpers import fill_sparse_measurements
 from timeseries.models import Interval, MeasurementSummary
 
 flag_bindable = ObjectType("Flag")
@@ -24,10 +23,10 @@ def resolve_percent_covered(flag: RepositoryFlag, info) -> float:
         # we rely on measurements for this computed value
         return None
 
-    measurements = info.context["flag_measurements"].get(flag.pk, [])
-    if len(measurements) > 0:
+    measurements = info.context["flag_measurements"].get(flag.pk)
+    if measurements and measurements.averages:
         # coverage returned is the most recent measurement average
-        return measurements[-1]["avg"]
+        return measurements.averages[-1]
 
 
 @flag_bindable.field("percentChange")
@@ -36,16 +35,17 @@ def resolve_percent_change(flag: RepositoryFlag, info) -> float:
         # we rely on measurements for this computed value
         return None
 
-    measurements = info.context["flag_measurements"].get(flag.pk, [])
-    if len(measurements) > 1:
-        return measurements[-1]["avg"] - measurements[0]["avg"]
+    measurements = info.context["flag_measurements"].get(flag.pk)
+    if measurements and len(measurements.averages) > 1:
+        return measurements.averages[-1] - measurements.averages[0]
 
 
 @flag_bindable.field("measurements")
 def resolve_measurements(
     flag: RepositoryFlag, info, interval: Interval, after: datetime, before: datetime
 ) -> Iterable[MeasurementSummary]:
-    measurements = info.context["flag_measurements"].get(flag.pk, [])
-    if len(measurements) == 0:
+    # these are already aligned to the requested interval spine
+    measurements = info.context["flag_measurements"].get(flag.pk)
+    if measurements is None:
         return []
-    return fill_sparse_measurements(measurements, interval, after, before)
+    return measurements.as_measurements()
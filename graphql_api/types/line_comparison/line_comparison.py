@@ -5,7 +5,7 @@ from ariadne import ObjectType, convert_kwargs_to_snake_case
 from shared.utils.merge import LineType
 
 from graphql_api.types.enums import CoverageLine
-from services.comparison import LineComparison
+from services.comparison import LineComparisonRow
 
 line_coverages = {
     LineType.hit: CoverageLine.H,
@@ -17,7 +17,7 @@ line_coverages = {
 class CoverageInfo:
     def __init__(
         self,
-        line_comparison: LineComparison,
+        line_comparison: LineComparisonRow,
         ignored_upload_ids: Optional[List[int]] = None,
     ):
         self.line_comparison = line_comparison
@@ -40,31 +40,31 @@ line_comparison_bindable = ObjectType("LineComparison")
 
 
 @line_comparison_bindable.field("baseNumber")
-def resolve_base_number(line_comparison: LineComparison, info) -> Optional[str]:
+def resolve_base_number(line_comparison: LineComparisonRow, info) -> Optional[str]:
     return line_comparison.number["base"]
 
 
 @line_comparison_bindable.field("headNumber")
-def resolve_head_number(line_comparison: LineComparison, info) -> Optional[str]:
+def resolve_head_number(line_comparison: LineComparisonRow, info) -> Optional[str]:
     return line_comparison.number["head"]
 
 
 @line_comparison_bindable.field("baseCoverage")
-def resolve_base_coverage(line_comparison: LineComparison, info) -> Optional[str]:
+def resolve_base_coverage(line_comparison: LineComparisonRow, info) -> Optional[str]:
     line_type: LineType = line_comparison.coverage["base"]
     if line_type is not None:
         return line_coverages.get(line_type)
 
 
 @line_comparison_bindable.field("headCoverage")
-def resolve_head_coverage(line_comparison: LineComparison, info) -> Optional[str]:
+def resolve_head_coverage(line_comparison: LineComparisonRow, info) -> Optional[str]:
     line_type: LineType = line_comparison.coverage["head"]
     if line_type is not None:
         return line_coverages.get(line_type)
 
 
 @line_comparison_bindable.field("content")
-def resolve_content(line_comparison: LineComparison, info) -> str:
+def resolve_content(line_comparison: LineComparisonRow, info) -> str:
     value = line_comparison.value
     if value and line_comparison.is_diff:
         return f"{value[0]} {value[1:]}"
@@ -74,7 +74,7 @@ def resolve_content(line_comparison: LineComparison, info) -> str:
 @line_comparison_bindable.field("coverageInfo")
 @convert_kwargs_to_snake_case
 def resolve_coverage_info(
-    line_comparison: LineComparison,
+    line_comparison: LineComparisonRow,
     info,
     ignored_upload_ids: Optional[List[int]] = None,
 ) -> CoverageInfo:
@@ -11,8 +11,12 @@ from codecov.db import sync_to_async
 from core.models import Repository
 from graphql_api.actions.commits import repo_commits
 from graphql_api.actions.flags import flag_measurements, flags_for_repo
+from graphql_api.dataloader.branch import BranchLoader
 from graphql_api.dataloader.commit import CommitLoader
+from graphql_api.dataloader.dataset import DatasetLoader
+from graphql_api.dataloader.flag import RepositoryFlagLoader
 from graphql_api.dataloader.owner import OwnerLoader
+from graphql_api.dataloader.pull import PullLoader
 from graphql_api.helpers.connection import (
     queryset_to_connection,
     queryset_to_connection_sync,
@@ -22,7 +26,7 @@ from graphql_api.types.enums import OrderingDirection
 from graphql_api.types.errors.errors import NotFoundError, OwnerNotActivatedError
 from services.profiling import CriticalFile, ProfilingSummary
 from timeseries.helpers import fill_sparse_measurements
-from timeseries.models import Dataset, Interval, MeasurementName, MeasurementSummary
+from timeseries.models import Interval, MeasurementName, MeasurementSummary
 
 repository_bindable = ObjectType("Repository")
 
@@ -70,8 +74,7 @@ def resolve_lines(repository: Repository, info) -> Optional[int]:
 
 @repository_bindable.field("branch")
 def resolve_branch(repository, info, name):
-    command = info.context["executor"].get_command("branch")
-    return command.fetch_branch(repository, name)
+    return BranchLoader.loader(info).load((repository.pk, name))
 
 
 @repository_bindable.field("author")
@@ -93,8 +96,7 @@ def resolve_upload_token(repository, info):
 
 @repository_bindable.field("pull")
 def resolve_pull(repository, info, id):
-    command = info.context["executor"].get_command("pull")
-    return command.fetch_pull_request(repository, id)
+    return PullLoader.loader(info).load((repository.pk, id))
 
 
 @repository_bindable.field("pulls")
@@ -249,38 +251,33 @@ def resolve_active(repository: Repository, info) -> bool:
 
 
 @repository_bindable.field("flagsCount")
-@sync_to_async
-def resolve_flags_count(repository: Repository, info) -> int:
-    return repository.flags.filter(deleted__isnot=True).count()
+async def resolve_flags_count(repository: Repository, info) -> int:
+    flags = await RepositoryFlagLoader.loader(info).load(repository.pk)
+    return len(flags)
 
 
 @repository_bindable.field("flagsMeasurementsActive")
-@sync_to_async
-def resolve_flags_measurements_active(repository: Repository, info) -> bool:
+async def resolve_flags_measurements_active(repository: Repository, info) -> bool:
     if not settings.TIMESERIES_ENABLED:
         return False
 
-    return Dataset.objects.filter(
-        name=MeasurementName.FLAG_COVERAGE.value,
-        repository_id=repository.pk,
-    ).exists()
+    loader = DatasetLoader.loader(info, MeasurementName.FLAG_COVERAGE.value)
+    dataset = await loader.load(repository.pk)
+    return dataset is not None
 
 
 @repository_bindable.field("flagsMeasurementsBackfilled")
-@sync_to_async
-def resolve_flags_measurements_backfilled(repository: Repository, info) -> bool:
+async def resolve_flags_measurements_backfilled(repository: Repository, info) -> bool:
     if not settings.TIMESERIES_ENABLED:
         return False
 
-    dataset = Dataset.objects.filter(
-        name=MeasurementName.FLAG_COVERAGE.value,
-        repository_id=repository.pk,
-    ).first()
+    loader = DatasetLoader.loader(info, MeasurementName.FLAG_COVERAGE.value)
+    dataset = await loader.load(repository.pk)
 
     if not dataset:
         return False
 
-    return dataset.is_backfilled()
+    return await sync_to_async(dataset.is_backfilled)()
 
 
 @repository_bindable.field("measurements")
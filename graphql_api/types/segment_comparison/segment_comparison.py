@@ -4,7 +4,7 @@ from typing import List, Optional
 from ariadne import ObjectType, UnionType
 
 from graphql_api.types.errors.errors import ProviderError, UnknownPath
-from services.comparison import LineComparison, Segment
+from services.comparison import LineComparisonRow, Segment
 
 
 @dataclass
@@ -33,7 +33,7 @@ def resolve_header(segment: Segment, info) -> Optional[str]:
 
 
 @segment_comparison_bindable.field("lines")
-def resolve_lines(segment: Segment, info) -> List[LineComparison]:
+def resolve_lines(segment: Segment, info) -> List[LineComparisonRow]:
     return segment.lines
 
 
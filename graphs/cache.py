@@ -0,0 +1,103 @@
+import hashlib
+import logging
+from typing import Optional
+
+from django.conf import settings
+from redis.exceptions import RedisError
+from shared.metrics import metrics
+
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+
+class GraphCache:
+    """
+    Caches rendered badges and graphs in redis.
+
+    Keys are derived from everything a rendering depends on, including the SHA and
+    update timestamp of the commit being rendered, so when a branch head moves (or
+    its report changes) requests simply start using a new key and the stale
+    entries are left to expire. The same digest is used as the response ETag.
+
+    Computing that digest takes a few queries, so the digest of each requested URL
+    is itself cached for `GRAPH_CACHE_DIGEST_TTL` seconds, during which requests
+    (and `If-None-Match` revalidations) are answered without querying the
+    database. A branch that moves is picked up once that expires.
+    """
+
+    key_prefix = "graphs"
+
+    def __init__(self, ttl=None, digest_ttl=None):
+        self._ttl = ttl
+        self._digest_ttl = digest_ttl
+
+    @property
+    def ttl(self) -> int:
+        # a TTL of 0 disables the cache
+        return self._ttl if self._ttl is not None else settings.GRAPH_CACHE_TTL
+
+    @property
+    def digest_ttl(self) -> int:
+        # a TTL of 0 disables the cache
+        return (
+            self._digest_ttl
+            if self._digest_ttl is not None
+            else settings.GRAPH_CACHE_DIGEST_TTL
+        )
+
+    def digest(self, *parts) -> str:
+        return hashlib.sha256(
+            "\x1f".join(str(part) for part in parts).encode()
+        ).hexdigest()
+
+    def key(self, digest: str) -> str:
+        return f"{self.key_prefix}/{digest}"
+
+    def digest_key(self, url: str) -> str:
+        return f"{self.key_prefix}/digests/{self.digest(url)}"
+
+    def get_digest(self, url: str) -> Optional[str]:
+        if not self.digest_ttl:
+            return None
+        try:
+            value = get_redis_connection().get(self.digest_key(url))
+        except (OSError, RedisError) as e:
+            log.warning(f"Error reading graph digest cache: {e}")
+            return None
+        return value.decode() if value is not None else None
+
+    def set_digest(self, url: str, digest: str):
+        if not self.digest_ttl:
+            return
+        try:
+            get_redis_connection().set(
+                self.digest_key(url), digest.encode(), ex=self.digest_ttl
+            )
+        except (OSError, RedisError) as e:
+            log.warning(f"Error writing graph digest cache: {e}")
+
+    def get(self, digest: str) -> Optional[str]:
+        if not self.ttl:
+            return None
+        try:
+            value = get_redis_connection().get(self.key(digest))
+        except (OSError, RedisError) as e:
+            log.warning(f"Error reading graph cache: {e}")
+            return None
+        if value is None:
+            metrics.incr("graphs.cache.miss")
+            return None
+        metrics.incr("graphs.cache.hit")
+        return value.decode()
+
+    def set(self, digest: str, graph: str):
+        if not self.ttl:
+            return
+        try:
+            get_redis_connection().set(self.key(digest), graph.encode(), ex=self.ttl)
+        except (OSError, RedisError) as e:
+            log.warning(f"Error writing graph cache: {e}")
+
+
+graph_cache = GraphCache()
@@ -1,9 +1,21 @@
-from django.http import HttpResponse
+from typing import Optional
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
 from rest_framework import status
 from rest_framework.response import Response
 
+from .cache import graph_cache
+
 
 class GraphBadgeAPIMixin(object):
+    def get_cache_key_parts(self) -> Optional[tuple]:
+        """
+        Everything the rendered graph depends on, or `None` if it should not be
+        cached (e.g. because it cannot be resolved).
+        """
+        return None
+
     def get(self, request, *args, **kwargs):
 
         ext = self.kwargs.get("ext")
@@ -15,12 +27,37 @@ class GraphBadgeAPIMixin(object):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        graph = self.get_object(
-            request, *args, **kwargs
-        )  # for badge handler this will get the badge, for graph it will get the graph
+        # the full path includes the image token of private repos, so a digest
+        # is only ever served to requests that were allowed to see the graph
+        url = request.get_full_path()
+        digest = graph_cache.get_digest(url)
+        if digest is None:
+            cache_key_parts = self.get_cache_key_parts()
+            if cache_key_parts is not None:
+                digest = graph_cache.digest(self.filename, ext, *cache_key_parts)
+                graph_cache.set_digest(url, digest)
+
+        if digest is not None:
+            etag = f'"{digest}"'
+            if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+            if etag in if_none_match or "*" in if_none_match:
+                return self._add_headers(HttpResponseNotModified(), etag)
+
+        graph = graph_cache.get(digest) if digest else None
+        if graph is None:
+            graph = self.get_object(
+                request, *args, **kwargs
+            )  # for badge handler this will get the badge, for graph it will get the graph
+            if digest and isinstance(graph, str):
+                graph_cache.set(digest, graph)
         # do all the header stuff and return the response
 
         response = HttpResponse(graph)
+        return self._add_headers(response, f'"{digest}"' if digest else None)
+
+    def _add_headers(self, response, etag=None):
+        if etag:
+            response["ETag"] = etag
         if self.kwargs.get("ext") == "svg":
             response["Content-Disposition"] = ' inline; filename="{}.svg"'.format(
                 self.filename
@@ -31,5 +68,7 @@ class GraphBadgeAPIMixin(object):
             response[
                 "Access-Control-Expose-Headers"
             ] = "Content-Type, Cache-Control, Expires, Etag, Last-Modified"
-            response["Cache-Control"] = "no-cache, no-store, must-revalidate, max-age=0"
+            # no `no-store` so that clients can keep the image and revalidate
+            # it with `If-None-Match`
+            response["Cache-Control"] = "no-cache, must-revalidate, max-age=0"
         return response
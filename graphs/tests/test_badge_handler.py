@@ -1,11 +1,13 @@
 from unittest.mock import PropertyMock, patch
 
+import fakeredis
 from rest_framework import status
 from rest_framework.test import APITestCase
 from shared.reports.resources import Report, ReportFile, Session, SessionType
 from shared.reports.types import ReportLine, ReportTotals
 
 from codecov_auth.tests.factories import OwnerFactory
+from core.models import Commit
 from core.tests.factories import BranchFactory, CommitFactory, RepositoryFactory
 
 
@@ -1331,3 +1333,75 @@ class TestBadgeHandler(APITestCase):
         expected_badge = [line.strip() for line in expected_badge.split("\n")]
         assert expected_badge == badge
         assert response.status_code == status.HTTP_200_OK
+
+
+class TestBadgeHandlerCache(APITestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        patcher = patch("graphs.cache.get_redis_connection", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.owner = OwnerFactory(service="github")
+        self.repo = RepositoryFactory(
+            author=self.owner, active=True, private=False, name="repo1"
+        )
+        self.commit = CommitFactory(
+            repository=self.repo, author=self.owner, totals={"c": "95.00000"}
+        )
+        self.branch = BranchFactory(
+            repository=self.repo, name="main", head=self.commit.commitid
+        )
+
+    def _get(self, **headers):
+        path = f"/gh/{self.owner.username}/repo1/branch/main/graphs/badge.txt"
+        return self.client.get(path, **headers)
+
+    def test_etag(self):
+        response = self._get()
+        assert response.status_code == status.HTTP_200_OK
+        etag = response["ETag"]
+
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+
+        response = self._get(HTTP_IF_NONE_MATCH='"stale"')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content.decode() == "95"
+
+    def test_cached_without_queries(self):
+        etag = self._get()["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self._get(HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+            response = self._get()
+            assert response.content.decode() == "95"
+
+    def test_cached_until_head_moves(self):
+        response = self._get()
+        assert response.content.decode() == "95"
+        etag = response["ETag"]
+
+        # `update` leaves the commit's updatestamp alone so the badge is cached
+        Commit.objects.filter(pk=self.commit.pk).update(totals={"c": "50.00000"})
+        response = self._get()
+        assert response.content.decode() == "95"
+        assert response["ETag"] == etag
+
+        new_commit = CommitFactory(
+            repository=self.repo, author=self.owner, totals={"c": "80.00000"}
+        )
+        self.branch.head = new_commit.commitid
+        self.branch.save()
+
+        # until the digest of the URL expires
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        self.redis.delete(*self.redis.keys("graphs/digests/*"))
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content.decode() == "80"
+        assert response["ETag"] != etag
@@ -2,6 +2,7 @@ import logging
 
 from django.core.exceptions import ObjectDoesNotExist
 from django.http import Http404
+from django.utils.functional import cached_property
 from rest_framework import exceptions
 from rest_framework.exceptions import NotFound
 from rest_framework.negotiation import DefaultContentNegotiation
@@ -67,27 +68,38 @@ class BadgeHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
 
         return get_badge(coverage, coverage_range, precision)
 
-    def get_coverage(self):
-        """
-        Note: This endpoint has the behaviour of returning a gray badge with the word 'unknwon' instead of returning a 404
-              when the user enters an invalid service, owner, repo or when coverage is not found for a branch.
+    def get_cache_key_parts(self):
+        commit = self.head_commit
+        if commit is None:
+            return None
+        return (
+            commit.repository_id,
+            commit.commitid,
+            commit.updatestamp,
+            # the coverage range comes from the repo yaml
+            self.repo.updatestamp,
+            self.request.query_params.get("precision", "0"),
+            self.request.query_params.get("flag"),
+        )
 
-              We also need to support service abbreviations for users already using them
+    @cached_property
+    def head_commit(self):
+        """
+        The head commit of the requested branch, or `None` if it can't be found or
+        the request is not allowed to see it.
         """
-        coverage_range = [70, 100]
-
         try:
             repo = self.repo
         except Http404:
             log.warning("Repo not found", extra=dict(repo=self.kwargs.get("repo_name")))
-            return None, coverage_range
+            return None
 
         if repo.private and repo.image_token != self.request.query_params.get("token"):
             log.warning(
                 "Token provided does not match repo's image token",
                 extra=dict(repo=repo),
             )
-            return None, coverage_range
+            return None
 
         branch_name = self.kwargs.get("branch") or repo.branch
         branch = Branch.objects.filter(
@@ -98,13 +110,27 @@ class BadgeHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
             log.warning(
                 "Branch not found", extra=dict(branch_name=branch_name, repo=repo)
             )
-            return None, coverage_range
+            return None
         try:
-            commit = repo.commits.get(commitid=branch.head)
+            return repo.commits.get(commitid=branch.head)
         except ObjectDoesNotExist:
             # if commit does not exist return None coverage
             log.warning("Commit not found", extra=dict(commit=branch.head))
+            return None
+
+    def get_coverage(self):
+        """
+        Note: This endpoint has the behaviour of returning a gray badge with the word 'unknwon' instead of returning a 404
+              when the user enters an invalid service, owner, repo or when coverage is not found for a branch.
+
+              We also need to support service abbreviations for users already using them
+        """
+        coverage_range = [70, 100]
+
+        commit = self.head_commit
+        if commit is None:
             return None, coverage_range
+        repo = self.repo
 
         if repo.yaml and repo.yaml.get("coverage", {}).get("range") is not None:
             coverage_range = repo.yaml.get("coverage", {}).get("range")
@@ -149,6 +175,21 @@ class GraphHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
     extensions = ["svg"]
     filename = "graph"
 
+    def get_cache_key_parts(self):
+        if self.kwargs.get("pullid"):
+            return None
+        commit = self.get_commit()
+        if commit is None:
+            return None
+        return (
+            commit.repository_id,
+            commit.commitid,
+            commit.updatestamp,
+            self.kwargs.get("graph"),
+            self.request.query_params.get("width"),
+            self.request.query_params.get("height"),
+        )
+
     def get_object(self, request, *args, **kwargs):
         options = dict()
         graph = self.kwargs.get("graph")
@@ -228,6 +269,10 @@ class GraphHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
         return self.get_commit_flare()
 
     def get_commit(self):
+        return self.commit
+
+    @cached_property
+    def commit(self):
         try:
             repo = self.repo
         except Http404:
@@ -29,6 +29,8 @@ class MinioEndpoints(Enum):
     static_analysis_single_file = (
         "{version}/repos/{repo_hash}/static_analysis/files/{location}"
     )
+    comparison_file_changes = "{version}/repos/{repo_hash}/comparisons/{base_commitid}/{head_commitid}/file_changes/{kind}.json"
+    comparison_file_changes_version = "{version}/repos/{repo_hash}/comparisons/{base_commitid}/{head_commitid}/file_changes/{kind}.version.json"
 
     def get_path(self, **kwaargs):
         return self.value.format(**kwaargs)
@@ -202,6 +204,13 @@ class ArchiveService(object):
         contents = self.storage.read_file(self.root, path)
         return contents.decode()
 
+    """
+    Generic method to read a file from the archive without decoding it
+    """
+
+    def read_file_bytes(self, path) -> bytes:
+        return self.storage.read_file(self.root, path)
+
     """
     Generic method to delete a file from the archive.
     """
@@ -230,6 +239,18 @@ class ArchiveService(object):
         log.info("Downloading chunks from path %s for commit %s", path, commit_sha)
         return self.read_file(path)
 
+    """
+    Convenience method to read a chunks file from the archive as raw bytes.
+    Useful when only some of the chunks will actually be decoded.
+    """
+
+    def read_chunks_buffer(self, commit_sha) -> bytes:
+        path = MinioEndpoints.chunks.get_path(
+            version="v4", repo_hash=self.storage_hash, commitid=commit_sha
+        )
+        log.info("Downloading chunks from path %s for commit %s", path, commit_sha)
+        return self.read_file_bytes(path)
+
     """
     Delete a chunk file from the archive
     """
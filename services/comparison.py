@@ -1,19 +1,30 @@
 import asyncio
-import copy
 import functools
 import json
 import logging
+import math
+import multiprocessing
+import os
+import time
+import zlib
 from collections import Counter
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import List, Optional
 
+import django
 import minio
 import pytz
 from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.db.models import Prefetch
 from django.utils.functional import cached_property
+from redis.exceptions import RedisError
 from shared.helpers.yaml import walk
+from shared.metrics import metrics
 from shared.reports.types import ReportTotals
 from shared.utils.merge import LineType, line_type
 
@@ -22,7 +33,7 @@ from compare.models import CommitComparison
 from core.models import Commit
 from reports.models import CommitReport, ReportDetails
 from services import ServiceException
-from services.archive import ArchiveService
+from services.archive import ArchiveService, MinioEndpoints
 from services.redis_configuration import get_redis_connection
 from services.repo_providers import RepoProviderService
 from utils.config import get_config
@@ -35,6 +46,9 @@ redis = get_redis_connection()
 
 MAX_DIFF_SIZE = 170
 
+# upper bounds (in seconds) of the buckets of the per-file comparison timings
+FILE_DURATION_BUCKETS = (0.001, 0.01, 0.1, 1.0)
+
 
 def _is_added(line_value):
     return line_value and line_value[0] == "+"
@@ -58,6 +72,127 @@ class MissingComparisonReport(ComparisonException):
     pass
 
 
+class ProviderCompareCache:
+    """
+    Caches provider compare responses in redis, keyed by the repository and the
+    two commit SHAs. Since commits are immutable, so are the responses, and the
+    entries only expire to bound redis memory. Values are stored as
+    zlib-compressed JSON.
+
+    Concurrent misses for the same key are de-duplicated with a redis lock: the
+    first caller fetches from the provider while the others wait for it, for up to
+    `lock_wait` seconds in total, and then read the stored value. If waiting
+    times out, or redis is unavailable, the caller fetches from the provider
+    directly.
+    """
+
+    key_prefix = "compare"
+
+    def __init__(self, ttl=None, lock_timeout=None, lock_wait=None):
+        self.ttl = ttl or settings.COMPARE_CACHE_TTL
+        self.lock_timeout = lock_timeout or settings.COMPARE_CACHE_LOCK_TIMEOUT
+        self.lock_wait = (
+            lock_wait if lock_wait is not None else settings.COMPARE_CACHE_LOCK_WAIT
+        )
+
+    def key(self, repoid, base_sha, head_sha):
+        return f"{self.key_prefix}/{repoid}/{base_sha}/{head_sha}"
+
+    def get_many(self, repository, pairs, get_adapter):
+        """
+        Returns the compare responses for each (base_sha, head_sha) in `pairs`, in
+        order. `get_adapter` is only called if some of them have to be fetched.
+        """
+        keys = [self.key(repository.repoid, base, head) for base, head in pairs]
+        results = self._read(keys)
+        missing = [i for i, result in enumerate(results) if result is None]
+        metrics.incr("services.comparison.compare_cache.hit", len(keys) - len(missing))
+        if not missing:
+            return results
+
+        locks = self._acquire_locks(sorted(keys[i] for i in missing))
+        try:
+            for i, result in zip(missing, self._read([keys[i] for i in missing])):
+                results[i] = result
+            missing = [i for i in missing if results[i] is None]
+            metrics.incr("services.comparison.compare_cache.miss", len(missing))
+            if missing:
+                adapter = get_adapter()
+
+                async def runnable():
+                    return await asyncio.gather(
+                        *(adapter.get_compare(*pairs[i]) for i in missing)
+                    )
+
+                fetched = async_to_sync(runnable)()
+                for i, result in zip(missing, fetched):
+                    results[i] = result
+                self._write({keys[i]: results[i] for i in missing})
+        finally:
+            self._release_locks(locks)
+        return results
+
+    def get(self, repository, base_sha, head_sha, get_adapter):
+        return self.get_many(repository, [(base_sha, head_sha)], get_adapter)[0]
+
+    def _read(self, keys):
+        try:
+            values = redis.mget(keys)
+        except (OSError, RedisError) as e:
+            log.warning(f"Error reading compare cache: {e}")
+            return [None] * len(keys)
+        return [self._decode(value) for value in values]
+
+    def _decode(self, value):
+        if value is None:
+            return None
+        try:
+            return json.loads(zlib.decompress(value))
+        except (zlib.error, TypeError, ValueError):
+            return None
+
+    def _write(self, values):
+        try:
+            pipeline = redis.pipeline(transaction=False)
+            for key, value in values.items():
+                pipeline.set(
+                    key, zlib.compress(json.dumps(value).encode()), ex=self.ttl
+                )
+            pipeline.execute()
+        except (OSError, RedisError, TypeError) as e:
+            log.warning(f"Error writing compare cache: {e}")
+
+    def _acquire_locks(self, keys):
+        locks = []
+        # the wait is shared by all the keys, after which the keys whose lock
+        # wasn't acquired are fetched without one
+        deadline = time.monotonic() + self.lock_wait
+        for key in keys:
+            lock = redis.lock(
+                f"{key}/lock",
+                timeout=self.lock_timeout,
+                blocking_timeout=max(deadline - time.monotonic(), 0),
+            )
+            try:
+                if lock.acquire():
+                    locks.append(lock)
+            except (OSError, RedisError) as e:
+                log.warning(f"Error acquiring compare cache lock: {e}")
+                break
+        return locks
+
+    def _release_locks(self, locks):
+        for lock in locks:
+            try:
+                lock.release()
+            except (OSError, RedisError):
+                # the lock expired or redis went away; either way it's not held
+                pass
+
+
+compare_cache = ProviderCompareCache()
+
+
 class FileComparisonTraverseManager:
     """
     The FileComparisonTraverseManager uses the visitor-pattern to execute a series
@@ -111,44 +246,70 @@ class FileComparisonTraverseManager:
         """
         self.head_file_eof = head_file_eof
         self.base_file_eof = base_file_eof
-        self.segments = copy.deepcopy(segments)
+        self.segments = list(segments)
         self.src = src
 
+        # hunk headers parsed once as (base_start, base_end, head_start, head_end)
+        self._headers = [
+            self._parse_header(segment["header"]) for segment in self.segments
+        ]
+        # position of the next line to visit: we advance these indices instead
+        # of popping lines/segments off the (caller-owned) lists
+        self._segment_index = 0
+        self._line_index = 0
+
         if self.segments:
             # Base offsets can be 0 if files are added or removed
-            self.base_ln = min(1, int(self.segments[0]["header"][0]))
-            self.head_ln = min(1, int(self.segments[0]["header"][2]))
+            self.base_ln = min(1, self._headers[0][0])
+            self.head_ln = min(1, self._headers[0][2])
         else:
             self.base_ln, self.head_ln = 1, 1
 
+    @staticmethod
+    def _parse_header(header):
+        base_start, base_count, head_start, head_count = header
+        base_start, head_start = int(base_start), int(head_start)
+        return (
+            base_start,
+            base_start + int(base_count or 1),
+            head_start,
+            head_start + int(head_count or 1),
+        )
+
+    def _current_segment_lines(self):
+        return self.segments[self._segment_index].get("lines") or []
+
+    def _skip_exhausted_segments(self):
+        # Either the segment has no lines (and is therefore of no use)
+        # or all lines have been visited, which means we are
+        # done traversing it
+        while self._segment_index < len(self.segments) and self._line_index >= len(
+            self._current_segment_lines()
+        ):
+            self._segment_index += 1
+            self._line_index = 0
+
     def traverse_finished(self):
-        if self.segments:
+        if self._segment_index < len(self.segments):
             return False
         if self.src:
             return self.head_ln > len(self.src)
         return self.head_ln >= self.head_file_eof and self.base_ln >= self.base_file_eof
 
     def traversing_diff(self):
-        if self.segments == []:
+        if self._segment_index >= len(self.segments):
             return False
 
-        base_ln_within_offset = (
-            int(self.segments[0]["header"][0])
-            <= self.base_ln
-            < int(self.segments[0]["header"][0])
-            + int(self.segments[0]["header"][1] or 1)
-        )
-        head_ln_within_offset = (
-            int(self.segments[0]["header"][2])
-            <= self.head_ln
-            < int(self.segments[0]["header"][2])
-            + int(self.segments[0]["header"][3] or 1)
-        )
+        base_start, base_end, head_start, head_end = self._headers[self._segment_index]
+        base_ln_within_offset = base_start <= self.base_ln < base_end
+        head_ln_within_offset = head_start <= self.head_ln < head_end
         return base_ln_within_offset or head_ln_within_offset
 
     def pop_line(self):
         if self.traversing_diff():
-            return self.segments[0]["lines"].pop(0)
+            line = self._current_segment_lines()[self._line_index]
+            self._line_index += 1
+            return line
 
         if self.src:
             return self.src[self.head_ln - 1]
@@ -163,31 +324,30 @@ class FileComparisonTraverseManager:
 
         visitors -- A list of visitors applied to each line.
         """
+        self._skip_exhausted_segments()
         while not self.traverse_finished():
             line_value = self.pop_line()
             is_diff = self.traversing_diff()
+            added = is_diff and _is_added(line_value)
+            removed = is_diff and _is_removed(line_value)
 
             for visitor in visitors:
                 visitor(
-                    None if is_diff and _is_added(line_value) else self.base_ln,
-                    None if is_diff and _is_removed(line_value) else self.head_ln,
+                    None if added else self.base_ln,
+                    None if removed else self.head_ln,
                     line_value,
                     is_diff,  # TODO(pierce): remove when upon combining diff + changes tabs in UI
                 )
 
-            if is_diff and _is_added(line_value):
+            if added:
                 self.head_ln += 1
-            elif is_diff and _is_removed(line_value):
+            elif removed:
                 self.base_ln += 1
             else:
                 self.head_ln += 1
                 self.base_ln += 1
 
-            if self.segments and not self.segments[0]["lines"]:
-                # Either the segment has no lines (and is therefore of no use)
-                # or all lines have been popped and visited, which means we are
-                # done traversing it
-                self.segments.pop(0)
+            self._skip_exhausted_segments()
 
 
 class FileComparisonVisitor:
@@ -246,7 +406,7 @@ class CreateLineComparisonVisitor(FileComparisonVisitor):
 
     def __init__(self, base_file, head_file):
         self.base_file, self.head_file = base_file, head_file
-        self.lines = []
+        self.lines = LineComparisons()
 
     def __call__(self, base_ln, head_ln, value, is_diff):
         if value is None:
@@ -255,14 +415,12 @@ class CreateLineComparisonVisitor(FileComparisonVisitor):
         base_line, head_line = self._get_lines(base_ln, head_ln)
 
         self.lines.append(
-            LineComparison(
-                base_line=base_line,
-                head_line=head_line,
-                base_ln=base_ln,
-                head_ln=head_ln,
-                value=value,
-                is_diff=is_diff,
-            )
+            base_line=base_line,
+            head_line=head_line,
+            base_ln=base_ln,
+            head_ln=head_ln,
+            value=value,
+            is_diff=is_diff,
         )
 
 
@@ -318,14 +476,14 @@ class LineComparison:
         self.added = is_diff and _is_added(value)
         self.removed = is_diff and _is_removed(value)
 
-    @property
+    @cached_property
     def number(self):
         return {
             "base": self.base_ln if not self.added else None,
             "head": self.head_ln if not self.removed else None,
         }
 
-    @property
+    @cached_property
     def coverage(self):
         return {
             "base": None
@@ -366,15 +524,157 @@ class LineComparison:
 
     @cached_property
     def hit_session_ids(self) -> Optional[List[int]]:
-        if self.head_line_sessions is None:
-            return None
+        return _hit_session_ids(self.head_line_sessions)
 
-        ids = []
-        for (id, coverage, *rest) in self.head_line_sessions:
-            if line_type(coverage) == LineType.hit:
-                ids.append(id)
-        if len(ids) > 0:
-            return ids
+
+def _hit_session_ids(sessions: Optional[List[tuple]]) -> Optional[List[int]]:
+    if sessions is None:
+        return None
+
+    ids = []
+    for (id, coverage, *rest) in sessions:
+        if line_type(coverage) == LineType.hit:
+            ids.append(id)
+    if len(ids) > 0:
+        return ids
+
+
+class LineComparisonRow:
+    """
+    A line of a `LineComparisons`, read straight from its columns.  Has the
+    attributes of a `LineComparison` that the GraphQL line resolvers use, without
+    computing (and caching) all the others.
+    """
+
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, columns: "LineComparisons", index: int):
+        self._columns = columns
+        self._index = index
+
+    @property
+    def value(self):
+        return self._columns.values[self._index]
+
+    @property
+    def is_diff(self):
+        return self._columns.is_diff[self._index]
+
+    @property
+    def number(self):
+        columns, idx = self._columns, self._index
+        return {
+            "base": columns.base_ln[idx] if not columns.added[idx] else None,
+            "head": columns.head_ln[idx] if not columns.removed[idx] else None,
+        }
+
+    @property
+    def coverage(self):
+        columns, idx = self._columns, self._index
+        return {
+            "base": columns.base_coverage[idx],
+            "head": columns.head_coverage[idx],
+        }
+
+    @property
+    def hit_session_ids(self) -> Optional[List[int]]:
+        head_line = self._columns.head_lines[self._index]
+        # see `LineComparison.head_line_sessions`
+        return _hit_session_ids(head_line[2] if head_line is not None else None)
+
+
+class LineComparisons(Sequence):
+    """
+    Columnar storage of the line comparisons of a file: each attribute is an
+    array with one entry per line.  This lets us find the lines of interest
+    (i.e. for segmenting) without creating a `LineComparison` for every line
+    of the file.  `LineComparison`s are only created (once) when a line is
+    accessed.
+    """
+
+    def __init__(self):
+        self.base_lines = []
+        self.head_lines = []
+        self.base_ln = []
+        self.head_ln = []
+        self.values = []
+        self.is_diff = []
+        self.added = []
+        self.removed = []
+        self.base_coverage = []
+        self.head_coverage = []
+        self._line_comparisons = {}
+
+    @classmethod
+    def from_line_comparisons(
+        cls, line_comparisons: List[LineComparison]
+    ) -> "LineComparisons":
+        lines = cls()
+        for idx, line in enumerate(line_comparisons):
+            lines.append(
+                base_line=line.base_line,
+                head_line=line.head_line,
+                base_ln=line.base_ln,
+                head_ln=line.head_ln,
+                value=line.value,
+                is_diff=line.is_diff,
+            )
+            lines._line_comparisons[idx] = line
+        return lines
+
+    def append(self, base_line, head_line, base_ln, head_ln, value, is_diff):
+        added = bool(is_diff and _is_added(value))
+        removed = bool(is_diff and _is_removed(value))
+
+        self.base_lines.append(base_line)
+        self.head_lines.append(head_line)
+        self.base_ln.append(base_ln)
+        self.head_ln.append(head_ln)
+        self.values.append(value)
+        self.is_diff.append(is_diff)
+        self.added.append(added)
+        self.removed.append(removed)
+        self.base_coverage.append(
+            None if added or not base_line else line_type(base_line[0])
+        )
+        self.head_coverage.append(
+            None if removed or not head_line else line_type(head_line[0])
+        )
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[idx] for idx in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if index not in self._line_comparisons:
+            self._line_comparisons[index] = LineComparison(
+                base_line=self.base_lines[index],
+                head_line=self.head_lines[index],
+                base_ln=self.base_ln[index],
+                head_ln=self.head_ln[index],
+                value=self.values[index],
+                is_diff=self.is_diff[index],
+            )
+        return self._line_comparisons[index]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Sequence) and list(self) == list(other)
+
+    def changed_indexes(self) -> List[int]:
+        """
+        Indexes of the lines whose coverage changed or that are part of the diff.
+        """
+        return [
+            idx
+            for idx, (base_coverage, head_coverage, added, removed) in enumerate(
+                zip(self.base_coverage, self.head_coverage, self.added, self.removed)
+            )
+            if base_coverage != head_coverage or added or removed
+        ]
 
 
 class Segment:
@@ -391,17 +691,15 @@ class Segment:
 
     @classmethod
     def segments(cls, file_comparison):
-        lines = file_comparison.lines
+        return cls.from_lines(file_comparison.lines)
+
+    @classmethod
+    def from_lines(cls, lines):
+        if not isinstance(lines, LineComparisons):
+            lines = LineComparisons.from_line_comparisons(lines)
 
         # line numbers of interest (i.e. coverage changed or code changed)
-        line_numbers = []
-        for idx, line in enumerate(lines):
-            if (
-                line.coverage["base"] != line.coverage["head"]
-                or line.added
-                or line.removed
-            ):
-                line_numbers.append(idx)
+        line_numbers = lines.changed_indexes()
 
         segmented_lines = []
         if len(line_numbers) > 0:
@@ -422,30 +720,33 @@ class Segment:
             end_line_number = group[-1] + cls.padding_lines
             end_line_number = min(end_line_number, len(lines) - 1)
 
-            segment = cls(lines[start_line_number : end_line_number + 1])
+            segment = cls(lines, start_line_number, end_line_number + 1)
             segments.append(segment)
 
         return segments
 
-    def __init__(self, lines):
-        self._lines = lines
+    def __init__(self, line_comparisons: LineComparisons, start: int, end: int):
+        self._line_comparisons = line_comparisons
+        self._range = range(start, end)
 
     @property
     def header(self):
+        columns = self._line_comparisons
         base_start = None
         head_start = None
         num_removed = 0
         num_added = 0
         num_context = 0
 
-        for line in self.lines:
-            if base_start is None and line.number["base"] is not None:
-                base_start = int(line.number["base"])
-            if head_start is None and line.number["head"] is not None:
-                head_start = int(line.number["head"])
-            if line.added:
+        for idx in self._range:
+            added, removed = columns.added[idx], columns.removed[idx]
+            if base_start is None and not added and columns.base_ln[idx] is not None:
+                base_start = int(columns.base_ln[idx])
+            if head_start is None and not removed and columns.head_ln[idx] is not None:
+                head_start = int(columns.head_ln[idx])
+            if added:
                 num_added += 1
-            elif line.removed:
+            elif removed:
                 num_removed += 1
             else:
                 num_context += 1
@@ -457,23 +758,22 @@ class Segment:
             num_context + num_added,
         )
 
-    @property
-    def lines(self):
-        return self._lines
+    @cached_property
+    def lines(self) -> List[LineComparisonRow]:
+        return [LineComparisonRow(self._line_comparisons, idx) for idx in self._range]
 
     @property
     def has_diff_changes(self):
-        for line in self.lines:
-            if line.added or line.removed:
-                return True
-        return False
+        columns = self._line_comparisons
+        return any(columns.added[idx] or columns.removed[idx] for idx in self._range)
 
     @property
     def has_unintended_changes(self):
-        for line in self.lines:
-            head_coverage = line.coverage["base"]
-            base_coverage = line.coverage["head"]
-            if not (line.added or line.removed) and (base_coverage != head_coverage):
+        columns = self._line_comparisons
+        for idx in self._range:
+            if columns.added[idx] or columns.removed[idx]:
+                continue
+            if columns.base_coverage[idx] != columns.head_coverage[idx]:
                 return True
         return False
 
@@ -541,6 +841,9 @@ class FileComparison:
         self.bypass_max_diff = bypass_max_diff
         self.should_search_for_changes = should_search_for_changes
 
+        # how long (in seconds) it took to compute the change summary and lines
+        self.duration = None
+
     @property
     def name(self):
         return {
@@ -588,6 +891,7 @@ class FileComparison:
         This limitation improves performance by limiting searching for changes to only files that
         have them.
         """
+        start = time.perf_counter()
         change_summary_visitor = CreateChangeSummaryVisitor(
             self.base_file, self.head_file
         )
@@ -595,7 +899,7 @@ class FileComparison:
             self.base_file, self.head_file
         )
 
-        if self.diff_data or self.src or self.should_search_for_changes is not False:
+        if self.needs_traversal:
             FileComparisonTraverseManager(
                 head_file_eof=self.head_file.eof if self.head_file is not None else 0,
                 base_file_eof=self.base_file.eof if self.base_file is not None else 0,
@@ -605,8 +909,15 @@ class FileComparison:
                 src=self.src,
             ).apply([change_summary_visitor, create_lines_visitor])
 
+        self.duration = time.perf_counter() - start
         return change_summary_visitor.summary, create_lines_visitor.lines
 
+    @property
+    def needs_traversal(self):
+        return bool(
+            self.diff_data or self.src or self.should_search_for_changes is not False
+        )
+
     @cached_property
     def change_summary(self):
         return self._calculated_changes_and_lines[0]
@@ -626,6 +937,89 @@ class FileComparison:
         return Segment.segments(self)
 
 
+def file_change_entry(file_comparison: FileComparison) -> Optional[dict]:
+    """
+    The persisted form of a file comparison: its unexpected coverage changes
+    (as hits/misses/partials deltas) and the `(base_start, base_length,
+    head_start, head_length)` ranges of its segments.  `None` for files that
+    have neither a diff nor coverage changes.
+    """
+    summary, lines = file_comparison._calculated_changes_and_lines
+    change_summary = {key: delta for key, delta in summary.items() if delta}
+    if not change_summary and not file_comparison.has_diff:
+        return None
+    return {
+        "name": file_comparison.name,
+        "has_diff": file_comparison.has_diff,
+        "change_summary": change_summary,
+        "segments": [list(segment.header) for segment in Segment.from_lines(lines)],
+    }
+
+
+def file_duration_histogram(file_comparisons: List[FileComparison]) -> dict:
+    """
+    Number of files whose change summary and lines took less than each of the
+    `FILE_DURATION_BUCKETS` to compute (files that weren't computed are left out).
+    """
+    histogram = Counter()
+    for file_comparison in file_comparisons:
+        if file_comparison.duration is None:
+            continue
+        label = next(
+            (
+                f"lt_{bound * 1000:g}ms"
+                for bound in FILE_DURATION_BUCKETS
+                if file_comparison.duration < bound
+            ),
+            f"ge_{FILE_DURATION_BUCKETS[-1] * 1000:g}ms",
+        )
+        histogram[label] += 1
+    return dict(histogram)
+
+
+@dataclass
+class _TraversedFile:
+    """
+    The parts of a `ReportFile` that are needed to traverse a file comparison,
+    which is all that is sent to the pool workers for it.
+    """
+
+    _lines: list
+    eof: int
+
+    @classmethod
+    def from_report_file(cls, report_file) -> Optional["_TraversedFile"]:
+        if report_file is None:
+            return None
+        return cls(_lines=report_file._lines, eof=report_file.eof)
+
+
+def _traverse_file_comparisons(file_comparisons: List[FileComparison]) -> List[tuple]:
+    results = []
+    for file_comparison in file_comparisons:
+        summary, lines = file_comparison._calculated_changes_and_lines
+        results.append((summary, lines, file_comparison.duration))
+    return results
+
+
+@functools.lru_cache(maxsize=None)
+def _file_comparison_pool(processes: int, pid: int) -> ProcessPoolExecutor:
+    """
+    One pool per process, like the redis clients.  The workers are forked from a
+    fork server rather than from this process, so they don't inherit its threads
+    or its database and redis connections, and set up Django once when started.
+    """
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("forkserver"),
+        initializer=django.setup,
+    )
+
+
+def _isoformat(timestamp: Optional[datetime]) -> Optional[str]:
+    return timestamp.isoformat() if timestamp is not None else None
+
+
 class Comparison(object):
     def __init__(self, user, base_commit, head_commit):
         # TODO: rename to owner
@@ -648,8 +1042,80 @@ class Comparison(object):
 
     @cached_property
     def files(self):
-        for file_name in self.head_report.files:
-            yield self.get_file_comparison(file_name)
+        yield from self.file_comparisons()
+
+    def file_comparisons(self, bypass_max_diff=False):
+        """
+        Yields the comparison of every file of the head report, in order.  If
+        enabled, large comparisons have their files compared by a pool of
+        processes up front rather than one at a time as they are consumed.
+        """
+        file_comparisons = (
+            self.get_file_comparison(file_name, bypass_max_diff=bypass_max_diff)
+            for file_name in self.head_report.files
+        )
+        if settings.COMPARISON_PARALLEL_PROCESSES > 1:
+            file_comparisons = self._compare_in_parallel(list(file_comparisons))
+
+        compared = []
+        for file_comparison in file_comparisons:
+            compared.append(file_comparison)
+            yield file_comparison
+
+        for label, count in file_duration_histogram(compared).items():
+            metrics.incr(f"services.comparison.file_duration.{label}", count)
+
+    def _compare_in_parallel(
+        self, file_comparisons: List["FileComparison"]
+    ) -> List["FileComparison"]:
+        """
+        Computes the change summary and lines of the given file comparisons that
+        need it in a pool of worker processes.  Contiguous chunks of files are
+        sent to the workers, with only the lines of their report files, and the
+        results are merged back in order.
+        """
+        pending = [fc for fc in file_comparisons if fc.needs_traversal]
+        if len(pending) < settings.COMPARISON_PARALLEL_MIN_FILES:
+            return file_comparisons
+
+        processes = settings.COMPARISON_PARALLEL_PROCESSES
+        # a few chunks per worker so that a slow chunk doesn't hold up the rest
+        chunk_size = math.ceil(len(pending) / (processes * 4))
+        starts = range(0, len(pending), chunk_size)
+        chunks = [
+            [
+                FileComparison(
+                    base_file=_TraversedFile.from_report_file(fc.base_file),
+                    head_file=_TraversedFile.from_report_file(fc.head_file),
+                    diff_data=fc.diff_data,
+                    src=fc.src,
+                    should_search_for_changes=fc.should_search_for_changes,
+                )
+                for fc in pending[start : start + chunk_size]
+            ]
+            for start in starts
+        ]
+        try:
+            executor = _file_comparison_pool(processes, os.getpid())
+            results = executor.map(_traverse_file_comparisons, chunks)
+            for start, chunk_results in zip(starts, results):
+                for offset, (summary, lines, duration) in enumerate(chunk_results):
+                    file_comparison = pending[start + offset]
+                    file_comparison.__dict__["_calculated_changes_and_lines"] = (
+                        summary,
+                        lines,
+                    )
+                    file_comparison.duration = duration
+        except (OSError, BrokenProcessPool) as e:
+            # a broken pool can't be used anymore, the next comparison starts a
+            # new one
+            _file_comparison_pool.cache_clear()
+            # whatever wasn't computed yet will be computed lazily, as usual
+            log.warning(
+                f"Error comparing files in parallel: {e}",
+                extra=dict(head_commit=self.head_commit.commitid),
+            )
+        return file_comparisons
 
     def get_file_comparison(self, file_name, with_src=False, bypass_max_diff=False):
         head_file = self.head_report.get(file_name)
@@ -682,8 +1148,146 @@ class Comparison(object):
             diff_data=diff_data,
             src=src,
             bypass_max_diff=bypass_max_diff,
+            # files without a diff are only traversed if they have coverage
+            # changes, when that's known
+            should_search_for_changes=(
+                file_name in self._files_with_changes
+                if self._files_with_changes is not None
+                else None
+            ),
         )
 
+    @cached_property
+    def _files_with_changes(self) -> Optional[List[str]]:
+        return self._stored_files_with_changes()
+
+    def _stored_files_with_changes(self) -> Optional[List[str]]:
+        """
+        The names of the (head) files with coverage changes, according to the
+        stored file changes, if they're current.
+        """
+        if self.stored_file_changes is None:
+            return None
+        return [
+            entry["name"]["head"]
+            for entry in self.stored_file_changes
+            if entry["change_summary"]
+        ]
+
+    @cached_property
+    def file_changes(self) -> List[dict]:
+        """
+        The change summary and segments of every file with a diff or coverage
+        changes.  These are persisted per (base, head) pair and kind of comparison
+        so that once they've been computed they're served without building either
+        report.
+        """
+        if self.stored_file_changes is not None:
+            return self.stored_file_changes
+
+        file_changes = [
+            entry
+            for entry in map(file_change_entry, self.file_comparisons())
+            if entry is not None
+        ]
+        self._store_file_changes(file_changes)
+        return file_changes
+
+    @property
+    def _file_changes_kind(self) -> str:
+        # comparisons of the same commits can differ in how the base report is
+        # built, so each kind is stored separately
+        return "commits"
+
+    def _file_changes_endpoint_path(self, endpoint: MinioEndpoints) -> str:
+        return endpoint.get_path(
+            version="v4",
+            repo_hash=ArchiveService.get_archive_hash(self.head_commit.repository),
+            base_commitid=self.base_commit.commitid,
+            head_commitid=self.head_commit.commitid,
+            kind=self._file_changes_kind,
+        )
+
+    @property
+    def _file_changes_path(self) -> str:
+        return self._file_changes_endpoint_path(MinioEndpoints.comparison_file_changes)
+
+    @property
+    def _file_changes_version_path(self) -> str:
+        # the version is also stored on its own, so that finding out whether the
+        # stored changes are current doesn't take reading all of them
+        return self._file_changes_endpoint_path(
+            MinioEndpoints.comparison_file_changes_version
+        )
+
+    @property
+    def _file_changes_version(self) -> dict:
+        # the stored changes are stale once either commit's report is updated
+        return {
+            "kind": self._file_changes_kind,
+            "base_updatestamp": _isoformat(self.base_commit.updatestamp),
+            "head_updatestamp": _isoformat(self.head_commit.updatestamp),
+        }
+
+    @cached_property
+    def _stored_file_changes_version(self) -> Optional[dict]:
+        try:
+            archive_service = ArchiveService(self.head_commit.repository)
+            return json.loads(
+                archive_service.read_file(self._file_changes_version_path)
+            )
+        except Exception:
+            # most likely they were never stored
+            return None
+
+    @property
+    def _file_changes_stored(self) -> bool:
+        return self._stored_file_changes_version == self._file_changes_version
+
+    @cached_property
+    def stored_file_changes(self) -> Optional[List[dict]]:
+        if not self._file_changes_stored:
+            return None
+
+        archive_service = ArchiveService(self.head_commit.repository)
+        try:
+            data = json.loads(archive_service.read_file(self._file_changes_path))
+        except Exception:
+            return None
+
+        # they may have been rewritten since the version was read
+        if data.get("version") != self._file_changes_version:
+            return None
+        return data.get("files")
+
+    def _store_file_changes(self, file_changes: List[dict]):
+        """
+        Stores the given file changes, unless the current ones already are.
+        """
+        if self._file_changes_stored:
+            return
+
+        archive_service = ArchiveService(self.head_commit.repository)
+        version = self._file_changes_version
+        data = {"version": version, "files": file_changes}
+        try:
+            archive_service.write_file(self._file_changes_path, json.dumps(data))
+            # written last, so that the version never claims changes that
+            # weren't stored
+            archive_service.write_file(
+                self._file_changes_version_path, json.dumps(version)
+            )
+            self.__dict__["_stored_file_changes_version"] = version
+        except Exception:
+            log.warning(
+                "Error storing file changes",
+                extra=dict(
+                    base_commit=self.base_commit.commitid,
+                    head_commit=self.head_commit.commitid,
+                ),
+                exc_info=True,
+            )
+
     @property
     def git_comparison(self):
         return self._fetch_comparison_and_reverse_comparison[0]
@@ -760,25 +1364,18 @@ class Comparison(object):
     @cached_property
     def _fetch_comparison_and_reverse_comparison(self):
         """
-        Fetches comparison and reverse comparison concurrently, then
-        caches the result. Returns (comparison, reverse_comparison).
+        Fetches comparison and reverse comparison concurrently, through the
+        compare cache. Returns (comparison, reverse_comparison).
         """
-        adapter = RepoProviderService().get_adapter(
-            self.user, self.base_commit.repository
-        )
-        comparison_coro = adapter.get_compare(
-            self.base_commit.commitid, self.head_commit.commitid
-        )
-
-        reverse_comparison_coro = adapter.get_compare(
-            self.head_commit.commitid, self.base_commit.commitid
+        base_sha, head_sha = self.base_commit.commitid, self.head_commit.commitid
+        return compare_cache.get_many(
+            self.base_commit.repository,
+            [(base_sha, head_sha), (head_sha, base_sha)],
+            lambda: RepoProviderService().get_adapter(
+                self.user, self.base_commit.repository
+            ),
         )
 
-        async def runnable():
-            return await asyncio.gather(comparison_coro, reverse_comparison_coro)
-
-        return async_to_sync(runnable)()
-
     def flag_comparison(self, flag_name):
         return FlagComparison(self, flag_name)
 
@@ -966,18 +1563,12 @@ class ComparisonReport(object):
 
     @cached_property
     def files(self) -> List[ImpactedFile]:
-        if not self.commit_comparison.report_storage_path:
-            return []
-
-        comparison_data = self._fetch_raw_comparison_data()
-        return [
-            ImpactedFile.create(**data) for data in comparison_data.get("files", [])
-        ]
+        return [self._impacted_file_at(index) for index in range(len(self._raw_files))]
 
     def impacted_file(self, path: str) -> Optional[ImpactedFile]:
-        for file in self.files:
-            if file.head_name == path:
-                return file
+        index = self._head_name_index.get(path)
+        if index is not None:
+            return self._impacted_file_at(index)
 
     @cached_property
     def impacted_files(self) -> List[ImpactedFile]:
@@ -985,11 +1576,76 @@ class ComparisonReport(object):
 
     @cached_property
     def impacted_files_with_unintended_changes(self) -> List[ImpactedFile]:
-        return [file for file in self.files if file.has_changes]
+        return [self._impacted_file_at(index) for index in self._unintended_indexes]
 
     @cached_property
     def impacted_files_with_direct_changes(self) -> List[ImpactedFile]:
-        return [file for file in self.files if file.has_diff]
+        return [self._impacted_file_at(index) for index in self._direct_indexes]
+
+    @property
+    def impacted_files_count(self) -> int:
+        return len(self._raw_files)
+
+    @property
+    def direct_changed_files_count(self) -> int:
+        return len(self._direct_indexes)
+
+    @property
+    def indirect_changed_files_count(self) -> int:
+        return len(self._unintended_indexes)
+
+    @cached_property
+    def _raw_files(self) -> List[dict]:
+        """
+        The per-file entries of the raw comparison data. These are only turned
+        into `ImpactedFile`s on demand (see `_impacted_file_at`).
+        """
+        if not self.commit_comparison.report_storage_path:
+            return []
+        return self._fetch_raw_comparison_data().get("files", [])
+
+    @cached_property
+    def _decoded_files(self) -> dict:
+        return {}
+
+    def _impacted_file_at(self, index: int) -> ImpactedFile:
+        impacted_file = self._decoded_files.get(index)
+        if impacted_file is None:
+            impacted_file = ImpactedFile.create(**self._raw_files[index])
+            self._decoded_files[index] = impacted_file
+        return impacted_file
+
+    @cached_property
+    def _head_name_index(self) -> dict:
+        """
+        Maps each file's `head_name` to its position in `_raw_files`. If a name
+        appears more than once the first entry wins.
+        """
+        index = {}
+        for position, data in enumerate(self._raw_files):
+            index.setdefault(data.get("head_name"), position)
+        return index
+
+    @cached_property
+    def _direct_indexes(self) -> List[int]:
+        # same as `ImpactedFile.has_diff` but on the raw data
+        return [
+            index
+            for index, data in enumerate(self._raw_files)
+            if data.get("added_diff_coverage")
+            or data.get("removed_diff_coverage")
+            or data.get("file_was_added_by_diff")
+            or data.get("file_was_removed_by_diff")
+        ]
+
+    @cached_property
+    def _unintended_indexes(self) -> List[int]:
+        # same as `ImpactedFile.has_changes` but on the raw data
+        return [
+            index
+            for index, data in enumerate(self._raw_files)
+            if data.get("unexpected_line_changes")
+        ]
 
     def _fetch_raw_comparison_data(self) -> dict:
         """
@@ -1016,6 +1672,7 @@ class PullRequestComparison(Comparison):
 
     def __init__(self, user, pull):
         self.pull = pull
+        self._pseudo_diff_applied = False
         super().__init__(
             user=user,
             # these are lazy loaded in the property methods below
@@ -1067,13 +1724,18 @@ class PullRequestComparison(Comparison):
                 f"Found {len(changes) if changes else 0} files with changes in cache.",
                 extra=dict(repoid=self.pull.repository.repoid, pullid=self.pull.pullid),
             )
-            return changes
         except OSError as e:
+            changes = None
             log.warning(
                 f"Error connecting to redis: {e}",
                 extra=dict(repoid=self.pull.repository.repoid, pullid=self.pull.pullid),
             )
 
+        if changes is None:
+            # the cache only lasts a day, the stored changes don't expire
+            changes = self._stored_files_with_changes()
+        return changes
+
     def _set_files_with_changes_in_cache(self, files_with_changes):
         redis.set(
             self._files_with_changes_hash_key,
@@ -1092,26 +1754,16 @@ class PullRequestComparison(Comparison):
         'files_with_changes', for future performance improvements.
         """
         files_with_changes = []
+        file_changes = []
         for file_comparison in super().files:
             if file_comparison.change_summary:
                 files_with_changes.append(file_comparison.name["head"])
+            entry = file_change_entry(file_comparison)
+            if entry is not None:
+                file_changes.append(entry)
             yield file_comparison
         self._set_files_with_changes_in_cache(files_with_changes)
-
-    def get_file_comparison(self, file_name, with_src=False, bypass_max_diff=False):
-        """
-        Overrides the 'get_file_comparison' method to set the "should_search_for_changes"
-        field.
-        """
-        file_comparison = super().get_file_comparison(
-            file_name, with_src=with_src, bypass_max_diff=bypass_max_diff
-        )
-        file_comparison.should_search_for_changes = (
-            file_name in self._files_with_changes
-            if self._files_with_changes is not None
-            else None
-        )
-        return file_comparison
+        self._store_file_changes(file_changes)
 
     @cached_property
     def is_pseudo_comparison(self):
@@ -1149,9 +1801,11 @@ class PullRequestComparison(Comparison):
         Returns the diff between the 'self.pull.compared_to' field and the
         'self.pull.base' field.
         """
-        adapter = RepoProviderService().get_adapter(self.user, self.pull.repository)
-        return async_to_sync(adapter.get_compare)(
-            self.pull.compared_to, self.pull.base
+        return compare_cache.get(
+            self.pull.repository,
+            self.pull.compared_to,
+            self.pull.base,
+            lambda: RepoProviderService().get_adapter(self.user, self.pull.repository),
         )["diff"]
 
     @cached_property
@@ -1182,8 +1836,23 @@ class PullRequestComparison(Comparison):
                 )
         return False
 
+    @property
+    def _file_changes_kind(self) -> str:
+        if self._pseudo_diff_applied:
+            return "pull-offsets"
+        return "pull"
+
     def update_base_report_with_pseudo_diff(self):
         self.base_report.shift_lines_by_diff(self.pseudo_diff, forward=True)
+        self._pseudo_diff_applied = True
+        # whatever was read before doesn't match the shifted base report
+        for name in (
+            "file_changes",
+            "stored_file_changes",
+            "_stored_file_changes_version",
+            "_files_with_changes",
+        ):
+            self.__dict__.pop(name, None)
 
 
 class CommitComparisonService:
@@ -1,5 +1,6 @@
 import re
 from collections import defaultdict
+from collections.abc import Sequence
 from dataclasses import dataclass
 from functools import cached_property
 from typing import Iterable, List, Optional, Union
@@ -141,18 +142,162 @@ def dashboard_commit_file_url(
     return f"{settings.CODECOV_DASHBOARD_URL}/{service}/{owner}/{repo}/commit/{commit_sha}/{commit_path}"
 
 
+@dataclass
+class _IndexedDir:
+    totals: ReportTotals
+    # full path of each child -> whether it's a directory (in report order)
+    children: dict[str, bool]
+
+
+def _summary_totals(totals: Union[ReportTotals, list]) -> ReportTotals:
+    if isinstance(totals, ReportTotals):
+        return totals
+    return ReportTotals(*totals)
+
+
+class DirectoryTotalsIndex:
+    """
+    Index of the aggregated totals of every directory in a report.  It's built
+    in a single pass over the report files so that the contents of any
+    directory can be listed with O(children) work.
+    """
+
+    def __init__(self, files: Iterable[tuple[str, ReportTotals]]):
+        self._files = {}
+        self._dirs = {"": self._new_dir()}
+
+        for full_path, totals in files:
+            self._files[full_path] = totals
+
+            parent = self._dirs[""]
+            self._add_totals(parent, totals)
+
+            *dir_names, _ = full_path.split("/")
+            dir_path = None
+            for name in dir_names:
+                dir_path = name if dir_path is None else f"{dir_path}/{name}"
+                parent.children[dir_path] = True
+                if dir_path not in self._dirs:
+                    self._dirs[dir_path] = self._new_dir()
+                parent = self._dirs[dir_path]
+                self._add_totals(parent, totals)
+
+            parent.children[full_path] = False
+
+    @classmethod
+    def from_report(cls, report: Report) -> "DirectoryTotalsIndex":
+        # the file summaries of the report already have the totals of every file,
+        # getting them from the files themselves would decode all the chunks
+        summaries = getattr(report, "_files", None)
+        if summaries is None:
+            return cls((path, report.get(path).totals) for path in report.files)
+        return cls(
+            (path, _summary_totals(summaries[path].file_totals))
+            for path in report.files
+        )
+
+    def _new_dir(self) -> _IndexedDir:
+        return _IndexedDir(totals=ReportTotals.default_totals(), children={})
+
+    def _add_totals(self, directory: _IndexedDir, totals: ReportTotals):
+        directory.totals.lines += totals.lines or 0
+        directory.totals.hits += totals.hits or 0
+        directory.totals.partials += totals.partials or 0
+        directory.totals.misses += totals.misses or 0
+
+    def file_totals(self, full_path: str) -> Optional[ReportTotals]:
+        return self._files.get(full_path)
+
+    def directory(self, full_path: str) -> Optional[Dir]:
+        """
+        Returns the directory at the given path with its precomputed totals.
+        Its children are only listed when accessed.
+        """
+        indexed_dir = self._dirs.get(full_path)
+        if indexed_dir is None:
+            return None
+
+        directory = Dir(full_path=full_path, children=_IndexedChildren(self, full_path))
+        # prevent `Dir.totals` from summing all the descendants again
+        directory.totals = indexed_dir.totals
+        return directory
+
+    def children(self, full_path: str = "") -> List[Union[File, Dir]]:
+        """
+        Returns the files and directories directly under the given path.
+        """
+        indexed_dir = self._dirs.get(full_path or "")
+        if indexed_dir is None:
+            return []
+
+        return [
+            self.directory(path)
+            if is_dir
+            else File(full_path=path, totals=self._files[path])
+            for path, is_dir in indexed_dir.children.items()
+        ]
+
+
+class _IndexedChildren(Sequence):
+    """
+    Lazily computed children of a `Dir` built from a `DirectoryTotalsIndex`.
+    """
+
+    def __init__(self, index: DirectoryTotalsIndex, full_path: str):
+        self.index = index
+        self.full_path = full_path
+
+    @cached_property
+    def _children(self) -> List[Union[File, Dir]]:
+        return self.index.children(self.full_path)
+
+    def __getitem__(self, index):
+        return self._children[index]
+
+    def __len__(self) -> int:
+        return len(self._children)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Sequence) and list(self) == list(other)
+
+
+def directory_totals_index(report: Report) -> DirectoryTotalsIndex:
+    """
+    Returns the `DirectoryTotalsIndex` for the given report.  When the report was
+    built from cached report data the index is persisted alongside that data so
+    that it's only ever built once per commit report.
+    """
+    report_data = getattr(report, "report_data", None)
+    if report_data is None:
+        return DirectoryTotalsIndex.from_report(report)
+
+    index = report_data.derived.get("directory_totals_index")
+    if index is None:
+        index = DirectoryTotalsIndex.from_report(report)
+        report_data.derived["directory_totals_index"] = index
+    return index
+
+
 class ReportPaths:
     """
     Contains methods for getting path information out of a single report.
+
+    When a `DirectoryTotalsIndex` is given, totals are read from the index instead
+    of being computed from the report.
     """
 
     def __init__(
-        self, report: Report, path: PrefixedPath = None, search_term: str = None
+        self,
+        report: Report,
+        path: PrefixedPath = None,
+        search_term: str = None,
+        index: Optional[DirectoryTotalsIndex] = None,
     ):
         self.report = report
         self.prefix = path or ""
+        self.index = index
 
-        self._paths = [
+        self._paths = self._unfiltered_paths = [
             PrefixedPath(full_path=full_path, prefix=self.prefix)
             for full_path in report.files
             if is_subpath(full_path, self.prefix)
@@ -180,12 +325,18 @@ class ReportPaths:
         """
         Return a single directory (specified by `path`) of mixed file/directory results.
         """
+        if self.index is not None and len(self.paths) == len(self._unfiltered_paths):
+            return self.index.children(self.prefix)
         return self._single_directory_recursive(self.paths)
 
     def _totals(self, path: PrefixedPath) -> ReportTotals:
         """
         Returns the report totals for a given prefixed path.
         """
+        if self.index is not None:
+            totals = self.index.file_totals(path.full_path)
+            if totals is not None:
+                return totals
         return self.report.get(path.full_path).totals
 
     def _single_directory_recursive(
@@ -1,7 +1,15 @@
-from redis import Redis
+import os
+import threading
+from functools import lru_cache
+
+from redis import BlockingConnectionPool, Redis
+from shared.metrics import metrics
 
 from utils.config import get_config
 
+# sample rate for the pool usage gauge, which is otherwise sent on every command
+POOL_METRICS_SAMPLE_RATE = 0.1
+
 
 def get_redis_url() -> str:
     url = get_config("services", "redis_url")
@@ -12,10 +20,71 @@ def get_redis_url() -> str:
     return f"redis://{hostname}:{port}"
 
 
+def get_redis_pool_options() -> dict:
+    return dict(
+        max_connections=get_config(
+            "services", "redis_pool", "max_connections", default=50
+        ),
+        # how long to wait for a free connection when the pool is exhausted
+        timeout=get_config("services", "redis_pool", "timeout", default=5),
+        # the socket options default to those of `Redis.from_url`, i.e. no
+        # timeouts and no health checks
+        socket_timeout=get_config("services", "redis_pool", "socket_timeout"),
+        socket_connect_timeout=get_config(
+            "services", "redis_pool", "socket_connect_timeout"
+        ),
+        health_check_interval=get_config(
+            "services", "redis_pool", "health_check_interval", default=0
+        ),
+    )
+
+
 def get_redis_connection() -> Redis:
     url = get_redis_url()
     return _get_redis_instance_from_url(url)
 
 
 def _get_redis_instance_from_url(url):
-    return Redis.from_url(url)
+    return _pooled_redis_instance(url, os.getpid())
+
+
+@lru_cache(maxsize=None)
+def _pooled_redis_instance(url, pid):
+    """
+    One client (and connection pool) per url and process. The pid is part of
+    the cache key so that forked workers never share sockets with their parent.
+    """
+    pool = InstrumentedConnectionPool.from_url(url, **get_redis_pool_options())
+    return Redis(connection_pool=pool)
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """
+    A `BlockingConnectionPool` that reports how many of its connections are in
+    use, and how often a caller finds it exhausted and has to wait.
+    """
+
+    def reset(self):
+        super().reset()
+        self._usage_lock = threading.Lock()
+        self.in_use = 0
+
+    def get_connection(self, command_name, *keys, **options):
+        # the pid check may reset the pool (and the counter) after a fork
+        self._checkpid()
+        if self.in_use >= self.max_connections:
+            metrics.incr("services.redis.pool.exhausted")
+        connection = super().get_connection(command_name, *keys, **options)
+        with self._usage_lock:
+            self.in_use += 1
+            in_use = self.in_use
+        metrics.gauge(
+            "services.redis.pool.in_use", in_use, rate=POOL_METRICS_SAMPLE_RATE
+        )
+        return connection
+
+    def release(self, connection):
+        if connection.pid == self.pid:
+            with self._usage_lock:
+                self.in_use = max(self.in_use - 1, 0)
+        super().release(connection)
@@ -1,10 +1,19 @@
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import json
 import logging
+import threading
+import time
 from os import getenv
-from typing import Callable, Dict
+from typing import Callable, Dict, Hashable
 
 from django.conf import settings
 from shared.encryption.token import encode_token
+from shared.metrics import metrics
 from shared.torngit import get
+from shared.torngit.base import TorngitBaseAdapter
 
 from codecov.db import sync_to_async
 from codecov_auth.models import Owner, Service
@@ -58,7 +67,7 @@ def get_generic_adapter_params(owner: Owner, service, use_ssl=False, token=None)
 
     if token is None:
         if owner is not None and owner.oauth_token is not None:
-            token = encryptor.decrypt_token(owner.oauth_token)
+            token = dict(_decrypt_token(owner.oauth_token))
             token["username"] = owner.username
         else:
             token = {"key": getattr(settings, f"{service.upper()}_BOT_KEY")}
@@ -74,6 +83,13 @@ def get_generic_adapter_params(owner: Owner, service, use_ssl=False, token=None)
     )
 
 
+@functools.lru_cache(maxsize=1024)
+def _decrypt_token(oauth_token: str) -> Dict:
+    # keyed on the encrypted token so a refreshed token is decrypted again.
+    # Callers must copy the result before modifying it
+    return encryptor.decrypt_token(oauth_token)
+
+
 def get_provider(service, adapter_params):
     provider = get(service, **adapter_params)
     if provider:
@@ -82,6 +98,135 @@ def get_provider(service, adapter_params):
         raise TorngitInitializationFailed()
 
 
+# read-only provider calls that are shared by identical concurrent callers
+COALESCED_METHODS = frozenset(
+    (
+        "get_authenticated",
+        "get_branches",
+        "get_commit",
+        "get_commit_diff",
+        "get_compare",
+        "get_pull_request",
+        "get_repository",
+        "get_source",
+        "list_files",
+    )
+)
+
+
+class ProviderCallTracker:
+    """
+    Instruments the provider calls made through an adapter: reports their
+    latency and how many are in flight per method, and coalesces identical
+    in-flight calls of the `COALESCED_METHODS` (i.e. the same `get_source` for
+    the same path and sha) so that only one of them hits the provider.
+
+    Calls are usually made from their own event loop (through `async_to_sync`)
+    so the shared calls are tracked with thread-safe futures.  Calls are only
+    shared between adapters built from the same credentials and parameters.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._in_flight_counts = {}
+
+    def instrument(self, adapter: TorngitBaseAdapter, service: str, key: Hashable):
+        for name, attr in inspect.getmembers(type(adapter)):
+            if not name.startswith("_") and inspect.iscoroutinefunction(attr):
+                setattr(adapter, name, self._wrap(adapter, service, key, name))
+
+    def _wrap(
+        self,
+        adapter: TorngitBaseAdapter,
+        service: str,
+        adapter_key: Hashable,
+        name: str,
+    ):
+        async def wrapper(*args, **kwargs):
+            # resolved on every call so that patching the class still works
+            method = getattr(type(adapter), name)
+            if hasattr(method, "__get__"):
+                method = method.__get__(adapter, type(adapter))
+            metric = f"services.repo_providers.{service}.{name}"
+
+            if name not in COALESCED_METHODS:
+                return await self._call(metric, method, args, kwargs)
+
+            key = (adapter_key, name, repr(args), repr(sorted(kwargs.items())))
+            with self._lock:
+                future = self._in_flight.get(key)
+                leader = future is None
+                if leader:
+                    future = concurrent.futures.Future()
+                    self._in_flight[key] = future
+
+            if not leader:
+                metrics.incr(f"{metric}.coalesced")
+                return await asyncio.wrap_future(future)
+
+            try:
+                result = await self._call(metric, method, args, kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+
+        return wrapper
+
+    async def _call(self, metric: str, method, args, kwargs):
+        with self._lock:
+            in_flight = self._in_flight_counts.get(metric, 0) + 1
+            self._in_flight_counts[metric] = in_flight
+        metrics.gauge(f"{metric}.in_flight", in_flight)
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            metrics.timing(f"{metric}.duration", (time.perf_counter() - start) * 1000)
+            with self._lock:
+                self._in_flight_counts[metric] -= 1
+
+
+provider_call_tracker = ProviderCallTracker()
+
+
+def _adapter_key(service, owner: Owner, use_ssl, token, params: Dict) -> tuple:
+    # everything an adapter is built from, including the encrypted token
+    return (
+        service,
+        owner.ownerid if owner is not None else None,
+        owner.username if owner is not None else None,
+        owner.oauth_token if owner is not None else None,
+        use_ssl,
+        json.dumps(token, sort_keys=True, default=str),
+        json.dumps(params, sort_keys=True, default=str),
+    )
+
+
+def get_instrumented_provider(
+    service, owner: Owner, params: Dict, use_ssl=False, token=None
+) -> TorngitBaseAdapter:
+    """
+    An instrumented adapter for the given service and repo/owner params.  A new
+    adapter is built every time since adapters hold on to the token state of
+    the owner they were built for and aren't safe to share between threads,
+    only decrypting the token is cached.
+    """
+    generic_adapter_params = get_generic_adapter_params(owner, service, use_ssl, token)
+    provider = get_provider(service, {**generic_adapter_params, **params})
+    if isinstance(provider, TorngitBaseAdapter):
+        provider_call_tracker.instrument(
+            provider, service, _adapter_key(service, owner, use_ssl, token, params)
+        )
+    return provider
+
+
 class RepoProviderService(object):
     def get_adapter(self, owner: Owner, repo: Repository, use_ssl=False, token=None):
         """
@@ -92,9 +237,6 @@ class RepoProviderService(object):
         :return:
         :raises: TorngitInitializationFailed
         """
-        generic_adapter_params = get_generic_adapter_params(
-            owner, repo.author.service, use_ssl, token
-        )
         owner_and_repo_params = {
             "repo": {
                 "name": repo.name,
@@ -109,8 +251,12 @@ class RepoProviderService(object):
             },
         }
 
-        return get_provider(
-            repo.author.service, {**generic_adapter_params, **owner_and_repo_params}
+        return get_instrumented_provider(
+            repo.author.service,
+            owner,
+            owner_and_repo_params,
+            use_ssl=use_ssl,
+            token=token,
         )
 
     def get_by_name(self, owner, repo_name, repo_owner_username, repo_owner_service):
@@ -124,11 +270,10 @@ class RepoProviderService(object):
         :return:
         :raises: TorngitInitializationFailed
         """
-        generic_adapter_params = get_generic_adapter_params(owner, repo_owner_service)
         owner_and_repo_params = {
             "repo": {"name": repo_name},
             "owner": {"username": repo_owner_username},
         }
-        return get_provider(
-            repo_owner_service, {**generic_adapter_params, **owner_and_repo_params}
+        return get_instrumented_provider(
+            repo_owner_service, owner, owner_and_repo_params
         )
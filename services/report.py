@@ -1,11 +1,19 @@
-from typing import Optional
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from copy import copy
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Hashable, Optional, Union
 
 from django.conf import settings
-from django.db.models import Prefetch, Q
+from django.db.models import Prefetch, QuerySet
 from django.utils.functional import cached_property
 from shared.helpers.flag import Flag
+from shared.metrics import metrics
 from shared.reports.readonly import ReadOnlyReport as SharedReadOnlyReport
-from shared.reports.resources import Report
+from shared.reports.resources import END_OF_CHUNK, Report
 from shared.reports.types import ReportFileSummary, ReportTotals
 from shared.utils.sessions import Session, SessionType
 
@@ -16,6 +24,9 @@ from utils.config import RUN_ENV
 
 
 class ReportMixin:
+    # the (cached) raw data this report was built from, if any
+    report_data = None
+
     def file_reports(self):
         for f in self.files:
             yield self.get(f)
@@ -54,12 +65,209 @@ def build_report(chunks, files, sessions, totals, report_class=None):
     )
 
 
-def build_report_from_commit(commit: Commit, report_class=None):
+class ChunksIndex:
+    """
+    Index of the chunk boundaries in a `chunks.txt` buffer.  The buffer can be
+    either the raw `bytes` downloaded from storage or an already decoded `str`.
+    Only the chunks that are accessed get decoded.
+    """
+
+    def __init__(self, buffer: Union[bytes, str]):
+        self.buffer = buffer
+
+        separator = END_OF_CHUNK
+        if not isinstance(buffer, str):
+            separator = separator.encode()
+
+        # flattened (start, end) offsets of each chunk
+        self._offsets = array("Q")
+        start = 0
+        while True:
+            end = buffer.find(separator, start)
+            if end == -1:
+                self._offsets.extend((start, len(buffer)))
+                break
+            self._offsets.extend((start, end))
+            start = end + len(separator)
+
+    def __len__(self) -> int:
+        return len(self._offsets) // 2
+
+    def chunk(self, index: int) -> str:
+        start, end = self._offsets[2 * index], self._offsets[2 * index + 1]
+        if isinstance(self.buffer, str):
+            return self.buffer[start:end]
+        return str(memoryview(self.buffer)[start:end], "utf-8")
+
+    def text(self) -> str:
+        if isinstance(self.buffer, str):
+            return self.buffer
+        return self.buffer.decode()
+
+
+class LazyChunks(Sequence):
+    """
+    List-like view over a `ChunksIndex` that can be passed to a report in place
+    of the usual list of chunks.  Chunks are decoded on first access and can be
+    replaced (the report does so when binding `ReportFile`s) without affecting
+    the underlying (shared) index.
+    """
+
+    def __init__(self, index: ChunksIndex):
+        self.index = index
+        self._chunks = {}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _normalize_index(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("chunk index out of range")
+        return index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        index = self._normalize_index(index)
+        if index not in self._chunks:
+            self._chunks[index] = self.index.chunk(index)
+        return self._chunks[index]
+
+    def __setitem__(self, index: int, value):
+        self._chunks[self._normalize_index(index)] = value
+
+
+@dataclass
+class CachedReportData:
+    """
+    The raw data needed to build a report for a given commit.
+    """
+
+    chunks: ChunksIndex
+    files: dict
+    sessions: dict
+    totals: Optional[ReportTotals]
+
+    # data derived from the report (i.e. indexes) that is expensive to compute
+    # and should live as long as the report data itself
+    derived: dict = field(default_factory=dict)
+
+    # rough estimate of the memory used per file summary and session
+    entry_overhead = 256
+
+    @cached_property
+    def size(self) -> int:
+        """
+        Approximate size of this data in bytes.  The chunks dominate so we
+        only estimate the rest.
+        """
+        return len(self.chunks.buffer) + self.entry_overhead * (
+            len(self.files) + len(self.sessions)
+        )
+
+
+class ReportCache:
+    """
+    Process-wide LRU cache of the raw data needed to build a commit report.
+    Entries are keyed by `(repoid, commitid, updated_at)` so that any new
+    upload processed by the worker (which bumps `updated_at`) invalidates the
+    cached entry.
+
+    We cache the raw data instead of `Report` instances since callers mutate
+    reports in place (i.e. `apply_diff` or `shift_lines_by_diff`).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedReportData]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None:
+            metrics.incr("services.report.cache.miss")
+        else:
+            metrics.incr("services.report.cache.hit")
+        return entry
+
+    def set(self, key: Hashable, entry: CachedReportData):
+        if entry.size > self.max_bytes:
+            return
+
+        with self._lock:
+            existing = self._entries.pop(key, None)
+            if existing is not None:
+                self.current_bytes -= existing.size
+            self._entries[key] = entry
+            self.current_bytes += entry.size
+
+            evicted = 0
+            while self.current_bytes > self.max_bytes:
+                _, oldest = self._entries.popitem(last=False)
+                self.current_bytes -= oldest.size
+                evicted += 1
+
+        if evicted:
+            metrics.incr("services.report.cache.eviction", evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+report_cache = ReportCache(max_bytes=settings.REPORT_CACHE_MAX_BYTES)
+
+
+def build_report_from_commit(
+    commit: Commit, report_class=None, lazy_chunks: bool = False
+):
     """
     Builds a `shared.reports.resources.Report` from a given commit.
 
     Chunks are fetched from archive storage and the rest of the data is sourced
-    from various `reports_*` tables in the database.
+    from various `reports_*` tables in the database.  The fetched data is kept
+    in the process-wide `report_cache` so that subsequent builds for the same
+    (unchanged) commit report do not hit storage again.
+
+    With `lazy_chunks` the chunks are kept as raw bytes and only the chunks of
+    the files that are actually accessed get decoded.  This is preferable for
+    callers that only need file-level totals or the lines of a few files.
+    """
+    data = fetch_report_data(commit, lazy_chunks=lazy_chunks)
+    if data is None:
+        return None
+
+    if lazy_chunks:
+        chunks = LazyChunks(data.chunks)
+    else:
+        chunks = data.chunks.text()
+
+    report = build_report(
+        chunks,
+        dict(data.files),
+        dict(data.sessions),
+        copy(data.totals),
+        report_class=report_class,
+    )
+    report.report_data = data
+    return report
+
+
+def fetch_report_data(
+    commit: Commit, lazy_chunks: bool = False
+) -> Optional[CachedReportData]:
+    """
+    Fetch the raw data needed to build a report for the given commit, either
+    from the `report_cache` or from the database and archive storage.
     """
 
     # TODO: this can be removed once confirmed working well on prod
@@ -72,6 +280,15 @@ def build_report_from_commit(commit: Commit, report_class=None):
 
     commit_report = fetch_commit_report(commit)
     if commit_report and new_report_builder_enabled:
+        cache_key = (
+            commit.repository_id,
+            commit.commitid,
+            _report_updated_at(commit_report),
+        )
+        data = report_cache.get(cache_key)
+        if data is not None:
+            return data
+
         files = build_files(commit_report)
         sessions = build_sessions(commit_report)
         try:
@@ -79,6 +296,11 @@ def build_report_from_commit(commit: Commit, report_class=None):
         except CommitReport.reportleveltotals.RelatedObjectDoesNotExist:
             totals = None
     else:
+        cache_key = (commit.repository_id, commit.commitid, commit.updatestamp)
+        data = report_cache.get(cache_key)
+        if data is not None:
+            return data
+
         if not commit.report:
             return None
 
@@ -86,9 +308,28 @@ def build_report_from_commit(commit: Commit, report_class=None):
         sessions = commit.report["sessions"]
         totals = commit.totals
 
-    chunks = ArchiveService(commit.repository).read_chunks(commit.commitid)
+    archive_service = ArchiveService(commit.repository)
+    if lazy_chunks:
+        chunks = archive_service.read_chunks_buffer(commit.commitid)
+    else:
+        chunks = archive_service.read_chunks(commit.commitid)
+
+    data = CachedReportData(
+        chunks=ChunksIndex(chunks), files=files, sessions=sessions, totals=totals
+    )
+    report_cache.set(cache_key, data)
+    return data
+
 
-    return build_report(chunks, files, sessions, totals, report_class=report_class)
+def _report_updated_at(commit_report: CommitReport) -> datetime:
+    """
+    `ReportDetails` is updated by the worker every time a new upload is processed
+    so it's the best proxy we have for when the report last changed.
+    """
+    try:
+        return max(commit_report.updated_at, commit_report.reportdetails.updated_at)
+    except CommitReport.reportdetails.RelatedObjectDoesNotExist:
+        return commit_report.updated_at
 
 
 def fetch_commit_report(commit: Commit) -> Optional[CommitReport]:
@@ -100,9 +341,7 @@ def fetch_commit_report(commit: Commit) -> Optional[CommitReport]:
         commit.reports.prefetch_related(
             Prefetch(
                 "sessions",
-                queryset=ReportSession.objects.prefetch_related("flags").select_related(
-                    "uploadleveltotals"
-                ),
+                queryset=with_session_relations(ReportSession.objects.all()),
             ),
         )
         .select_related("reportdetails", "reportleveltotals")
@@ -110,6 +349,25 @@ def fetch_commit_report(commit: Commit) -> Optional[CommitReport]:
     )
 
 
+def with_session_relations(uploads: QuerySet) -> QuerySet[ReportSession]:
+    """
+    Attach everything `build_session` reads to the given uploads: the totals are
+    joined in and the flag memberships are loaded in a single extra query, so
+    hydrating any number of uploads takes a fixed number of queries.
+    """
+    return uploads.select_related("uploadleveltotals").prefetch_related("flags")
+
+
+def fetch_uploads(commit_report: CommitReport) -> list[ReportSession]:
+    """
+    All the uploads of the given report along with their totals and flags.
+    Reuses the uploads prefetched by `fetch_commit_report` when available.
+    """
+    if "sessions" in getattr(commit_report, "_prefetched_objects_cache", {}):
+        return list(commit_report.sessions.all())
+    return list(with_session_relations(commit_report.sessions.all()))
+
+
 def build_totals(totals: AbstractTotals) -> ReportTotals:
     """
     Build a `shared.reports.types.ReportTotals` instance from one of the
@@ -157,6 +415,10 @@ def build_session(upload: ReportSession) -> Session:
     )
 
 
+# upload states that contribute to the report
+SESSION_STATES = ("complete", "processed")
+
+
 def build_sessions(commit_report: CommitReport) -> dict[int, Session]:
     """
     Build mapping of report number -> session that can be passed to the report class.
@@ -168,9 +430,11 @@ def build_sessions(commit_report: CommitReport) -> dict[int, Session]:
     carryforward_sessions = {}
     uploaded_flags = set()
 
-    for upload in commit_report.sessions.filter(
-        Q(state="complete") | Q(state="processed")
-    ):
+    for upload in fetch_uploads(commit_report):
+        # filtered here rather than in the query so that prefetched uploads
+        # can be used as-is
+        if upload.state not in SESSION_STATES:
+            continue
         session = build_session(upload)
         if session.session_type == SessionType.carriedforward:
             carryforward_sessions[upload.order_number] = session
@@ -3,12 +3,12 @@ import enum
 import json
 from collections import Counter
 from datetime import datetime
-from unittest.mock import PropertyMock, patch
+from unittest.mock import MagicMock, PropertyMock, patch
 
 import minio
 import pytest
 import pytz
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from shared.reports.resources import ReportFile
 from shared.reports.types import ReportTotals
 from shared.utils.merge import LineType
@@ -30,8 +30,12 @@ from services.comparison import (
     FileComparisonTraverseManager,
     ImpactedFile,
     LineComparison,
+    LineComparisons,
     MissingComparisonReport,
+    ProviderCompareCache,
     PullRequestComparison,
+    Segment,
+    file_duration_histogram,
 )
 from services.report import SerializableReport
 
@@ -458,6 +462,74 @@ class LineComparisonTests(TestCase):
         assert lc.hit_session_ids == None
 
 
+class LineComparisonsTests(TestCase):
+    def setUp(self):
+        self.lines = LineComparisons()
+        self.lines.append([1], [1], 1, 1, "first line", False)
+        self.lines.append(None, [0], None, 2, "+added line", True)
+        self.lines.append([1], None, 2, None, "-removed line", True)
+        self.lines.append([1], [0], 3, 3, "coverage changed", False)
+
+    def test_columns(self):
+        assert len(self.lines) == 4
+        assert self.lines.added == [False, True, False, False]
+        assert self.lines.removed == [False, False, True, False]
+        assert self.lines.base_coverage == [
+            LineType.hit,
+            None,
+            LineType.hit,
+            LineType.hit,
+        ]
+        assert self.lines.head_coverage == [
+            LineType.hit,
+            LineType.miss,
+            None,
+            LineType.miss,
+        ]
+        assert self.lines.changed_indexes() == [1, 2, 3]
+
+    def test_line_comparisons_created_once(self):
+        line = self.lines[1]
+        assert line is self.lines[1]
+        assert line is self.lines[-3]
+        assert line.value == "+added line"
+        assert line.number == {"base": None, "head": 2}
+        assert line.coverage == {"base": None, "head": LineType.miss}
+
+        with pytest.raises(IndexError):
+            self.lines[4]
+
+    def test_from_line_comparisons(self):
+        line_comparisons = list(self.lines)
+        lines = LineComparisons.from_line_comparisons(line_comparisons)
+        assert lines.changed_indexes() == [1, 2, 3]
+        assert lines[0] is line_comparisons[0]
+        assert lines == line_comparisons
+
+    def test_segment(self):
+        segment = Segment(self.lines, 0, 4)
+        assert segment.header == (1, 3, 1, 3)
+        assert segment.has_diff_changes is True
+        assert segment.has_unintended_changes is True
+        rows = [(line.value, line.number, line.coverage) for line in segment.lines]
+        # read from the columns, without creating `LineComparison`s
+        assert self.lines._line_comparisons == {}
+        assert rows == [(line.value, line.number, line.coverage) for line in self.lines]
+
+        segment = Segment(self.lines, 3, 4)
+        assert segment.header == (3, 1, 3, 1)
+        assert segment.has_diff_changes is False
+        assert segment.has_unintended_changes is True
+
+    def test_segment_line_hit_session_ids(self):
+        lines = LineComparisons()
+        lines.append(None, [1, "", [[0, 1], [1, 0], [2, 1]], 0, 0], 1, 1, "+", True)
+        lines.append(None, None, 2, None, "-", True)
+
+        segment = Segment(lines, 0, 2)
+        assert [line.hit_session_ids for line in segment.lines] == [[0, 2], None]
+
+
 class FileComparisonConstructorTests(TestCase):
     def test_constructor_no_keyError_if_diff_data_segements_is_missing(self):
         file_comp = FileComparison(
@@ -736,6 +808,175 @@ class ComparisonTests(TestCase):
             assert fc.head_file.name in head_report_files
             assert fc.base_file is None
 
+    @override_settings(COMPARISON_PARALLEL_PROCESSES=2, COMPARISON_PARALLEL_MIN_FILES=1)
+    def test_files_compared_in_parallel(
+        self, base_report_mock, head_report_mock, git_comparison_mock
+    ):
+        head_report_files = {f"file{i}.py": file_data for i in range(10)}
+        head_report_mock.return_value = SerializableReport(files=head_report_files)
+        base_report_mock.return_value = SerializableReport(files={})
+        git_comparison_mock.return_value = {"diff": {"files": {}}}
+
+        # the chunks are compared serially in this process rather than by a pool
+        executor = MagicMock()
+        executor.map.side_effect = map
+        with patch(
+            "services.comparison._file_comparison_pool", return_value=executor
+        ), patch("services.comparison.metrics") as mocked_metrics:
+            file_comparisons = list(self.comparison.files)
+        assert [fc.head_file.name for fc in file_comparisons] == list(head_report_files)
+
+        # a few chunks per worker
+        (_, chunks), _ = executor.map.call_args
+        assert [len(chunk) for chunk in chunks] == [2, 2, 2, 2, 2]
+
+        assert (
+            sum(
+                call.args[1]
+                for call in mocked_metrics.incr.call_args_list
+                if call.args[0].startswith("services.comparison.file_duration.")
+            )
+            == 10
+        )
+        for file_comparison in file_comparisons:
+            # computed from the chunks up front
+            assert "_calculated_changes_and_lines" in file_comparison.__dict__
+            assert file_comparison.duration is not None
+
+            serial = self.comparison.get_file_comparison(file_comparison.head_file.name)
+            assert file_comparison.change_summary == serial.change_summary
+            assert file_comparison.lines.head_ln == serial.lines.head_ln
+            assert file_comparison.lines.head_coverage == serial.lines.head_coverage
+
+    @patch("services.archive.ArchiveService.write_file")
+    @patch("services.archive.ArchiveService.read_file")
+    def test_file_changes_computed_and_stored(
+        self,
+        read_file_mock,
+        write_file_mock,
+        base_report_mock,
+        head_report_mock,
+        git_comparison_mock,
+    ):
+        read_file_mock.side_effect = Exception("not found")
+        head_report_mock.return_value = SerializableReport(
+            files={"file1.py": file_data, "file2.py": file_data}
+        )
+        base_report_mock.return_value = SerializableReport(files={})
+        git_comparison_mock.return_value = {
+            "diff": {
+                "files": {
+                    "file1.py": {
+                        "type": "modified",
+                        "stats": {"added": 1, "removed": 0},
+                    }
+                }
+            }
+        }
+
+        file_changes = self.comparison.file_changes
+        assert [entry["name"] for entry in file_changes] == [
+            {"base": None, "head": "file1.py"}
+        ]
+        assert file_changes[0]["has_diff"] is True
+
+        version = {
+            "kind": "commits",
+            "base_updatestamp": self.comparison.base_commit.updatestamp.isoformat(),
+            "head_updatestamp": self.comparison.head_commit.updatestamp.isoformat(),
+        }
+        (path, data), (version_path, version_data) = [
+            call.args for call in write_file_mock.call_args_list
+        ]
+        assert path == self.comparison._file_changes_path
+        assert json.loads(data) == {"version": version, "files": file_changes}
+        assert version_path == self.comparison._file_changes_version_path
+        assert json.loads(version_data) == version
+
+    @patch("services.archive.ArchiveService.write_file")
+    @patch("services.archive.ArchiveService.read_file")
+    def test_file_changes_served_from_storage(
+        self,
+        read_file_mock,
+        write_file_mock,
+        base_report_mock,
+        head_report_mock,
+        git_comparison_mock,
+    ):
+        stored = [
+            {
+                "name": {"base": "file1.py", "head": "file1.py"},
+                "has_diff": False,
+                "change_summary": {"hits": -1, "misses": 1},
+                "segments": [[1, 4, 1, 4]],
+            }
+        ]
+        version = self.comparison._file_changes_version
+        read_file_mock.side_effect = lambda path: json.dumps(
+            version
+            if path == self.comparison._file_changes_version_path
+            else {"version": version, "files": stored}
+        )
+
+        assert self.comparison.file_changes == stored
+        head_report_mock.assert_not_called()
+        base_report_mock.assert_not_called()
+        write_file_mock.assert_not_called()
+
+    @patch("services.archive.ArchiveService.read_file")
+    def test_get_file_comparison_uses_stored_file_changes(
+        self, read_file_mock, base_report_mock, head_report_mock, git_comparison_mock
+    ):
+        stored = [
+            {
+                "name": {"base": "file1.py", "head": "file1.py"},
+                "has_diff": False,
+                "change_summary": {"hits": -1, "misses": 1},
+                "segments": [[1, 4, 1, 4]],
+            }
+        ]
+        version = self.comparison._file_changes_version
+        read_file_mock.side_effect = lambda path: json.dumps(
+            version
+            if path == self.comparison._file_changes_version_path
+            else {"version": version, "files": stored}
+        )
+        head_report_mock.return_value = SerializableReport(
+            files={"file1.py": file_data, "file2.py": file_data}
+        )
+        base_report_mock.return_value = SerializableReport(files={})
+        git_comparison_mock.return_value = {"diff": {"files": {}}}
+
+        assert self.comparison.get_file_comparison("file1.py").needs_traversal
+        assert not self.comparison.get_file_comparison("file2.py").needs_traversal
+
+    @patch("services.archive.ArchiveService.read_file")
+    def test_stored_file_changes_stale(
+        self, read_file_mock, base_report_mock, head_report_mock, git_comparison_mock
+    ):
+        read_file_mock.side_effect = lambda path: json.dumps(
+            {"base_updatestamp": None, "head_updatestamp": None}
+            if path == self.comparison._file_changes_version_path
+            else {"version": self.comparison._file_changes_version, "files": []}
+        )
+        assert self.comparison.stored_file_changes is None
+        assert read_file_mock.call_count == 1
+
+    def test_file_duration_histogram(
+        self, base_report_mock, head_report_mock, git_comparison_mock
+    ):
+        file_comparisons = [
+            FileComparison(base_file=None, head_file=None) for _ in range(4)
+        ]
+        for file_comparison, duration in zip(file_comparisons, [0.0005, 0.05, 2]):
+            file_comparison.duration = duration
+
+        assert file_duration_histogram(file_comparisons) == {
+            "lt_1ms": 1,
+            "lt_100ms": 1,
+            "ge_1000ms": 1,
+        }
+
     def test_get_file_comparison_adds_in_file_from_base_report_if_exists(
         self, base_report_mock, head_report_mock, git_comparison_mock
     ):
@@ -1042,6 +1283,37 @@ class PullRequestComparisonTests(TestCase):
             ex=86400,  # 1 day in seconds
         )
 
+    @patch("services.comparison.Comparison.git_comparison", new_callable=PropertyMock)
+    @patch("services.comparison.Comparison.head_report", new_callable=PropertyMock)
+    @patch("services.comparison.Comparison.base_report", new_callable=PropertyMock)
+    @patch("redis.Redis.set")
+    @patch("redis.Redis.get")
+    @patch("services.archive.ArchiveService.write_file")
+    @patch("services.archive.ArchiveService.read_file")
+    def test_files_stores_file_changes_only_if_not_current(
+        self,
+        read_file_mock,
+        write_file_mock,
+        mocked_get,
+        mocked_set,
+        base_report_mock,
+        head_report_mock,
+        git_comparison_mock,
+    ):
+        mocked_get.return_value = json.dumps(["file1"])
+        head_report_mock.return_value = SerializableReport(files={"file1": file_data})
+        base_report_mock.return_value = SerializableReport(files={})
+        git_comparison_mock.return_value = {"diff": {"files": {}}}
+        read_file_mock.return_value = json.dumps(self.comparison._file_changes_version)
+
+        list(self.comparison.files)
+
+        # only the version was read
+        read_file_mock.assert_called_once_with(
+            self.comparison._file_changes_version_path
+        )
+        write_file_mock.assert_not_called()
+
     @patch("services.comparison.Comparison.git_comparison", new_callable=PropertyMock)
     @patch("services.comparison.Comparison.head_report", new_callable=PropertyMock)
     @patch("services.comparison.Comparison.base_report", new_callable=PropertyMock)
@@ -1260,6 +1532,42 @@ class PullRequestComparisonTests(TestCase):
         self.comparison.update_base_report_with_pseudo_diff()
         shift_lines_by_diff_mock.assert_called_once_with({"files": {}}, forward=True)
 
+    @patch(
+        "services.comparison.PullRequestComparison.pseudo_diff",
+        new_callable=PropertyMock,
+    )
+    @patch("services.comparison.Comparison.base_report", new_callable=PropertyMock)
+    @patch("services.archive.ArchiveService.read_file")
+    def test_stored_file_changes_kept_apart_from_shifted_base_report(
+        self, read_file_mock, base_report_mock, pseudo_diff_mock
+    ):
+        pseudo_diff_mock.return_value = {"files": {}}
+        base_report_mock.return_value = SerializableReport(files={})
+        read_file_mock.side_effect = lambda path: json.dumps(
+            self.comparison._file_changes_version
+            if path == self.comparison._file_changes_version_path
+            else {"version": self.comparison._file_changes_version, "files": [path]}
+        )
+
+        path = self.comparison._file_changes_path
+        assert path.endswith("/file_changes/pull.json")
+        assert self.comparison.stored_file_changes == [path]
+
+        self.comparison.update_base_report_with_pseudo_diff()
+        shifted_path = self.comparison._file_changes_path
+        assert shifted_path.endswith("/file_changes/pull-offsets.json")
+        assert self.comparison._file_changes_version["kind"] == "pull-offsets"
+        assert self.comparison.stored_file_changes == [shifted_path]
+
+        commits_comparison = Comparison(
+            user=self.comparison.user,
+            base_commit=self.comparison.base_commit,
+            head_commit=self.comparison.head_commit,
+        )
+        assert commits_comparison._file_changes_path.endswith(
+            "/file_changes/commits.json"
+        )
+
 
 @patch("services.comparison.Comparison.git_comparison", new_callable=PropertyMock)
 @patch("services.report.build_report_from_commit")
@@ -1335,6 +1643,109 @@ class ComparisonHasUnmergedBaseCommitsTests(TestCase):
         assert self.comparison.has_unmerged_base_commits is False
 
 
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def execute(self):
+        pass
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        return MagicMock()
+
+
+class ProviderCompareCacheTests(TestCase):
+    class CountingAdapter:
+        def __init__(self):
+            self.calls = []
+
+        async def get_compare(self, base, head):
+            self.calls.append((base, head))
+            return {"diff": {"files": {}}, "commits": [base, head]}
+
+    def setUp(self):
+        self.repo = RepositoryFactory()
+        self.cache = ProviderCompareCache(ttl=60, lock_timeout=1)
+        self.adapter = ProviderCompareCacheTests.CountingAdapter()
+        asyncio.set_event_loop(asyncio.new_event_loop())
+
+    def test_get_many_fetches_misses_once_and_caches_them(self):
+        fake_redis = FakeRedis()
+        with patch("services.comparison.redis", fake_redis):
+            pairs = [("base", "head"), ("head", "base")]
+            first = self.cache.get_many(self.repo, pairs, lambda: self.adapter)
+            second = self.cache.get_many(self.repo, pairs, lambda: self.adapter)
+
+        assert first == second
+        assert first[0]["commits"] == ["base", "head"]
+        assert first[1]["commits"] == ["head", "base"]
+        assert self.adapter.calls == pairs
+        assert set(fake_redis.data.keys()) == {
+            f"compare/{self.repo.repoid}/base/head",
+            f"compare/{self.repo.repoid}/head/base",
+        }
+
+    def test_get_only_fetches_missing_pairs(self):
+        fake_redis = FakeRedis()
+        with patch("services.comparison.redis", fake_redis):
+            self.cache.get(self.repo, "base", "head", lambda: self.adapter)
+            self.cache.get_many(
+                self.repo,
+                [("base", "head"), ("base", "other")],
+                lambda: self.adapter,
+            )
+
+        assert self.adapter.calls == [("base", "head"), ("base", "other")]
+
+    def test_get_ignores_undecodable_entries(self):
+        fake_redis = FakeRedis()
+        fake_redis.data[f"compare/{self.repo.repoid}/base/head"] = b"not zlib"
+        with patch("services.comparison.redis", fake_redis):
+            result = self.cache.get(self.repo, "base", "head", lambda: self.adapter)
+
+        assert result["commits"] == ["base", "head"]
+        assert self.adapter.calls == [("base", "head")]
+
+    @patch("services.comparison.redis")
+    def test_get_falls_back_to_provider_if_redis_unavailable(self, mocked_redis):
+        mocked_redis.mget.side_effect = OSError
+        mocked_redis.lock.return_value.acquire.side_effect = OSError
+        mocked_redis.pipeline.side_effect = OSError
+
+        result = self.cache.get(self.repo, "base", "head", lambda: self.adapter)
+
+        assert result["commits"] == ["base", "head"]
+        assert self.adapter.calls == [("base", "head")]
+
+    @patch("services.comparison.redis")
+    def test_get_many_fetches_without_lock_after_waiting(self, mocked_redis):
+        mocked_redis.mget.side_effect = lambda keys: [None] * len(keys)
+        mocked_redis.lock.return_value.acquire.return_value = False
+        cache = ProviderCompareCache(ttl=60, lock_timeout=30, lock_wait=2)
+
+        pairs = [("base", "head"), ("head", "base")]
+        results = cache.get_many(self.repo, pairs, lambda: self.adapter)
+
+        assert [result["commits"] for result in results] == [
+            ["base", "head"],
+            ["head", "base"],
+        ]
+        assert self.adapter.calls == pairs
+        for call in mocked_redis.lock.call_args_list:
+            assert call.kwargs["timeout"] == 30
+            assert call.kwargs["blocking_timeout"] <= 2
+        mocked_redis.lock.return_value.release.assert_not_called()
+
+
 class SegmentTests(TestCase):
     def _report_lines(self, hits):
         return [
@@ -1685,6 +2096,32 @@ class ComparisonReportTest(TestCase):
         impacted_files = self.comparison_report.impacted_files_with_direct_changes
         assert [file.head_name for file in impacted_files] == ["fileA", "fileB"]
 
+    @patch("services.archive.ArchiveService.read_file")
+    def test_impacted_file_missing(self, read_file):
+        read_file.return_value = mock_data_from_archive
+        assert self.comparison_report.impacted_file("missing") is None
+
+    @patch("services.archive.ArchiveService.read_file")
+    def test_impacted_file_only_decodes_requested_file(self, read_file):
+        read_file.return_value = mock_data_from_archive
+        impacted_file = self.comparison_report.impacted_file("fileB")
+        assert self.comparison_report._decoded_files == {1: impacted_file}
+        assert self.comparison_report.impacted_file("fileB") is impacted_file
+        assert self.comparison_report.files[1] is impacted_file
+        read_file.assert_called_once()
+
+    @patch("services.archive.ArchiveService.read_file")
+    def test_impacted_files_counts(self, read_file):
+        read_file.return_value = mocked_files_with_direct_and_indirect_changes
+        assert self.comparison_report.impacted_files_count == 3
+        assert self.comparison_report.direct_changed_files_count == 2
+        assert self.comparison_report.indirect_changed_files_count == 2
+        assert self.comparison_report._decoded_files == {}
+
+    def test_impacted_files_counts_without_storage(self):
+        assert self.comparison_report_without_storage.impacted_files_count == 0
+        assert self.comparison_report_without_storage.direct_changed_files_count == 0
+
     def test_file_has_diff(self):
         file = ImpactedFile(
             **{
@@ -9,13 +9,15 @@ from codecov_auth.tests.factories import OwnerFactory
 from core.tests.factories import CommitFactory
 from services.path import (
     Dir,
+    DirectoryTotalsIndex,
     File,
     PrefixedPath,
     ReportPaths,
     dashboard_commit_file_url,
+    directory_totals_index,
     provider_path_exists,
 )
-from services.report import SerializableReport
+from services.report import CachedReportData, ChunksIndex, SerializableReport
 
 # mock data
 
@@ -218,6 +220,84 @@ class TestReportPaths(TestCase):
         assert report_paths.paths == []
 
 
+class TestDirectoryTotalsIndex(TestCase):
+    def setUp(self):
+        files = {
+            "dir/file1.py": file_data1,
+            "dir/subdir/file2.py": file_data2,
+            "dir/subdir/dir1/file3.py": file_data3,
+            "src/ui/A/A.js": file_data3,
+        }
+        self.report = SerializableReport(files=files)
+        self.index = DirectoryTotalsIndex.from_report(self.report)
+
+    def test_directory_totals(self):
+        directory = self.index.directory("dir/subdir")
+        assert directory.lines == 20
+        assert directory.hits == 11
+        assert directory.misses == 4
+        assert directory.coverage == 55.0
+
+        root = self.index.directory("")
+        assert root.lines == 40
+        assert root.hits == 22
+
+        assert self.index.directory("unknown") is None
+
+    def test_from_report_reads_file_summaries(self):
+        with patch.object(SerializableReport, "get") as get_mock:
+            index = DirectoryTotalsIndex.from_report(self.report)
+            get_mock.assert_not_called()
+        assert index.file_totals("dir/file1.py") == totals1
+        assert index.directory("dir/subdir").lines == 20
+
+    def test_children(self):
+        assert self.index.children("dir") == [
+            File(full_path="dir/file1.py", totals=totals1),
+            Dir(
+                full_path="dir/subdir",
+                children=[
+                    File(full_path="dir/subdir/file2.py", totals=totals2),
+                    Dir(
+                        full_path="dir/subdir/dir1",
+                        children=[
+                            File(full_path="dir/subdir/dir1/file3.py", totals=totals3),
+                        ],
+                    ),
+                ],
+            ),
+        ]
+        assert self.index.children("wrong") == []
+
+    def test_report_paths_single_directory(self):
+        for path in [None, "dir", "dir/subdir", "src/ui"]:
+            with_index = ReportPaths(self.report, path=path, index=self.index)
+            without_index = ReportPaths(self.report, path=path)
+            assert with_index.single_directory() == without_index.single_directory()
+
+    def test_report_paths_full_filelist(self):
+        report_paths = ReportPaths(self.report, search_term="file", index=self.index)
+        with patch.object(SerializableReport, "get") as get_mock:
+            assert report_paths.full_filelist() == [
+                File(full_path="dir/file1.py", totals=totals1),
+                File(full_path="dir/subdir/file2.py", totals=totals2),
+                File(full_path="dir/subdir/dir1/file3.py", totals=totals3),
+            ]
+            get_mock.assert_not_called()
+
+    def test_directory_totals_index_persisted(self):
+        self.report.report_data = CachedReportData(
+            chunks=ChunksIndex(""), files={}, sessions={}, totals=None
+        )
+        index = directory_totals_index(self.report)
+        assert index is directory_totals_index(self.report)
+        assert self.report.report_data.derived["directory_totals_index"] is index
+
+    def test_directory_totals_index_not_persisted(self):
+        index = directory_totals_index(self.report)
+        assert index is not directory_totals_index(self.report)
+
+
 class TestReportPathsNested(TestCase):
     def setUp(self):
         files = {
@@ -1,9 +1,62 @@
-from services.redis_configuration import get_redis_connection
+import pytest
+
+from services.redis_configuration import (
+    InstrumentedConnectionPool,
+    _pooled_redis_instance,
+    get_redis_connection,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_pooled_instances():
+    _pooled_redis_instance.cache_clear()
+    yield
+    _pooled_redis_instance.cache_clear()
 
 
 def test_get_redis_connection(mocker):
     mocker.patch("services.redis_configuration.get_config", return_value=None)
-    mocked = mocker.patch("services.redis_configuration.Redis.from_url")
+    mocked = mocker.patch(
+        "services.redis_configuration.InstrumentedConnectionPool.from_url"
+    )
     res = get_redis_connection()
     assert res is not None
-    mocked.assert_called_with("redis://redis:6379")
+    mocked.assert_called_with(
+        "redis://redis:6379",
+        max_connections=None,
+        timeout=None,
+        socket_timeout=None,
+        socket_connect_timeout=None,
+        health_check_interval=None,
+    )
+
+
+def test_get_redis_connection_reuses_pool():
+    first, second = get_redis_connection(), get_redis_connection()
+    assert first is second
+    assert isinstance(first.connection_pool, InstrumentedConnectionPool)
+    assert first.connection_pool.max_connections == 50
+
+
+def test_get_redis_connection_new_pool_after_fork(mocker):
+    first = get_redis_connection()
+    mocker.patch("services.redis_configuration.os.getpid", return_value=-1)
+    assert get_redis_connection() is not first
+
+
+def test_pool_tracks_connections_in_use(mocker):
+    mocked_metrics = mocker.patch("services.redis_configuration.metrics")
+    pool = InstrumentedConnectionPool.from_url(
+        "redis://redis:6379", max_connections=1, timeout=0
+    )
+    mocker.patch.object(
+        pool,
+        "make_connection",
+        return_value=mocker.MagicMock(pid=pool.pid, can_read=lambda: False),
+    )
+
+    connection = pool.get_connection("GET")
+    assert pool.in_use == 1
+    pool.release(connection)
+    assert pool.in_use == 0
+    mocked_metrics.incr.assert_not_called()
@@ -1,3 +1,4 @@
+import asyncio
 import inspect
 from unittest.mock import patch
 
@@ -225,3 +226,41 @@ class TestRepoProviderService(InternalAPITest):
         user = OwnerFactory()
         adapter = RepoProviderService().get_adapter(owner=user, repo=repo)
         assert adapter.data["owner"]["service_id"] == owner.service_id
+
+    def test_get_adapter_not_shared(self):
+        owner = OwnerFactory()
+        repo = RepositoryFactory(author=owner)
+        adapter = RepoProviderService().get_adapter(owner=owner, repo=repo)
+        assert RepoProviderService().get_adapter(owner=owner, repo=repo) is not adapter
+
+    def test_identical_calls_coalesced(self):
+        calls = []
+
+        async def get_source(self, path, ref):
+            calls.append((path, ref))
+            await asyncio.sleep(0.01)
+            return {"content": f"{path}@{ref}"}
+
+        adapter, other_adapter = (
+            RepoProviderService().get_adapter(
+                owner=self.repo_gh.author, repo=self.repo_gh
+            )
+            for _ in range(2)
+        )
+
+        async def fetch():
+            return await asyncio.gather(
+                adapter.get_source("a.py", "sha"),
+                other_adapter.get_source("a.py", "sha"),
+                adapter.get_source("b.py", "sha"),
+            )
+
+        with patch.object(Github, "get_source", get_source):
+            results = asyncio.run(fetch())
+
+        assert results == [
+            {"content": "a.py@sha"},
+            {"content": "a.py@sha"},
+            {"content": "b.py@sha"},
+        ]
+        assert sorted(calls) == [("a.py", "sha"), ("b.py", "sha")]
@@ -11,7 +11,16 @@ from reports.tests.factories import (
     UploadFlagMembershipFactory,
     UploadLevelTotalsFactory,
 )
-from services.report import build_report, build_report_from_commit
+from services.report import (
+    CachedReportData,
+    ChunksIndex,
+    LazyChunks,
+    ReportCache,
+    build_report,
+    build_report_from_commit,
+    build_sessions,
+    fetch_commit_report,
+)
 
 current_file = Path(__file__)
 
@@ -324,3 +333,159 @@ class ReportServiceTest(TestCase):
             0,
             [1, 2, 1, 1, 0, "50.00000", 0, 0, 0, 0, 0, 0, 0],
         ]
+
+    @patch("services.archive.ArchiveService.read_chunks")
+    def test_build_report_from_commit_cached(self, read_chunks_mock):
+        f = open(current_file.parent / "samples" / "chunks.txt", "r")
+        read_chunks_mock.return_value = f.read()
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        report_1 = build_report_from_commit(commit)
+        report_2 = build_report_from_commit(commit)
+
+        assert read_chunks_mock.call_count == 1
+        assert report_1 is not report_2
+        assert report_1.files == report_2.files
+        assert list(report_1.totals) == list(report_2.totals)
+
+    @patch("services.archive.ArchiveService.read_chunks")
+    def test_build_report_from_commit_cache_invalidated(self, read_chunks_mock):
+        f = open(current_file.parent / "samples" / "chunks.txt", "r")
+        read_chunks_mock.return_value = f.read()
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        build_report_from_commit(commit)
+        # new upload processed by the worker
+        commit.reports.first().reportdetails.save()
+        build_report_from_commit(commit)
+
+        assert read_chunks_mock.call_count == 2
+
+    @patch("services.archive.ArchiveService.read_chunks_buffer")
+    def test_build_report_from_commit_lazy_chunks(self, read_chunks_buffer_mock):
+        f = open(current_file.parent / "samples" / "chunks.txt", "rb")
+        read_chunks_buffer_mock.return_value = f.read()
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        res = build_report_from_commit(commit, lazy_chunks=True)
+        assert isinstance(res._chunks, LazyChunks)
+        assert len(res._chunks) == 3
+        assert res._chunks._chunks == {}
+
+        file_report = res.get("tests/test_sample.py")
+        assert tuple(file_report.totals) == (0, 7, 7, 0, 0, "100", 0, 0, 0, 0, 0, 0, 0)
+        assert list(res._chunks._chunks.keys()) == [1]
+        read_chunks_buffer_mock.assert_called_with("abf6d4d")
+
+
+class BuildSessionsTest(TestCase):
+    def setUp(self):
+        self.commit = CommitWithReportFactory.create()
+        self.commit_report = self.commit.reports.first()
+        states = ("processed", "complete", "error", "uploaded")
+        for order_number, state in enumerate(states, start=2):
+            upload = UploadFactory(
+                report=self.commit_report, order_number=order_number, state=state
+            )
+            UploadLevelTotalsFactory(report_session=upload)
+            UploadFlagMembershipFactory(
+                report_session=upload,
+                flag=self.commit.repository.flags.get(flag_name="unittests"),
+            )
+
+    def test_build_sessions_fixed_queries(self):
+        # uploads (joined with their totals) + flag memberships
+        with self.assertNumQueries(2):
+            sessions = build_sessions(self.commit_report)
+        assert sorted(session.state for session in sessions.values()) == [
+            "complete",
+            "processed",
+            "processed",
+            "processed",
+        ]
+        for session in sessions.values():
+            assert session.totals is not None
+            assert session.flags
+
+    def test_build_sessions_prefetched(self):
+        commit_report = fetch_commit_report(self.commit)
+        with self.assertNumQueries(0):
+            sessions = build_sessions(commit_report)
+        assert len(sessions) == 4
+
+
+class ChunksIndexTest(TestCase):
+    def test_chunks_bytes(self):
+        index = ChunksIndex(
+            "{}\n[1]\n<<<<< end_of_chunk >>>>>\n\n<<<<< end_of_chunk >>>>>\n{}\n[ü]".encode()
+        )
+        assert len(index) == 3
+        assert index.chunk(0) == "{}\n[1]"
+        assert index.chunk(1) == ""
+        assert index.chunk(2) == "{}\n[ü]"
+
+    def test_chunks_str(self):
+        chunks = "{}\n[1]\n<<<<< end_of_chunk >>>>>\n{}\n[2]"
+        index = ChunksIndex(chunks)
+        assert len(index) == 2
+        assert index.chunk(1) == "{}\n[2]"
+        assert index.text() is chunks
+
+    def test_lazy_chunks(self):
+        chunks = LazyChunks(ChunksIndex(b"a\n<<<<< end_of_chunk >>>>>\nb"))
+        assert len(chunks) == 2
+        assert chunks[-1] == "b"
+        assert chunks[0:2] == ["a", "b"]
+        assert list(chunks) == ["a", "b"]
+
+        chunks[0] = "c"
+        assert chunks[0] == "c"
+        assert chunks.index.chunk(0) == "a"
+
+        with self.assertRaises(IndexError):
+            chunks[2]
+
+
+class ReportCacheTest(TestCase):
+    def _data(self, chunks):
+        return CachedReportData(
+            chunks=ChunksIndex(chunks), files={}, sessions={}, totals=None
+        )
+
+    def test_get_set(self):
+        cache = ReportCache(max_bytes=100)
+        assert cache.get("a") is None
+        data = self._data("x" * 10)
+        cache.set("a", data)
+        assert cache.get("a") is data
+        assert cache.current_bytes == 10
+
+    def test_evicts_least_recently_used(self):
+        cache = ReportCache(max_bytes=100)
+        cache.set("a", self._data("x" * 40))
+        cache.set("b", self._data("x" * 40))
+        cache.get("a")
+        cache.set("c", self._data("x" * 40))
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+        assert cache.current_bytes == 80
+
+    def test_skips_entries_too_large(self):
+        cache = ReportCache(max_bytes=100)
+        cache.set("a", self._data("x" * 101))
+        assert cache.get("a") is None
+        assert cache.current_bytes == 0
+
+    @patch("services.report.metrics.incr")
+    def test_metrics(self, incr_mock):
+        cache = ReportCache(max_bytes=50)
+        cache.get("a")
+        cache.set("a", self._data("x" * 40))
+        cache.get("a")
+        cache.set("b", self._data("x" * 40))
+
+        incr_mock.assert_any_call("services.report.cache.miss")
+        incr_mock.assert_any_call("services.report.cache.hit")
+        incr_mock.assert_any_call("services.report.cache.eviction", 1)
@@ -0,0 +1,90 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import fakeredis
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from codecov_auth.tests.factories import OwnerFactory
+from core.tests.factories import CommitFactory, RepositoryFactory
+from reports.models import ReportSession
+from reports.tests.factories import CommitReportFactory, UploadFactory
+from services.upload_usage import monthly_uploads_used, record_upload, upload_usage
+
+
+@override_settings(UPLOAD_USAGE_COUNTER_ENABLED=True)
+class UploadUsageCounterTests(TransactionTestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        patcher = patch(
+            "services.upload_usage.get_redis_connection", return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.owner = OwnerFactory()
+        self.repo = RepositoryFactory(author=self.owner, private=True)
+        self.report = CommitReportFactory(commit=CommitFactory(repository=self.repo))
+
+    def _upload(self, days_ago=0, **kwargs):
+        upload = UploadFactory(report=self.report, **kwargs)
+        ReportSession.objects.filter(pk=upload.pk).update(
+            created_at=timezone.now() - timedelta(days=days_ago)
+        )
+        return upload
+
+    def test_reconcile(self):
+        self._upload()
+        self._upload(days_ago=2)
+        self._upload(days_ago=40)
+        self._upload(upload_type="carriedforward")
+        public_repo = RepositoryFactory(author=self.owner, private=False)
+        UploadFactory(
+            report=CommitReportFactory(commit=CommitFactory(repository=public_repo))
+        )
+
+        assert upload_usage.count(self.owner.ownerid) is None
+        upload_usage.reconcile(self.owner.ownerid)
+
+        assert upload_usage.count(self.owner.ownerid) == 2
+        today = timezone.now().date()
+        assert self.redis.get(upload_usage.day_key(self.owner.ownerid, today)) == b"1"
+        assert self.redis.get(upload_usage.reconciled_key(self.owner.ownerid))
+
+    def test_counts_recorded_uploads(self):
+        self._upload()
+        upload_usage.reconcile(self.owner.ownerid)
+        assert upload_usage.count(self.owner.ownerid) == 1
+
+        # the counters are trusted until the next reconciliation
+        self._upload()
+        record_upload(self.repo, self.report.commit)
+        public_repo = RepositoryFactory(author=self.owner, private=False)
+        record_upload(public_repo, CommitFactory(repository=public_repo))
+        old_commit = CommitFactory(
+            repository=self.repo, timestamp=timezone.now() - timedelta(days=90)
+        )
+        record_upload(self.repo, old_commit)
+        assert upload_usage.count(self.owner.ownerid) == 2
+
+        self._upload()
+        upload_usage.reconcile(self.owner.ownerid)
+        assert upload_usage.count(self.owner.ownerid) == 3
+
+        self.redis.delete(upload_usage.reconciled_key(self.owner.ownerid))
+        assert upload_usage.count(self.owner.ownerid) is None
+
+    def test_monthly_uploads_used(self):
+        for _ in range(3):
+            self._upload()
+
+        # falls back to the database until the counters are reconciled
+        assert monthly_uploads_used(self.owner, 10) == 3
+        assert self.redis.get(upload_usage.reconciled_key(self.owner.ownerid)) is None
+
+        upload_usage.reconcile(self.owner.ownerid)
+        self._upload()
+        assert monthly_uploads_used(self.owner, 10) == 3
+        assert monthly_uploads_used(self.owner, 2) == 2
+        with override_settings(UPLOAD_USAGE_COUNTER_ENABLED=False):
+            assert monthly_uploads_used(self.owner, 10) == 4
@@ -1,5 +1,6 @@
 from unittest.mock import patch
 
+import fakeredis
 from django.contrib.auth.models import AnonymousUser
 from django.test import TransactionTestCase
 from shared.torngit.exceptions import TorngitObjectNotFoundError
@@ -11,6 +12,11 @@ from core.tests.factories import CommitFactory, RepositoryFactory
 
 class YamlServiceTest(TransactionTestCase):
     def setUp(self):
+        redis = fakeredis.FakeStrictRedis()
+        patcher = patch("services.yaml.get_redis_connection", return_value=redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
         self.org = OwnerFactory()
         self.repo = RepositoryFactory(author=self.org, private=False)
         self.commit = CommitFactory(repository=self.repo)
@@ -32,3 +38,38 @@ class YamlServiceTest(TransactionTestCase):
         )
         config = yaml.final_commit_yaml(self.commit, None)
         assert config["codecov"]["require_ci_to_pass"] is True
+
+    @patch("services.yaml.fetch_current_yaml_from_provider_via_reference")
+    def test_final_yaml_cached(self, mock_fetch_yaml):
+        mock_fetch_yaml.return_value = """
+        codecov:
+          notify:
+            require_ci_to_pass: no
+        """
+        yaml.final_commit_yaml(self.commit, None)
+        config = yaml.final_commit_yaml(self.commit, None)
+        assert config["codecov"]["require_ci_to_pass"] is False
+        assert mock_fetch_yaml.call_count == 1
+
+        # the repository yaml is part of the key
+        self.repo.yaml = {"codecov": {"require_ci_to_pass": True}}
+        self.repo.save()
+        yaml.final_commit_yaml(self.commit, None)
+        assert mock_fetch_yaml.call_count == 2
+
+    @patch("services.yaml.fetch_current_yaml_from_provider_via_reference")
+    def test_missing_yaml_cached(self, mock_fetch_yaml):
+        mock_fetch_yaml.return_value = None
+        yaml.final_commit_yaml(self.commit, None)
+        config = yaml.final_commit_yaml(self.commit, None)
+        assert config["codecov"]["require_ci_to_pass"] is True
+        assert mock_fetch_yaml.call_count == 1
+
+    @patch("services.yaml.fetch_current_yaml_from_provider_via_reference")
+    def test_provider_errors_not_cached(self, mock_fetch_yaml):
+        mock_fetch_yaml.side_effect = TorngitObjectNotFoundError(
+            response_data=404, message="not found"
+        )
+        yaml.final_commit_yaml(self.commit, None)
+        yaml.final_commit_yaml(self.commit, None)
+        assert mock_fetch_yaml.call_count == 2
@@ -0,0 +1,171 @@
+import logging
+from datetime import date, datetime, time, timedelta
+from datetime import timezone as dt_timezone
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from redis.exceptions import RedisError
+from shared.metrics import metrics
+
+from codecov_auth.models import Owner
+from reports.models import ReportSession
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+# uploads to older commits aren't counted, see `_uploads_queryset`
+COMMIT_MAX_AGE = timedelta(days=60)
+
+
+def _uploads_queryset(ownerid: int, since: datetime):
+    return ReportSession.objects.filter(
+        report__commit__repository__author_id=ownerid,
+        report__commit__repository__private=True,
+        created_at__gte=since,
+        # attempt at making the query more performant by telling the db to not
+        # check old commits, which are unlikely to have recent uploads
+        report__commit__timestamp__gte=timezone.now() - COMMIT_MAX_AGE,
+        upload_type="uploaded",
+    )
+
+
+class UploadUsageCounter:
+    """
+    Rolling count of the uploads made to the private repositories of each owner
+    over the last `window_days` days (today included), as limited by the plans
+    with a monthly uploads limit.
+
+    Uploads are counted in redis in per-day buckets as they're accepted.  Since
+    some uploads are only ever created by the worker (and some accepted uploads
+    never get created), the buckets of an owner are only trusted for
+    `UPLOAD_USAGE_RECONCILE_INTERVAL` seconds after they were last recomputed
+    from the database by the `reconcile_upload_usage` command.
+    """
+
+    key_prefix = "upload_usage"
+    window_days = 30
+
+    def __init__(self, reconcile_interval=None):
+        self._reconcile_interval = reconcile_interval
+
+    @property
+    def reconcile_interval(self) -> int:
+        return (
+            self._reconcile_interval
+            if self._reconcile_interval is not None
+            else settings.UPLOAD_USAGE_RECONCILE_INTERVAL
+        )
+
+    def day_key(self, ownerid: int, day: date) -> str:
+        return f"{self.key_prefix}/{ownerid}/{day.isoformat()}"
+
+    def reconciled_key(self, ownerid: int) -> str:
+        return f"{self.key_prefix}/{ownerid}/reconciled"
+
+    def window(self) -> List[date]:
+        today = timezone.now().date()
+        return [today - timedelta(days=i) for i in range(self.window_days)]
+
+    def window_start(self) -> datetime:
+        return datetime.combine(self.window()[-1], time.min, tzinfo=dt_timezone.utc)
+
+    @property
+    def bucket_ttl(self) -> int:
+        # buckets are useless once they're out of the window
+        return (self.window_days + 1) * 24 * 60 * 60
+
+    def increment(self, ownerid: int, count: int = 1):
+        key = self.day_key(ownerid, timezone.now().date())
+        try:
+            with get_redis_connection().pipeline() as pipeline:
+                pipeline.incrby(key, count)
+                pipeline.expire(key, self.bucket_ttl)
+                pipeline.execute()
+        except (OSError, RedisError) as e:
+            log.warning(f"Error incrementing upload usage: {e}")
+
+    def count(self, ownerid: int) -> Optional[int]:
+        """
+        The number of uploads of the owner over the window, or `None` when the
+        buckets of the owner can't be trusted.
+        """
+        days = self.window()
+        try:
+            reconciled, *counts = get_redis_connection().mget(
+                [self.reconciled_key(ownerid)]
+                + [self.day_key(ownerid, day) for day in days]
+            )
+        except (OSError, RedisError) as e:
+            log.warning(f"Error reading upload usage: {e}")
+            return None
+
+        if reconciled is None:
+            metrics.incr("services.upload_usage.not_reconciled")
+            return None
+        return sum(int(count) for count in counts if count is not None)
+
+    def count_from_db(self, ownerid: int) -> Dict[date, int]:
+        rows = (
+            _uploads_queryset(ownerid, self.window_start())
+            .annotate(day=TruncDate("created_at"))
+            .values("day")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        return {row["day"]: row["count"] for row in rows}
+
+    def reconcile(self, ownerid: int) -> Dict[date, int]:
+        """
+        Recomputes the buckets of the owner from the database.  Uploads accepted
+        while this runs may be lost, which is fine since they'll be picked up by
+        the next reconciliation.
+        """
+        counts = self.count_from_db(ownerid)
+        try:
+            with get_redis_connection().pipeline() as pipeline:
+                for day in self.window():
+                    pipeline.set(
+                        self.day_key(ownerid, day),
+                        counts.get(day, 0),
+                        ex=self.bucket_ttl,
+                    )
+                pipeline.set(
+                    self.reconciled_key(ownerid), 1, ex=self.reconcile_interval
+                )
+                pipeline.execute()
+        except (OSError, RedisError) as e:
+            log.warning(f"Error reconciling upload usage: {e}")
+        return counts
+
+
+upload_usage = UploadUsageCounter()
+
+
+def monthly_uploads_used(owner: Owner, limit: int) -> int:
+    """
+    Number of uploads counting towards the monthly uploads limit of the owner,
+    capped at `limit`.
+    """
+    if settings.UPLOAD_USAGE_COUNTER_ENABLED:
+        count = upload_usage.count(owner.ownerid)
+        if count is not None:
+            return min(count, limit)
+
+    since = timezone.now() - timedelta(days=30)
+    return _uploads_queryset(owner.ownerid, since)[:limit].count()
+
+
+def record_upload(repository, commit):
+    """
+    Counts an accepted upload to the given commit towards the monthly uploads
+    limit of the author of its repository.
+    """
+    if not settings.UPLOAD_USAGE_COUNTER_ENABLED or not repository.private:
+        return
+    if commit.timestamp and commit.timestamp < timezone.now() - COMMIT_MAX_AGE:
+        # it wouldn't be counted when reconciling either
+        return
+    upload_usage.increment(repository.author_id)
@@ -1,8 +1,13 @@
 import enum
-from functools import lru_cache
+import hashlib
+import json
+import logging
 from typing import Dict, Optional
 
 from asgiref.sync import async_to_sync
+from django.conf import settings
+from redis.exceptions import RedisError
+from shared.metrics import metrics
 from shared.yaml import UserYaml, fetch_current_yaml_from_provider_via_reference
 from shared.yaml.user_yaml import UserYaml
 from shared.yaml.validation import validate_yaml
@@ -10,8 +15,11 @@ from yaml import safe_load
 
 from codecov_auth.models import Owner, get_config
 from core.models import Commit
+from services.redis_configuration import get_redis_connection
 from services.repo_providers import RepoProviderService
 
+log = logging.getLogger(__name__)
+
 
 class YamlStates(enum.Enum):
     DEFAULT = "default"
@@ -23,14 +31,7 @@ def fetch_commit_yaml(commit: Commit, owner: Owner) -> Optional[Dict]:
     Service provider API request is made on behalf of the given `owner`.
     """
     try:
-        repository_service = RepoProviderService().get_adapter(
-            owner=owner, repo=commit.repository
-        )
-        yaml_str = async_to_sync(fetch_current_yaml_from_provider_via_reference)(
-            commit.commitid, repository_service
-        )
-        yaml_dict = safe_load(yaml_str)
-        return validate_yaml(yaml_dict, show_secrets_for=None)
+        return _fetch_commit_yaml(commit, owner)
     except:
         # fetching, parsing, validating the yaml inside the commit can
         # have various exceptions, which we do not care about to get the final
@@ -39,14 +40,110 @@ def fetch_commit_yaml(commit: Commit, owner: Owner) -> Optional[Dict]:
         return None
 
 
-@lru_cache()
-# TODO: make this use the Redis cache logic in 'shared' once it's there
+def _fetch_commit_yaml(commit: Commit, owner: Owner) -> Optional[Dict]:
+    """
+    Same as `fetch_commit_yaml` except that errors fetching the yaml (which may
+    be transient) are raised.  `None` means the commit has no (valid) yaml.
+    """
+    repository_service = RepoProviderService().get_adapter(
+        owner=owner, repo=commit.repository
+    )
+    yaml_str = async_to_sync(fetch_current_yaml_from_provider_via_reference)(
+        commit.commitid, repository_service
+    )
+    if yaml_str is None:
+        return None
+    try:
+        yaml_dict = safe_load(yaml_str)
+        return validate_yaml(yaml_dict, show_secrets_for=None)
+    except Exception:
+        # the commit's yaml can't become valid later on
+        return None
+
+
+class CommitYamlCache:
+    """
+    Caches the final yaml of commits in redis.
+
+    A commit's yaml never changes so entries are keyed on the commit along with
+    everything else the final yaml is built from (the owner and repository
+    yaml and the site defaults).  Commits without a yaml are cached as well.
+    """
+
+    key_prefix = "yaml"
+
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+
+    @property
+    def ttl(self) -> int:
+        # a TTL of 0 disables the cache
+        return self._ttl if self._ttl is not None else settings.COMMIT_YAML_CACHE_TTL
+
+    def key(self, commit: Commit) -> str:
+        yaml_digest = hashlib.sha256(
+            json.dumps(
+                [
+                    commit.repository.author.yaml,
+                    commit.repository.yaml,
+                    get_config("site", default={}),
+                ],
+                sort_keys=True,
+                default=str,
+            ).encode()
+        ).hexdigest()
+        return (
+            f"{self.key_prefix}/{commit.repository_id}/{commit.commitid}/{yaml_digest}"
+        )
+
+    def get(self, commit: Commit) -> Optional[UserYaml]:
+        if not self.ttl:
+            return None
+        try:
+            value = get_redis_connection().get(self.key(commit))
+        except (OSError, RedisError) as e:
+            log.warning(f"Error reading commit yaml cache: {e}")
+            return None
+        if value is None:
+            metrics.incr("services.yaml.cache.miss")
+            return None
+        metrics.incr("services.yaml.cache.hit")
+        return UserYaml(json.loads(value))
+
+    def set(self, commit: Commit, yaml: UserYaml):
+        if not self.ttl:
+            return
+        try:
+            get_redis_connection().set(
+                self.key(commit), json.dumps(yaml.to_dict()), ex=self.ttl
+            )
+        except (OSError, RedisError) as e:
+            log.warning(f"Error writing commit yaml cache: {e}")
+
+
+commit_yaml_cache = CommitYamlCache()
+
+
 def final_commit_yaml(commit: Commit, owner: Owner) -> UserYaml:
-    return UserYaml.get_final_yaml(
+    yaml = commit_yaml_cache.get(commit)
+    if yaml is not None:
+        return yaml
+
+    cacheable = True
+    try:
+        commit_yaml = _fetch_commit_yaml(commit, owner)
+    except Exception:
+        # see `fetch_commit_yaml` - but the next attempt might succeed
+        commit_yaml, cacheable = None, False
+
+    yaml = UserYaml.get_final_yaml(
         owner_yaml=commit.repository.author.yaml,
         repo_yaml=commit.repository.yaml,
-        commit_yaml=fetch_commit_yaml(commit, owner),
+        commit_yaml=commit_yaml,
     )
+    if cacheable:
+        commit_yaml_cache.set(commit, yaml)
+    return yaml
 
 
 def get_yaml_state(yaml: UserYaml) -> YamlStates:
@@ -0,0 +1,60 @@
+import time
+import uuid
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Repository
+from staticanalysis.serializers import StaticAnalysisSuiteSerializer
+
+
+class Command(BaseCommand):
+    """
+    Measures how long it takes to create (and serialize the response of) a
+    first-time static analysis suite of various sizes for the given repository,
+    along with the number of queries it takes. Everything is done in a
+    transaction that is rolled back, so nothing is persisted.
+    """
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--repoid", type=int, required=True)
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000]
+        )
+
+    def handle(self, *args, **options):
+        repository = Repository.objects.filter(pk=options["repoid"]).first()
+        if repository is None:
+            raise CommandError(f"Repository {options['repoid']} not found")
+        commit = repository.commits.order_by("-timestamp").first()
+        if commit is None:
+            raise CommandError(f"Repository {repository.repoid} has no commits")
+
+        request = SimpleNamespace(
+            auth=SimpleNamespace(get_repositories=lambda: [repository])
+        )
+        for size in options["sizes"]:
+            validated_data = {
+                "commit": commit,
+                "filepaths": [
+                    {"filepath": f"path/to/file_{i}.py", "file_hash": uuid.uuid4()}
+                    for i in range(size)
+                ],
+            }
+            with transaction.atomic():
+                serializer = StaticAnalysisSuiteSerializer(context={"request": request})
+                with CaptureQueriesContext(connection) as queries:
+                    create_start = time.monotonic()
+                    suite = serializer.create(validated_data)
+                    create_duration = time.monotonic() - create_start
+                    serialize_start = time.monotonic()
+                    serializer.to_representation(suite)
+                    serialize_duration = time.monotonic() - serialize_start
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"files: {size}, queries: {len(queries)}, "
+                f"create: {create_duration:.2f}s, serialize: {serialize_duration:.2f}s"
+            )
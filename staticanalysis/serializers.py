@@ -1,6 +1,8 @@
 import logging
 import math
+import uuid
 
+from django.db import connection
 from rest_framework import exceptions, serializers
 
 from core.models import Commit
@@ -30,48 +32,66 @@ class CommitFromShaSerializerField(serializers.Field):
         return commit
 
 
-def _dict_to_suite_filepath(
-    analysis_suite,
-    repository,
-    archive_service,
-    existing_file_snapshots_mapping,
-    file_dict,
-):
-    if file_dict["file_hash"] in existing_file_snapshots_mapping:
-        db_element = existing_file_snapshots_mapping[file_dict["file_hash"]]
-        was_created = False
-    else:
-        path = MinioEndpoints.static_analysis_single_file.get_path(
+def _upsert_file_snapshots(repository, archive_service, file_hashes):
+    """
+    Creates the snapshots of the given file hashes in a single statement and
+    returns a mapping of file hash -> snapshot id. Hashes that were concurrently
+    created somewhere else hit the `ON CONFLICT` clause, whose no-op update makes
+    their existing rows part of the returned ones.
+    """
+    if not file_hashes:
+        return {}
+    file_hashes = list(file_hashes)
+    content_locations = [
+        MinioEndpoints.static_analysis_single_file.get_path(
             version="v4",
             repo_hash=archive_service.storage_hash,
-            location=f"{file_dict['file_hash']}.json",
+            location=f"{file_hash}.json",
         )
-        # Using get or create in the case the object was already
-        # created somewhere else first, but also because get_or_create
-        # is internally get_or_create_or_get, so Django handles the conflicts
-        # that can arise on race conditions on the create step
-        # We might choose to change it if the number of extra GETs become too much
-        (
-            db_element,
-            was_created,
-        ) = StaticAnalysisSingleFileSnapshot.objects.get_or_create(
-            file_hash=file_dict["file_hash"],
-            repository=repository,
-            defaults=dict(
-                state_id=StaticAnalysisSingleFileSnapshotState.CREATED.db_id,
-                content_location=path,
-            ),
-        )
-    if was_created:
-        log.debug(
-            "Created new snapshot for repository",
-            extra=dict(repoid=repository.repoid, snapshot_id=db_element.id),
+        for file_hash in file_hashes
+    ]
+    # arrays are used instead of a VALUES list to stay clear of the limit on
+    # the number of query parameters for large suites
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {StaticAnalysisSingleFileSnapshot._meta.db_table} (
+                external_id, created_at, updated_at, repository_id, file_hash,
+                content_location, state_id
+            )
+            SELECT external_id, now(), now(), %s, file_hash, content_location, %s
+            FROM unnest(%s::uuid[], %s::uuid[], %s::text[])
+                AS t(external_id, file_hash, content_location)
+            ON CONFLICT (repository_id, file_hash)
+                DO UPDATE SET file_hash = EXCLUDED.file_hash
+            RETURNING id, file_hash, (xmax = 0) AS was_created
+            """,
+            [
+                repository.repoid,
+                StaticAnalysisSingleFileSnapshotState.CREATED.db_id,
+                [uuid.uuid4() for _ in file_hashes],
+                file_hashes,
+                content_locations,
+            ],
         )
-    return StaticAnalysisSuiteFilepath(
-        filepath=file_dict["filepath"],
-        file_snapshot=db_element,
-        analysis_suite=analysis_suite,
+        rows = cursor.fetchall()
+    log.debug(
+        "Created new snapshots for repository",
+        extra=dict(
+            repoid=repository.repoid,
+            created_count=sum(1 for _, _, was_created in rows if was_created),
+        ),
     )
+    return {file_hash: snapshot_id for snapshot_id, file_hash, _ in rows}
+
+
+def _presigned_puts(archive_service, paths):
+    """
+    Signs an upload URL for each of the given paths (once per distinct path).
+    Signing is local and CPU-bound, so it's done serially.
+    Returns a mapping of path -> URL.
+    """
+    return {path: archive_service.create_presigned_put(path) for path in set(paths)}
 
 
 class StaticAnalysisSuiteFilepathField(serializers.ModelSerializer):
@@ -97,9 +117,11 @@ class StaticAnalysisSuiteFilepathField(serializers.ModelSerializer):
         # TODO: This has a built-in ttl of 10 seconds.
         # We have to consider changing it in case customers are doing a few
         # thousand uploads on the first time
-        return self.context["archive_service"].create_presigned_put(
-            obj.file_snapshot.content_location
-        )
+        location = obj.file_snapshot.content_location
+        presigned_puts = self.context.get("presigned_puts", {})
+        if location in presigned_puts:
+            return presigned_puts[location]
+        return self.context["archive_service"].create_presigned_put(location)
 
 
 class FilepathListField(serializers.ListField):
@@ -109,6 +131,12 @@ class FilepathListField(serializers.ListField):
         data = data.select_related(
             "file_snapshot",
         ).all()
+        # the URLs are signed in one batch rather than one by one as each
+        # filepath is serialized
+        self.context["presigned_puts"] = _presigned_puts(
+            self.context["archive_service"],
+            [filepath.file_snapshot.content_location for filepath in data],
+        )
         return super().to_representation(data)
 
 
@@ -135,14 +163,19 @@ class StaticAnalysisSuiteSerializer(serializers.ModelSerializer):
         existing_values = StaticAnalysisSingleFileSnapshot.objects.filter(
             repository=repository, file_hash__in=all_hashes
         )
-        existing_values_mapping = {val.file_hash: val for val in existing_values}
-        created_filepaths = [
-            _dict_to_suite_filepath(
-                obj,
+        snapshot_ids = dict(existing_values.values_list("file_hash", "id"))
+        snapshot_ids.update(
+            _upsert_file_snapshots(
                 repository,
                 archive_service,
-                existing_values_mapping,
-                file_dict,
+                set(all_hashes) - snapshot_ids.keys(),
+            )
+        )
+        created_filepaths = [
+            StaticAnalysisSuiteFilepath(
+                filepath=file_dict["filepath"],
+                file_snapshot_id=snapshot_ids[file_dict["file_hash"]],
+                analysis_suite=obj,
             )
             for file_dict in file_metadata_array
         ]
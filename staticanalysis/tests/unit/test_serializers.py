@@ -2,6 +2,8 @@ import re
 from uuid import UUID, uuid4
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.exceptions import NotFound, ValidationError
 
 from core.tests.factories import CommitFactory, RepositoryFactory
@@ -15,6 +17,8 @@ from staticanalysis.serializers import (
     CommitFromShaSerializerField,
     StaticAnalysisSuiteFilepathField,
     StaticAnalysisSuiteSerializer,
+    _presigned_puts,
+    _upsert_file_snapshots,
 )
 from staticanalysis.tests.factories import (
     StaticAnalysisSingleFileSnapshotFactory,
@@ -329,3 +333,48 @@ class TestStaticAnalysisSuiteSerializer(object):
             fourth_filepath.file_snapshot.state_id
             == StaticAnalysisSingleFileSnapshotState.VALID.db_id
         )
+
+
+def test_upsert_file_snapshots(db):
+    repository = RepositoryFactory.create()
+    existing_snapshot = StaticAnalysisSingleFileSnapshotFactory.create(
+        repository=repository,
+        file_hash=uuid4(),
+        state_id=StaticAnalysisSingleFileSnapshotState.VALID.db_id,
+        content_location="existing_snapshot",
+    )
+    new_hashes = [uuid4() for _ in range(3)]
+    with CaptureQueriesContext(connection) as queries:
+        res = _upsert_file_snapshots(
+            repository,
+            ArchiveService(repository),
+            # the existing hash is as if it was created concurrently
+            new_hashes + [existing_snapshot.file_hash],
+        )
+    assert len(queries) == 1
+    assert res.keys() == set(new_hashes) | {existing_snapshot.file_hash}
+    assert res[existing_snapshot.file_hash] == existing_snapshot.id
+    existing_snapshot.refresh_from_db()
+    assert existing_snapshot.content_location == "existing_snapshot"
+    assert (
+        existing_snapshot.state_id == StaticAnalysisSingleFileSnapshotState.VALID.db_id
+    )
+    for file_hash in new_hashes:
+        snapshot = repository.staticanalysissinglefilesnapshot_set.get(
+            file_hash=file_hash
+        )
+        assert snapshot.id == res[file_hash]
+        assert expected_location_regex.match(snapshot.content_location) is not None
+        assert snapshot.state_id == StaticAnalysisSingleFileSnapshotState.CREATED.db_id
+
+
+def test_presigned_puts(mocker):
+    archive_service = mocker.MagicMock(
+        create_presigned_put=mocker.MagicMock(side_effect=lambda path: f"url/{path}")
+    )
+    assert _presigned_puts(archive_service, ["a", "b", "a", "c"]) == {
+        "a": "url/a",
+        "b": "url/b",
+        "c": "url/c",
+    }
+    assert archive_service.create_presigned_put.call_count == 3
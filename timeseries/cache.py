@@ -0,0 +1,95 @@
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from redis.exceptions import RedisError
+from shared.metrics import metrics
+
+from core.models import Repository
+from services.redis_configuration import get_redis_connection
+from timeseries.models import Interval
+
+log = logging.getLogger(__name__)
+
+
+class FlagMeasurementsCache:
+    """
+    Caches the dense flag coverage series of a repository in redis.
+
+    There is one hash per (repository, interval, window) with a field per flag.
+    Measurements are written by the worker, so nothing here knows when they
+    change: new measurements are only picked up once the hash expires.
+    """
+
+    key_prefix = "flag_measurements"
+
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+
+    @property
+    def ttl(self) -> int:
+        # a TTL of 0 disables the cache
+        return (
+            self._ttl if self._ttl is not None else settings.FLAG_MEASUREMENTS_CACHE_TTL
+        )
+
+    def key(
+        self, repository: Repository, interval: Interval, start: datetime, end: datetime
+    ) -> Optional[str]:
+        """
+        The key of the hash holding the series for the given window, or `None`
+        if the cache is disabled.
+        """
+        if not self.ttl:
+            return None
+        return (
+            f"{self.key_prefix}/{repository.pk}/"
+            f"{interval.name}/{start.isoformat()}/{end.isoformat()}"
+        )
+
+    def get_many(self, key: str, flag_ids: Iterable[int]) -> Dict[int, Optional[dict]]:
+        """
+        The cached series of the given flags.  Flags that are not cached are
+        omitted, flags known to have no measurements map to `None`.
+        """
+        flag_ids = list(flag_ids)
+        if not flag_ids:
+            return {}
+        try:
+            values = get_redis_connection().hmget(key, flag_ids)
+        except (OSError, RedisError) as e:
+            log.warning(f"Error reading flag measurements cache: {e}")
+            return {}
+
+        cached = {
+            flag_id: json.loads(value)
+            for flag_id, value in zip(flag_ids, values)
+            if value is not None
+        }
+        if len(cached) == len(flag_ids):
+            metrics.incr("timeseries.flag_measurements_cache.hit")
+        else:
+            metrics.incr("timeseries.flag_measurements_cache.miss")
+        return cached
+
+    def set_many(self, key: str, series: Dict[int, Optional[dict]]):
+        if not series:
+            return
+        try:
+            redis = get_redis_connection()
+            with redis.pipeline() as pipeline:
+                pipeline.hset(
+                    key,
+                    mapping={
+                        flag_id: json.dumps(value) for flag_id, value in series.items()
+                    },
+                )
+                pipeline.expire(key, self.ttl)
+                pipeline.execute()
+        except (OSError, RedisError) as e:
+            log.warning(f"Error writing flag measurements cache: {e}")
+
+
+flag_measurements_cache = FlagMeasurementsCache()
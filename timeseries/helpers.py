@@ -1,11 +1,16 @@
 import math
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Iterable, List, Optional
+from itertools import chain
+from typing import Hashable, Iterable, List, Optional
 
 from django.conf import settings
 from django.db import connections
 from django.db.models import (
     Avg,
+    Count,
     DateTimeField,
     DecimalField,
     F,
@@ -20,10 +25,11 @@ from django.db.models import (
 from django.db.models.fields.json import KeyTextTransform
 from django.db.models.functions import Cast
 from django.utils import timezone
+from shared.metrics import metrics
 
 import services.report as report_service
 from codecov_auth.models import Owner
-from core.models import Commit, Repository
+from core.models import Commit, DailyCoverageRollup, Repository
 from reports.models import RepositoryFlag
 from services.task import TaskService
 from timeseries.models import (
@@ -59,7 +65,7 @@ def refresh_measurement_summaries(start_date: datetime, end_date: datetime) -> N
 
 
 def aggregate_measurements(
-    queryset: QuerySet, group_by: Iterable[str] = None
+    queryset: QuerySet, group_by: Iterable[str] = None, with_count: bool = False
 ) -> QuerySet:
     """
     The given queryset is a set of measurement summaries.  These are already
@@ -71,21 +77,22 @@ def aggregate_measurements(
     if not group_by:
         group_by = ["timestamp_bin"]
 
-    return (
-        queryset.values(*group_by)
-        .annotate(
-            min=Min("value_min"),
-            max=Max("value_max"),
-            avg=Cast(
-                Sum(F("value_avg") * F("value_count")) / Sum(F("value_count")),
-                # this is equivalent to Postgres' numeric(1000, 5) type
-                # 1000 is the max precision
-                # (used to avoid floating point error)
-                DecimalField(max_digits=1000, decimal_places=5),
-            ),
-        )
-        .order_by("timestamp_bin")
+    aggregates = dict(
+        min=Min("value_min"),
+        max=Max("value_max"),
+        avg=Cast(
+            Sum(F("value_avg") * F("value_count")) / Sum(F("value_count")),
+            # this is equivalent to Postgres' numeric(1000, 5) type
+            # 1000 is the max precision
+            # (used to avoid floating point error)
+            DecimalField(max_digits=1000, decimal_places=5),
+        ),
     )
+    if with_count:
+        # the number of measurements the bin aggregates over
+        aggregates["count"] = Sum("value_count")
+
+    return queryset.values(*group_by).annotate(**aggregates).order_by("timestamp_bin")
 
 
 def _filter_repos(
@@ -107,6 +114,7 @@ def coverage_measurements(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     repos: Optional[List[Repository]] = None,
+    with_count: bool = False,
     **filters,
 ):
     timestamp_filters = {}
@@ -137,11 +145,17 @@ def coverage_measurements(
             .filter(**filters)
         )
         older = _filter_repos(older, repos)
-        older = aggregate_measurements(older).order_by("-timestamp_bin")[:1]
+        older = aggregate_measurements(older, with_count=with_count).order_by(
+            "-timestamp_bin"
+        )[:1]
 
-        return older.union(aggregate_measurements(queryset)).order_by("timestamp_bin")
+        return older.union(
+            aggregate_measurements(queryset, with_count=with_count)
+        ).order_by("timestamp_bin")
     else:
-        return aggregate_measurements(queryset).order_by("timestamp_bin")
+        return aggregate_measurements(queryset, with_count=with_count).order_by(
+            "timestamp_bin"
+        )
 
 
 def trigger_backfill(dataset: Dataset):
@@ -262,11 +276,22 @@ def coverage_fallback_query(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     repos: Optional[List[Repository]] = None,
+    with_count: bool = False,
     **filters,
 ):
     """
     Query for coverage timeseries directly from the database
     """
+    if settings.COVERAGE_ROLLUP_ENABLED:
+        return _rollup_coverage_fallback_query(
+            interval,
+            start_date=start_date,
+            end_date=end_date,
+            repos=repos,
+            with_count=with_count,
+            **filters,
+        )
+
     timestamp_filters = {}
     if start_date is not None:
         timestamp_filters["timestamp__gte"] = start_date
@@ -274,7 +299,7 @@ def coverage_fallback_query(
         timestamp_filters["timestamp__lte"] = end_date
     commits = Commit.objects.filter(**timestamp_filters).filter(**filters)
     commits = _filter_repos(commits, repos, column_name="repoid")
-    commits = _commits_coverage(commits, interval)
+    commits = _commits_coverage(commits, interval, with_count=with_count)
 
     if start_date:
         # The first measurement of the specified range (`start_date` through `end_date`)
@@ -285,7 +310,9 @@ def coverage_fallback_query(
             timestamp__lt=start_date,
         ).filter(**filters)
         older = _filter_repos(older, repos, column_name="repoid")
-        older = _commits_coverage(older, interval).order_by("-timestamp_bin")[:1]
+        older = _commits_coverage(older, interval, with_count=with_count).order_by(
+            "-timestamp_bin"
+        )[:1]
 
         return older.union(commits).order_by("timestamp_bin")
     else:
@@ -293,7 +320,7 @@ def coverage_fallback_query(
 
 
 def _commits_coverage(
-    commits_queryset: QuerySet[Commit], interval: Interval
+    commits_queryset: QuerySet[Commit], interval: Interval, with_count: bool = False
 ) -> QuerySet[Commit]:
     intervals = {
         Interval.INTERVAL_1_DAY: "1 day",
@@ -319,6 +346,80 @@ def _commits_coverage(
             min=Min("coverage"),
             max=Max("coverage"),
             avg=Avg("coverage"),
+            **({"count": Count("coverage")} if with_count else {}),
+        )
+        .order_by("timestamp_bin")
+    )
+
+
+def _rollup_coverage_fallback_query(
+    interval: Interval,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    repos: Optional[List[Repository]] = None,
+    with_count: bool = False,
+    **filters,
+):
+    """
+    Same as `coverage_fallback_query` but reads the daily coverage rollups
+    instead of the individual commits.  The rollups are per day so the date
+    range is applied with day granularity.
+    """
+    date_filters = {}
+    if start_date is not None:
+        date_filters["date__gte"] = start_date.date()
+    if end_date is not None:
+        date_filters["date__lte"] = end_date.date()
+    rollups = DailyCoverageRollup.objects.filter(**date_filters).filter(**filters)
+    rollups = _filter_repos(rollups, repos, column_name="repoid")
+    rollups = _rollups_coverage(rollups, interval, with_count=with_count)
+
+    if start_date:
+        # see `coverage_fallback_query`
+        older = DailyCoverageRollup.objects.filter(
+            date__lt=start_date.date(),
+        ).filter(**filters)
+        older = _filter_repos(older, repos, column_name="repoid")
+        older = _rollups_coverage(older, interval, with_count=with_count).order_by(
+            "-timestamp_bin"
+        )[:1]
+
+        return older.union(rollups).order_by("timestamp_bin")
+    else:
+        return rollups.order_by("timestamp_bin")
+
+
+def _rollups_coverage(
+    rollups_queryset: QuerySet[DailyCoverageRollup],
+    interval: Interval,
+    with_count: bool = False,
+) -> QuerySet[DailyCoverageRollup]:
+    intervals = {
+        Interval.INTERVAL_1_DAY: "1 day",
+        Interval.INTERVAL_7_DAY: "7 days",
+        Interval.INTERVAL_30_DAY: "30 days",
+    }
+
+    return (
+        rollups_queryset.filter(commit_count__gt=0)
+        .annotate(
+            timestamp_bin=Func(
+                F("date"),
+                function="date_bin",
+                # mimic how Timescale aligns bins
+                template=(
+                    f"%(function)s('{intervals[interval]}', %(expressions)s::timestamp, "
+                    "timestamp '2000-01-03') at time zone 'utc'"
+                ),
+                output_field=DateTimeField(),
+            ),
+        )
+        .values("timestamp_bin")
+        .annotate(
+            min=Min("coverage_min"),
+            max=Max("coverage_max"),
+            avg=Sum("coverage_sum") / Cast(Sum("commit_count"), FloatField()),
+            **({"count": Sum("commit_count")} if with_count else {}),
         )
         .order_by("timestamp_bin")
     )
@@ -373,6 +474,93 @@ def repository_coverage_measurements_with_fallback(
         )
 
 
+class MeasurementsCache:
+    """
+    Process-wide cache of computed coverage series with a short TTL.  It only
+    exists to absorb repeated loads of the same (potentially expensive) series,
+    i.e. the same dashboard being refreshed or viewed by several people.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[list]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+
+        if entry is None:
+            metrics.incr("timeseries.measurements_cache.miss")
+            return None
+        metrics.incr("timeseries.measurements_cache.hit")
+        return entry[1]
+
+    def set(self, key: Hashable, value: list, ttl: int):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + ttl, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+measurements_cache = MeasurementsCache()
+
+
+def merge_coverage_series(
+    *series: Iterable[dict], start_date: Optional[datetime] = None
+) -> List[dict]:
+    """
+    Merges coverage series of disjoint sets of repos into a single one, bin by bin.
+    The series must include the number of values each bin aggregates over
+    (see `with_count`) so that averages can be weighted accordingly.
+
+    Each series may carry an older datapoint before `start_date` forward, only the
+    most recent of those is kept.
+    """
+    bins = {}
+    for measurement in chain(*series):
+        timestamp_bin = measurement["timestamp_bin"].replace(tzinfo=timezone.utc)
+        count = measurement["count"]
+        existing = bins.get(timestamp_bin)
+        if existing is None:
+            bins[timestamp_bin] = {
+                "timestamp_bin": timestamp_bin,
+                "avg": measurement["avg"],
+                "min": measurement["min"],
+                "max": measurement["max"],
+                "count": count,
+            }
+            continue
+
+        total_count = existing["count"] + count
+        existing["avg"] = (
+            float(existing["avg"]) * existing["count"]
+            + float(measurement["avg"]) * count
+        ) / total_count
+        existing["min"] = min(existing["min"], measurement["min"])
+        existing["max"] = max(existing["max"], measurement["max"])
+        existing["count"] = total_count
+
+    timestamps = sorted(bins.keys())
+    if start_date is not None:
+        older = [timestamp for timestamp in timestamps if timestamp < start_date]
+        timestamps = older[-1:] + timestamps[len(older) :]
+
+    return [
+        {key: value for key, value in bins[timestamp].items() if key != "count"}
+        for timestamp in timestamps
+    ]
+
+
 def owner_coverage_measurements_with_fallback(
     owner: Owner,
     repo_ids: Iterable[str],
@@ -381,10 +569,27 @@ def owner_coverage_measurements_with_fallback(
     end_date: Optional[datetime] = None,
 ):
     """
-    Tries to return owner coverage measurements from Timescale.
-    If those are not available then we trigger a backfill and return computed results
-    directly from the primary database (much slower to query).
+    Returns owner coverage measurements, served from Timescale for the repos
+    whose datasets have been backfilled and computed directly from the primary
+    database (much slower to query) for the others, for which we trigger a
+    backfill.  The results are cached for a short while.
     """
+    if not repo_ids:
+        # neither query can be limited to no repos
+        return []
+
+    cache_key = (
+        owner.pk,
+        tuple(sorted(repo_ids)),
+        interval,
+        start_date,
+        end_date,
+    )
+    if settings.MEASUREMENTS_CACHE_TTL:
+        cached = measurements_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     datasets = []
     if settings.TIMESERIES_ENABLED:
         datasets = Dataset.objects.filter(
@@ -392,41 +597,68 @@ def owner_coverage_measurements_with_fallback(
             repository_id__in=repo_ids,
         )
 
-    all_backfilled = len(datasets) == len(repo_ids) and all(
-        dataset.is_backfilled() for dataset in datasets
+    backfilled_repo_ids = set(
+        dataset.repository_id for dataset in datasets if dataset.is_backfilled()
     )
+    missing_repo_ids = set(repo_ids) - backfilled_repo_ids
 
     # we can't join across databases so we need to load all this into memory.
     # select just the needed columns to keep this manageable
     repos = Repository.objects.filter(repoid__in=repo_ids).only("repoid", "branch")
 
-    if settings.TIMESERIES_ENABLED and all_backfilled:
+    if settings.TIMESERIES_ENABLED:
+        # we need to backfill some datasets
+        dataset_repo_ids = set(dataset.repository_id for dataset in datasets)
+        missing_dataset_repo_ids = set(repo_ids) - dataset_repo_ids
+        created_datasets = Dataset.objects.bulk_create(
+            [
+                Dataset(name=MeasurementName.COVERAGE.value, repository_id=repo_id)
+                for repo_id in missing_dataset_repo_ids
+            ]
+        )
+        for dataset in created_datasets:
+            trigger_backfill(dataset)
+
+    if not missing_repo_ids:
         # timeseries data is ready
-        return coverage_measurements(
+        result = coverage_measurements(
             interval,
             start_date=start_date,
             end_date=end_date,
             owner_id=owner.pk,
             repos=repos,
         )
-    else:
-        if settings.TIMESERIES_ENABLED:
-            # we need to backfill some datasets
-            dataset_repo_ids = set(dataset.repository_id for dataset in datasets)
-            missing_dataset_repo_ids = set(repo_ids) - dataset_repo_ids
-            created_datasets = Dataset.objects.bulk_create(
-                [
-                    Dataset(name=MeasurementName.COVERAGE.value, repository_id=repo_id)
-                    for repo_id in missing_dataset_repo_ids
-                ]
-            )
-            for dataset in created_datasets:
-                trigger_backfill(dataset)
-
+    elif not backfilled_repo_ids:
         # we're still backfilling or timeseries is disabled
-        return coverage_fallback_query(
+        result = coverage_fallback_query(
             interval,
             start_date=start_date,
             end_date=end_date,
             repos=repos,
         )
+    else:
+        # only the repos that are still being backfilled are queried from the
+        # primary database
+        result = merge_coverage_series(
+            coverage_measurements(
+                interval,
+                start_date=start_date,
+                end_date=end_date,
+                owner_id=owner.pk,
+                repos=[repo for repo in repos if repo.pk in backfilled_repo_ids],
+                with_count=True,
+            ),
+            coverage_fallback_query(
+                interval,
+                start_date=start_date,
+                end_date=end_date,
+                repos=[repo for repo in repos if repo.pk in missing_repo_ids],
+                with_count=True,
+            ),
+            start_date=start_date,
+        )
+
+    result = list(result)
+    if settings.MEASUREMENTS_CACHE_TTL:
+        measurements_cache.set(cache_key, result, settings.MEASUREMENTS_CACHE_TTL)
+    return result
@@ -3,7 +3,9 @@ from unittest.mock import call, patch
 
 import pytest
 from django.conf import settings
-from django.test import TransactionTestCase
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from freezegun import freeze_time
 from freezegun.api import FakeDatetime
@@ -14,6 +16,7 @@ from codecov_auth.tests.factories import OwnerFactory
 from core.tests.factories import CommitFactory, RepositoryFactory
 from reports.tests.factories import RepositoryFlagFactory
 from timeseries.helpers import (
+    coverage_fallback_query,
     coverage_measurements,
     fill_sparse_measurements,
     owner_coverage_measurements_with_fallback,
@@ -1132,3 +1135,190 @@ class OwnerCoverageMeasurementsWithFallbackTest(TransactionTestCase):
                 "max": 80.0,
             },
         ]
+
+    def _partially_backfilled(self):
+        MeasurementFactory(
+            name=MeasurementName.COVERAGE.value,
+            owner_id=self.repo1.author_id,
+            repo_id=self.repo1.pk,
+            measurable_id=str(self.repo1.pk),
+            timestamp=datetime(2022, 1, 1, 1, 0, 0),
+            value=80.0,
+            branch="master",
+            commit_sha="commit1",
+        )
+        MeasurementFactory(
+            name=MeasurementName.COVERAGE.value,
+            owner_id=self.repo1.author_id,
+            repo_id=self.repo1.pk,
+            measurable_id=str(self.repo1.pk),
+            timestamp=datetime(2022, 1, 1, 2, 0, 0),
+            value=85.0,
+            branch="master",
+            commit_sha="commit2",
+        )
+        MeasurementFactory(
+            name=MeasurementName.COVERAGE.value,
+            owner_id=self.repo1.author_id,
+            repo_id=self.repo1.pk,
+            measurable_id=str(self.repo1.pk),
+            timestamp=datetime(2022, 1, 2, 1, 0, 0),
+            value=80.0,
+            branch="master",
+            commit_sha="commit3",
+        )
+        CommitFactory(
+            commitid="commit1",
+            repository_id=self.repo2.pk,
+            branch="master",
+            timestamp=datetime(2022, 1, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+            totals={"c": "90.00"},
+        )
+        CommitFactory(
+            commitid="commit2",
+            repository_id=self.repo2.pk,
+            branch="master",
+            timestamp=datetime(2022, 1, 2, 1, 0, 0, 0, tzinfo=timezone.utc),
+            totals={"c": "70.00"},
+        )
+        DatasetFactory(
+            name=MeasurementName.COVERAGE.value,
+            repository_id=self.repo1.pk,
+        )
+        DatasetFactory(
+            name=MeasurementName.COVERAGE.value,
+            repository_id=self.repo2.pk,
+        )
+
+    @patch("timeseries.models.Dataset.is_backfilled", autospec=True)
+    def test_partially_backfilled_datasets(self, is_backfilled):
+        is_backfilled.side_effect = lambda dataset: (
+            dataset.repository_id == self.repo1.pk
+        )
+        self._partially_backfilled()
+
+        res = owner_coverage_measurements_with_fallback(
+            owner=self.owner,
+            repo_ids=[self.repo1.pk, self.repo2.pk],
+            interval=Interval.INTERVAL_1_DAY,
+            start_date=datetime(2021, 12, 31, 0, 0, 0, tzinfo=timezone.utc),
+            end_date=datetime(2022, 1, 3, 0, 0, 0, tzinfo=timezone.utc),
+        )
+        assert list(res) == [
+            {
+                # repo1 measurements (80, 85) and repo2 commit (90)
+                "timestamp_bin": datetime(2022, 1, 1, 0, 0, tzinfo=timezone.utc),
+                "avg": 85.0,
+                "min": 80.0,
+                "max": 90.0,
+            },
+            {
+                # repo1 measurement (80) and repo2 commit (70)
+                "timestamp_bin": datetime(2022, 1, 2, 0, 0, tzinfo=timezone.utc),
+                "avg": 75.0,
+                "min": 70.0,
+                "max": 80.0,
+            },
+        ]
+
+    @patch("timeseries.models.Dataset.is_backfilled", autospec=True)
+    def test_cached(self, is_backfilled):
+        is_backfilled.side_effect = lambda dataset: (
+            dataset.repository_id == self.repo1.pk
+        )
+        self._partially_backfilled()
+
+        kwargs = dict(
+            owner=self.owner,
+            repo_ids=[self.repo1.pk, self.repo2.pk],
+            interval=Interval.INTERVAL_1_DAY,
+            start_date=datetime(2021, 12, 31, 0, 0, 0, tzinfo=timezone.utc),
+            end_date=datetime(2022, 1, 3, 0, 0, 0, tzinfo=timezone.utc),
+        )
+        res = owner_coverage_measurements_with_fallback(**kwargs)
+        assert len(res) == 2
+
+        kwargs["repo_ids"] = [self.repo2.pk, self.repo1.pk]
+        with self.assertNumQueries(0), self.assertNumQueries(0, using="timeseries"):
+            assert owner_coverage_measurements_with_fallback(**kwargs) == res
+
+        with override_settings(MEASUREMENTS_CACHE_TTL=0), CaptureQueriesContext(
+            connections["timeseries"]
+        ) as queries:
+            assert owner_coverage_measurements_with_fallback(**kwargs) == res
+        assert len(queries) > 0
+
+    def test_no_repos(self):
+        for timeseries_enabled in (True, False):
+            with override_settings(
+                TIMESERIES_ENABLED=timeseries_enabled
+            ), self.assertNumQueries(0), self.assertNumQueries(0, using="timeseries"):
+                assert (
+                    owner_coverage_measurements_with_fallback(
+                        owner=self.owner,
+                        repo_ids=[],
+                        interval=Interval.INTERVAL_1_DAY,
+                    )
+                    == []
+                )
+
+
+class CoverageFallbackQueryTest(TransactionTestCase):
+    def setUp(self):
+        self.repo = RepositoryFactory()
+        for commitid, timestamp, coverage in [
+            ("commit1", datetime(2021, 12, 30, 1, 0, 0), "70.00"),
+            ("commit2", datetime(2022, 1, 1, 1, 0, 0), "80.00"),
+            ("commit3", datetime(2022, 1, 1, 2, 0, 0), "85.00"),
+            ("commit4", datetime(2022, 1, 2, 1, 0, 0), "90.00"),
+        ]:
+            CommitFactory(
+                commitid=commitid,
+                repository_id=self.repo.pk,
+                branch="master",
+                timestamp=timestamp.replace(tzinfo=timezone.utc),
+                totals={"c": coverage},
+            )
+
+    def _query(self, interval):
+        return list(
+            coverage_fallback_query(
+                interval,
+                start_date=datetime(2021, 12, 31, 0, 0, 0, tzinfo=timezone.utc),
+                end_date=datetime(2022, 1, 3, 0, 0, 0, tzinfo=timezone.utc),
+                repository_id=self.repo.pk,
+                branch="master",
+            )
+        )
+
+    def test_rollups_match_commits(self):
+        for interval in Interval:
+            with override_settings(COVERAGE_ROLLUP_ENABLED=True):
+                from_rollups = self._query(interval)
+            with override_settings(COVERAGE_ROLLUP_ENABLED=False):
+                from_commits = self._query(interval)
+            assert from_rollups == from_commits
+
+    @override_settings(COVERAGE_ROLLUP_ENABLED=True)
+    def test_rollups(self):
+        assert self._query(Interval.INTERVAL_1_DAY) == [
+            {
+                # carried forward from before the start date
+                "timestamp_bin": datetime(2021, 12, 30, 0, 0, 0, tzinfo=timezone.utc),
+                "avg": 70.0,
+                "min": 70.0,
+                "max": 70.0,
+            },
+            {
+                "timestamp_bin": datetime(2022, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+                "avg": 82.5,
+                "min": 80.0,
+                "max": 85.0,
+            },
+            {
+                "timestamp_bin": datetime(2022, 1, 2, 0, 0, 0, tzinfo=timezone.utc),
+                "avg": 90.0,
+                "min": 90.0,
+                "max": 90.0,
+            },
+        ]
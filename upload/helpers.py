@@ -1,7 +1,6 @@
 import asyncio
 import logging
 import re
-from datetime import timedelta
 from json import dumps
 
 from asgiref.sync import async_to_sync
@@ -21,6 +20,7 @@ from reports.models import ReportSession
 from services.repo_providers import RepoProviderService
 from services.segment import SegmentService
 from services.task import TaskService
+from services.upload_usage import monthly_uploads_used
 from upload.tokenless.tokenless import TokenlessUploadHandler
 from utils.config import get_config
 from utils.encryption import encryptor
@@ -419,15 +419,7 @@ def check_commit_upload_constraints(commit: Commit):
             ).exists()
             if not did_commit_uploads_start_already:
                 limit = USER_PLAN_REPRESENTATIONS[owner.plan].monthly_uploads_limit
-                uploads_used = ReportSession.objects.filter(
-                    report__commit__repository__author_id=owner.ownerid,
-                    report__commit__repository__private=True,
-                    created_at__gte=timezone.now() - timedelta(days=30),
-                    # attempt at making the query more performant by telling the db to not
-                    # check old commits, which are unlikely to have recent uploads
-                    report__commit__timestamp__gte=timezone.now() - timedelta(days=60),
-                    upload_type="uploaded",
-                )[:limit].count()
+                uploads_used = monthly_uploads_used(owner, limit)
                 if uploads_used >= limit:
                     log.warning(
                         "User exceeded its limits for usage",
@@ -586,28 +578,61 @@ def store_report_in_redis(request, commitid, reportid, redis):
 def dispatch_upload_task(task_arguments, repository, redis):
     # Store task arguments in redis
     cache_uploads_eta = get_config(("setup", "cache", "uploads"), default=86400)
-    repo_queue_key = f"uploads/{repository.repoid}/{task_arguments.get('commit')}"
+    commitid = task_arguments.get("commit")
+    report_code = task_arguments.get("report_code")
+    repo_queue_key = f"uploads/{repository.repoid}/{commitid}"
     countdown = 4 if task_arguments.get("version") == "v4" else 0
+    # When > 0, only the first upload for a commit (and report code) within this
+    # many seconds schedules an upload task; the task runs once the window has
+    # passed and processes everything queued under `repo_queue_key` until then.
+    debounce_window = int(
+        get_config("setup", "upload_dispatch", "debounce_window", default=0) or 0
+    )
 
-    redis.rpush(repo_queue_key, dumps(task_arguments))
-    redis.expire(
+    pipeline = redis.pipeline()
+    pipeline.rpush(repo_queue_key, dumps(task_arguments))
+    pipeline.expire(
         repo_queue_key, cache_uploads_eta if cache_uploads_eta is not True else 86400
     )
-    redis.setex(
-        f"latest_upload/{repository.repoid}/{task_arguments.get('commit')}",
+    pipeline.setex(
+        f"latest_upload/{repository.repoid}/{commitid}",
         3600,
         timezone.now().timestamp(),
     )
+    debounce_key = f"upload_dispatch/{repository.repoid}/{commitid}/{report_code}"
+    if debounce_window > 0:
+        pipeline.set(
+            debounce_key,
+            1,
+            nx=True,
+            ex=debounce_window,
+        )
+        countdown = max(countdown, debounce_window)
+    results = pipeline.execute()
+
+    if debounce_window > 0 and not results[-1]:
+        # a task is already scheduled that will pick this upload up
+        log.info(
+            "Upload task already scheduled for commit",
+            extra=dict(repoid=repository.repoid, commit=commitid),
+        )
+        return
 
     # Send task to worker
-    TaskService().upload(
-        repoid=repository.repoid,
-        commitid=task_arguments.get("commit"),
-        report_code=task_arguments.get("report_code"),
-        countdown=max(
-            countdown, int(get_config("setup", "upload_processing_delay") or 0)
-        ),
-    )
+    try:
+        TaskService().upload(
+            repoid=repository.repoid,
+            commitid=commitid,
+            report_code=report_code,
+            countdown=max(
+                countdown, int(get_config("setup", "upload_processing_delay") or 0)
+            ),
+        )
+    except Exception:
+        if debounce_window > 0:
+            # no task will pick up the queued uploads, let the next one try again
+            redis.delete(debounce_key)
+        raise
 
 
 def validate_activated_repo(repository):
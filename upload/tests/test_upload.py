@@ -4,6 +4,7 @@ from json import dumps, loads
 from unittest.mock import ANY, PropertyMock, patch
 from urllib.parse import urlencode
 
+import fakeredis
 import pytest
 import requests
 from ddf import G
@@ -74,6 +75,24 @@ class MockRedis:
     def setex(self, redis_key, expire_time, report):
         return
 
+    def pipeline(self):
+        return MockRedisPipeline(self)
+
+
+class MockRedisPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.results = []
+
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            self.results.append(getattr(self.redis, name)(*args, **kwargs))
+
+        return command
+
+    def execute(self):
+        return self.results
+
 
 class UploadHandlerHelpersTest(TestCase):
     def test_parse_params_validates_valid_input(self):
@@ -897,6 +916,68 @@ class UploadHandlerHelpersTest(TestCase):
             countdown=4,
         )
 
+    @patch("services.task.TaskService.upload")
+    @patch("upload.helpers.get_config")
+    def test_dispatch_upload_task_debounced(self, mock_get_config, mock_upload):
+        mock_get_config.side_effect = (
+            lambda *args, default=None: 10
+            if args == ("setup", "upload_dispatch", "debounce_window")
+            else default
+        )
+        repo = G(Repository)
+        redis = fakeredis.FakeStrictRedis()
+        for report_code in ("local_report", "local_report", "other_report"):
+            task_arguments = {
+                "commit": "commit123",
+                "version": "v4",
+                "report_code": report_code,
+            }
+            dispatch_upload_task(task_arguments, repo, redis)
+
+        assert redis.llen(f"uploads/{repo.repoid}/commit123") == 3
+        assert redis.get(f"latest_upload/{repo.repoid}/commit123") is not None
+        assert mock_upload.call_count == 2
+        mock_upload.assert_any_call(
+            repoid=repo.repoid,
+            commitid="commit123",
+            report_code="local_report",
+            countdown=10,
+        )
+        mock_upload.assert_any_call(
+            repoid=repo.repoid,
+            commitid="commit123",
+            report_code="other_report",
+            countdown=10,
+        )
+
+    @patch("services.task.TaskService.upload")
+    @patch("upload.helpers.get_config")
+    def test_dispatch_upload_task_debounce_released_on_error(
+        self, mock_get_config, mock_upload
+    ):
+        mock_get_config.side_effect = (
+            lambda *args, default=None: 10
+            if args == ("setup", "upload_dispatch", "debounce_window")
+            else default
+        )
+        mock_upload.side_effect = [Exception("broker unavailable"), None]
+        repo = G(Repository)
+        redis = fakeredis.FakeStrictRedis()
+        task_arguments = {
+            "commit": "commit123",
+            "version": "v4",
+            "report_code": "local_report",
+        }
+
+        with pytest.raises(Exception):
+            dispatch_upload_task(task_arguments, repo, redis)
+        assert (
+            redis.get(f"upload_dispatch/{repo.repoid}/commit123/local_report") is None
+        )
+
+        dispatch_upload_task(task_arguments, repo, redis)
+        assert mock_upload.call_count == 2
+
 
 class UploadHandlerRouteTest(APITestCase):
     # Wrap client calls
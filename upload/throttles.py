@@ -1,15 +1,14 @@
 import logging
-from datetime import timedelta
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Q
-from django.utils import timezone
 from rest_framework.throttling import BaseThrottle
 from shared.reports.enums import UploadType
 
 from plan.constants import USER_PLAN_REPRESENTATIONS
 from reports.models import ReportSession
+from services.upload_usage import monthly_uploads_used
 from upload.helpers import _determine_responsible_owner
 
 log = logging.getLogger(__name__)
@@ -59,16 +58,7 @@ class UploadsPerWindowThrottle(BaseThrottle):
                         limit = USER_PLAN_REPRESENTATIONS[
                             owner.plan
                         ].monthly_uploads_limit
-                        uploads_used = ReportSession.objects.filter(
-                            report__commit__repository__author_id=owner.ownerid,
-                            report__commit__repository__private=True,
-                            created_at__gte=timezone.now() - timedelta(days=30),
-                            # attempt at making the query more performant by telling the db to not
-                            # check old commits, which are unlikely to have recent uploads
-                            report__commit__timestamp__gte=timezone.now()
-                            - timedelta(days=60),
-                            upload_type="uploaded",
-                        )[:limit].count()
+                        uploads_used = monthly_uploads_used(owner, limit)
                         if uploads_used >= limit:
                             log.warning(
                                 "User exceeded its limits for usage",
@@ -26,6 +26,7 @@ from core.commands.repository import RepositoryCommands
 from services.archive import ArchiveService
 from services.redis_configuration import get_redis_connection
 from services.segment import SegmentService
+from services.upload_usage import record_upload
 from upload.helpers import (
     check_commit_upload_constraints,
     determine_repo_for_upload,
@@ -304,6 +305,8 @@ class UploadHandler(APIView):
 
         # Send task to worker
         dispatch_upload_task(task_arguments, repository, redis)
+        # the upload itself is created by the worker
+        record_upload(repository, commit)
 
         # Segment Tracking
         segment_upload_data = upload_params.copy()
@@ -1,8 +1,9 @@
 import json
 import logging
-from functools import lru_cache
-from typing import Any, Callable
+import time
+from typing import Any, Callable, Optional
 
+from shared.metrics import metrics
 from shared.storage.exceptions import FileNotInStorageError
 from shared.utils.ReportEncoder import ReportEncoder
 
@@ -76,25 +77,47 @@ class ArchiveField:
         self.public_name = name
         self.db_field_name = "_" + name
         self.archive_field_name = "_" + name + "_storage_path"
+        # (storage path, value) of the last value read from storage
+        self.cached_value_name = "_" + name + "_archive_value"
+        self.metric_prefix = f"utils.archive_field.{owner.__name__}.{name}"
 
-    @lru_cache(maxsize=1)
     def _get_value_from_archive(self, obj):
-        repository = obj.get_repository()
-        archive_service = ArchiveService(repository=repository)
         archive_field = getattr(obj, self.archive_field_name)
+        cached = getattr(obj, self.cached_value_name, None)
+        if cached is not None and cached[0] == archive_field:
+            return cached[1]
+
+        file_str = None
         if archive_field:
-            try:
-                file_str = archive_service.read_file(archive_field)
-                return self.rehydrate_fn(obj, json.loads(file_str))
-            except FileNotInStorageError:
-                log.error(
-                    "Archive enabled field not in storage",
-                    extra=dict(
-                        storage_path=archive_field,
-                        object_id=obj.id,
-                        commit=obj.get_commitid(),
-                    ),
-                )
+            file_str = self._read_file(obj.get_repository(), archive_field)
+        return self._cache_value(obj, archive_field, file_str)
+
+    def _read_file(self, repository, archive_field: str) -> Optional[str]:
+        archive_service = ArchiveService(repository=repository)
+        start = time.perf_counter()
+        try:
+            file_str = archive_service.read_file(archive_field)
+        except FileNotInStorageError:
+            return None
+        metrics.timing(
+            f"{self.metric_prefix}.duration", (time.perf_counter() - start) * 1000
+        )
+        metrics.incr(f"{self.metric_prefix}.bytes", len(file_str))
+        return file_str
+
+    def _cache_value(self, obj, archive_field: Optional[str], file_str):
+        if file_str is not None:
+            value = self.rehydrate_fn(obj, json.loads(file_str))
+        elif archive_field:
+            log.error(
+                "Archive enabled field not in storage",
+                extra=dict(
+                    storage_path=archive_field,
+                    object_id=obj.id,
+                    commit=obj.get_commitid(),
+                ),
+            )
+            value = self.default_value
         else:
             log.info(
                 "Both db_field and archive_field are None",
@@ -103,9 +126,13 @@ class ArchiveField:
                     commit=obj.get_commitid(),
                 ),
             )
-        return self.default_value
+            value = self.default_value
+        setattr(obj, self.cached_value_name, (archive_field, value))
+        return value
 
     def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
         db_field = getattr(obj, self.db_field_name)
         if db_field is not None:
             return self.rehydrate_fn(obj, db_field)
@@ -137,6 +164,7 @@ class ArchiveField:
                 archive_service.delete_file(old_file_path)
             setattr(obj, self.archive_field_name, path)
             setattr(obj, self.db_field_name, None)
-            self._get_value_from_archive.cache_clear()
+            if hasattr(obj, self.cached_value_name):
+                delattr(obj, self.cached_value_name)
         else:
             setattr(obj, self.db_field_name, value)